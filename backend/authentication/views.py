@@ -94,14 +94,14 @@ def logout(request):
 @permission_classes([permissions.IsAuthenticated])
 def profile(request):
     """Perfil do usuário"""
+    # Lido do banco: o usuário da autenticação JWT só traz o id
+    user = User.objects.get(pk=request.user.pk)
     if request.method == "GET":
-        serializer = UserProfileSerializer(request.user)
+        serializer = UserProfileSerializer(user)
         return Response(serializer.data)
 
     elif request.method == "PUT":
-        serializer = UserProfileSerializer(
-            request.user, data=request.data, partial=True
-        )
+        serializer = UserProfileSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             return Response(
@@ -116,7 +116,7 @@ def change_password(request):
     """Alteração de senha"""
     serializer = ChangePasswordSerializer(data=request.data)
     if serializer.is_valid():
-        user = request.user
+        user = User.objects.get(pk=request.user.pk)
         if not user.check_password(serializer.validated_data["old_password"]):
             return Response(
                 {"error": "Senha atual incorreta."}, status=status.HTTP_400_BAD_REQUEST
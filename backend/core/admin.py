@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.db import transaction
 from .models import Feira, Expositor, Produto, Ingresso
+from .ingressos import reservar, transferir
 
 
 @admin.register(Feira)
@@ -15,12 +17,13 @@ class FeiraAdmin(admin.ModelAdmin):
     ]
     list_filter = ["cidade", "estado", "data_inicio", "data_termino", "criado_em"]
     search_fields = ["nome", "descricao", "cidade", "estado"]
-    readonly_fields = ["id", "criado_em", "atualizado_em"]
+    readonly_fields = ["id", "ingressos_vendidos", "criado_em", "atualizado_em"]
     fieldsets = (
         ("Informações Básicas", {"fields": ("nome", "descricao")}),
         ("Localização", {"fields": ("local", "cidade", "estado")}),
         ("Datas", {"fields": ("data_inicio", "data_termino")}),
         ("Preços", {"fields": ("preco_ingresso",)}),
+        ("Ingressos", {"fields": ("capacidade", "ingressos_vendidos")}),
         (
             "Metadados",
             {
@@ -75,19 +78,39 @@ class IngressoAdmin(admin.ModelAdmin):
         "numero_ingresso",
         "feira",
         "data_emissao",
+        "checkin_em",
         "criado_por",
         "criado_em",
     ]
-    list_filter = ["feira", "data_emissao", "criado_em"]
+    list_filter = ["feira", "data_emissao", "checkin_em", "criado_em"]
     search_fields = ["numero_ingresso", "feira__nome", "criado_por__username"]
-    readonly_fields = ["id", "numero_ingresso", "data_emissao", "criado_em"]
+    readonly_fields = [
+        "id",
+        "numero_ingresso",
+        "data_emissao",
+        "checkin_em",
+        "criado_em",
+        "atualizado_em",
+    ]
     fieldsets = (
         (
             "Informações do Ingresso",
-            {"fields": ("numero_ingresso", "feira", "data_emissao")},
+            {"fields": ("numero_ingresso", "feira", "data_emissao", "checkin_em")},
         ),
         (
             "Metadados",
-            {"fields": ("id", "criado_por", "criado_em"), "classes": ("collapse",)},
+            {
+                "fields": ("id", "criado_por", "criado_em", "atualizado_em"),
+                "classes": ("collapse",),
+            },
         ),
     )
+
+    def save_model(self, request, obj, form, change):
+        # As exclusões devolvem o lugar pelo post_delete (core.signals)
+        with transaction.atomic():
+            if not change:
+                reservar(obj.feira_id)
+            elif "feira" in form.changed_data:
+                transferir(form.initial["feira"], obj.feira_id)
+            super().save_model(request, obj, form, change)
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _reparar_indices_busca(sender, using, **kwargs):
+    from django.db import connections
+
+    from .search import reparar_indices
+
+    reparar_indices(connections[using])
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(_reparar_indices_busca, sender=self)
@@ -0,0 +1,107 @@
+"""
+Autenticação JWT sem consultar o usuário a cada requisição.
+
+O ``JWTAuthentication`` do simplejwt busca o ``User`` no banco em toda
+requisição autenticada, mas a API quase sempre só precisa do id (dono dos
+objetos, ``criado_por``). ``JWTUsuarioTokenAuthentication`` monta um
+``UsuarioToken`` só com o id do token, depois de conferir no cache de
+situações abaixo que o usuário existe e está ativo; os demais campos são
+lidos do banco, todos de uma vez, se forem usados (ex.: ao serializar o
+usuário). Nenhuma claim do token vira campo do modelo, então um ``save()``
+nunca grava valores vindos do token.
+
+A situação de cada usuário (ativo, inativo ou inexistente) fica num LRU em
+memória por processo, limitado a ``AUTENTICACAO_CACHE_MAX_USUARIOS``
+entradas, e cada entrada vale por ``AUTENTICACAO_CACHE_TIMEOUT`` segundos.
+Alterações e exclusões de usuários também incrementam uma versão no
+``django.core.cache`` (``core.transacoes``), e o processo descarta
+as situações guardadas ao ver a versão nova.
+
+Com um cache compartilhado entre os processos (ex.: Redis), um usuário
+desativado ou excluído tem os tokens recusados já na requisição seguinte.
+Com o ``LocMemCache`` padrão, a versão só vale no processo que fez a
+alteração, e os demais processos recusam o usuário quando a entrada expira;
+o mesmo vale para alterações que não disparam sinais, como
+``queryset.update(is_active=False)``. Nesses casos, ``invalidar()`` pode
+ser chamada diretamente.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import UsuarioToken
+from .transacoes import incrementar, versoes
+
+CHAVE_VERSAO = "core:autenticacao:versao"
+
+# user_id -> (is_active ou None se o usuário não existir, validade)
+_situacoes = OrderedDict()
+_versao = None
+_lock = threading.Lock()
+
+
+def situacao(user_id):
+    """``is_active`` do usuário, ou ``None`` se ele não existir"""
+    global _versao
+    (versao,) = versoes([CHAVE_VERSAO])
+    agora = time.monotonic()
+    with _lock:
+        if versao != _versao:
+            _situacoes.clear()
+            _versao = versao
+        elif user_id in _situacoes:
+            ativo, validade = _situacoes[user_id]
+            if validade > agora:
+                _situacoes.move_to_end(user_id)
+                return ativo
+
+    ativo = (
+        UsuarioToken.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+        .values_list("is_active", flat=True)
+        .first()
+    )
+    with _lock:
+        # Uma versão nova pode ter chegado durante a consulta
+        if _versao == versao:
+            _situacoes[user_id] = (ativo, agora + settings.AUTENTICACAO_CACHE_TIMEOUT)
+            _situacoes.move_to_end(user_id)
+            while len(_situacoes) > settings.AUTENTICACAO_CACHE_MAX_USUARIOS:
+                _situacoes.popitem(last=False)
+    return ativo
+
+
+def invalidar():
+    """Descarta as situações guardadas neste e nos demais processos"""
+    incrementar(CHAVE_VERSAO)
+
+
+class JWTUsuarioTokenAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` que não lê o usuário do banco (ver o início do módulo)"""
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Precisa do hash da senha, que só está na linha do usuário
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        ativo = situacao(user_id)
+        if ativo is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not ativo:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        # Os demais campos ficam adiados, como num only("id")
+        return UsuarioToken.from_db(
+            router.db_for_read(UsuarioToken), [api_settings.USER_ID_FIELD], [user_id]
+        )
@@ -0,0 +1,224 @@
+"""
+Índice de prefixos em memória para o autocomplete de nomes.
+
+Cada processo mantém, por modelo, um array ordenado de chaves normalizadas
+(sem acentos e em minúsculas) construído sob demanda a partir de
+``values_list("id", "nome")``. Cada nome gera uma chave por palavra
+("feira do livro", "do livro", "livro"), de modo que o prefixo digitado
+casa com o início de qualquer palavra. A consulta é uma busca binária
+(``bisect``) seguida de uma varredura curta, sem acesso ao banco.
+
+Os sinais de ``core.signals`` agendam, para quando a transação confirmar,
+a troca apenas dos registros salvos ou excluídos. O callback relê os nomes
+com uma consulta, incrementa um contador de versão no cache compartilhado e
+guarda as alterações dessa versão no cache por ``ALTERACOES_TIMEOUT``
+segundos. Cada processo compara a versão a cada consulta e aplica as
+alterações que faltam ao seu índice; se alguma já expirou, ou se são
+muitas, o índice é remontado do banco. ``invalidar`` (ex.: após um
+``bulk_create``) força essa remontagem.
+"""
+
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Feira, Expositor, Produto
+from .transacoes import Acumulador, acumular, incrementar, versoes
+
+MODELOS = {
+    "feira": Feira,
+    "expositor": Expositor,
+    "produto": Produto,
+}
+
+# Acima disso o callback só troca a versão e os índices são remontados
+MAX_ALTERACOES = 500
+# Versões atrasadas que um processo ainda aplica em vez de remontar o índice
+MAX_VERSOES_ATRASADAS = 50
+ALTERACOES_TIMEOUT = 300
+
+_indices = {}
+_lock = threading.Lock()
+
+
+def normalizar(texto):
+    """Remove acentos e caixa para comparar prefixos"""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def _entradas(pk, nome):
+    palavras = normalizar(nome).split()
+    return [(" ".join(palavras[i:]), pk, nome) for i in range(len(palavras))]
+
+
+class PrefixIndex:
+    """Array ordenado de (chave, id, nome) com busca por prefixo"""
+
+    def __init__(self, linhas, versao, entradas=None):
+        # pk -> nome, do registro mais antigo para o mais novo
+        self.nomes = {str(pk): nome for pk, nome in linhas}
+        if entradas is None:
+            entradas = [
+                e for pk, nome in self.nomes.items() for e in _entradas(pk, nome)
+            ]
+        entradas.sort()
+        self.chaves = [chave for chave, _, _ in entradas]
+        self.valores = [(pk, nome) for _, pk, nome in entradas]
+        self.versao = versao
+
+    def alterado(self, alteracoes, versao):
+        """
+        Cópia do índice com ``alteracoes`` aplicadas, em ordem. Cada uma é
+        ``(pk, nome, criado)``, com ``nome`` ``None`` para um registro
+        excluído. Registros alterados fora do índice (mais antigos que os
+        indexados) continuam fora, como numa remontagem.
+        """
+        nomes = dict(self.nomes)
+        trocados = set()
+        for pk, nome, criado in alteracoes:
+            trocados.add(pk)
+            if nome is None:
+                nomes.pop(pk, None)
+            elif criado:
+                nomes.pop(pk, None)
+                nomes[pk] = nome
+            elif pk in nomes:
+                nomes[pk] = nome
+        # Os mais antigos saem para respeitar o limite, como numa remontagem
+        excedentes = len(nomes) - settings.AUTOCOMPLETE_MAX_REGISTROS
+        for pk in list(nomes)[: max(excedentes, 0)]:
+            del nomes[pk]
+            trocados.add(pk)
+
+        # A cópia não altera as listas que outras threads estão lendo
+        entradas = [
+            (chave, pk, nome)
+            for chave, (pk, nome) in zip(self.chaves, self.valores)
+            if pk not in trocados
+        ]
+        for pk in trocados:
+            if pk in nomes:
+                entradas.extend(_entradas(pk, nomes[pk]))
+        return PrefixIndex(nomes.items(), versao, entradas)
+
+    def buscar(self, prefixo, limite):
+        resultados = []
+        vistos = set()
+        posicao = bisect_left(self.chaves, prefixo)
+        while posicao < len(self.chaves) and len(resultados) < limite:
+            if not self.chaves[posicao].startswith(prefixo):
+                break
+            pk, nome = self.valores[posicao]
+            if pk not in vistos:
+                vistos.add(pk)
+                resultados.append({"id": pk, "nome": nome})
+            posicao += 1
+        return resultados
+
+
+def _chave_versao(tipo):
+    return f"core:autocomplete:versao:{tipo}"
+
+
+def _chave_alteracoes(tipo, versao):
+    return f"core:autocomplete:alteracoes:{tipo}:{versao}"
+
+
+def _publicar(tipo, pks):
+    """Registra no cache as alterações dos ``pks`` (``pk -> criado``), ou ``None``"""
+    alteracoes = None
+    if pks is not None and len(pks) <= MAX_ALTERACOES:
+        nomes = dict(MODELOS[tipo].objects.filter(pk__in=pks).values_list("id", "nome"))
+        alteracoes = [(str(pk), nomes.get(pk), criado) for pk, criado in pks.items()]
+    versao = incrementar(_chave_versao(tipo))
+    if versao is None or alteracoes is None:
+        return
+    cache.set(_chave_alteracoes(tipo, versao), alteracoes, ALTERACOES_TIMEOUT)
+    with _lock:
+        indice = _indices.get(tipo)
+        if indice is not None and indice.versao == versao - 1:
+            _indices[tipo] = indice.alterado(alteracoes, versao)
+
+
+class _Alteracoes(Acumulador):
+    """Registros alterados na transação"""
+
+    def __init__(self):
+        # tipo -> {pk: criado}, ou None para remontar o índice
+        self.tipos = {}
+
+    def adicionar(self, tipo, pk, criado):
+        if pk is None:
+            self.tipos[tipo] = None
+            return
+        pks = self.tipos.setdefault(tipo, {})
+        if pks is not None:
+            pks[pk] = pks.get(pk, False) or criado
+
+    def executar(self):
+        for tipo, pks in self.tipos.items():
+            _publicar(tipo, pks)
+
+
+def alterar(model, pk, criado=False):
+    """
+    Troca o registro no índice do modelo quando a transação confirmar;
+    ``pk`` ``None`` remonta o índice inteiro.
+    """
+    for tipo, modelo in MODELOS.items():
+        if modelo is model:
+            acumular(_Alteracoes, tipo, pk, criado)
+            return
+
+
+def invalidar(model):
+    """Remonta o índice do modelo em todos os processos quando a transação confirmar"""
+    alterar(model, None)
+
+
+def _obter_indice(tipo, versao):
+    indice = _indices.get(tipo)
+    if indice is not None and indice.versao == versao:
+        return indice
+    with _lock:
+        indice = _indices.get(tipo)
+        if indice is not None and indice.versao == versao:
+            return indice
+        if indice is not None and 0 < versao - indice.versao <= MAX_VERSOES_ATRASADAS:
+            # Aplica as alterações publicadas pelos outros processos
+            chaves = [
+                _chave_alteracoes(tipo, v) for v in range(indice.versao + 1, versao + 1)
+            ]
+            publicadas = cache.get_many(chaves)
+            if len(publicadas) == len(chaves):
+                alteracoes = [a for chave in chaves for a in publicadas[chave]]
+                indice = _indices[tipo] = indice.alterado(alteracoes, versao)
+                return indice
+        # Limita a memória: apenas os registros mais recentes são indexados
+        linhas = (
+            MODELOS[tipo]
+            .objects.order_by("-criado_em")
+            .values_list("id", "nome")[: settings.AUTOCOMPLETE_MAX_REGISTROS]
+        )
+        indice = PrefixIndex(reversed(list(linhas)), versao)
+        _indices[tipo] = indice
+    return indice
+
+
+def autocompletar(texto, tipos=None, limite=10):
+    """Retorna até ``limite`` nomes por tipo que começam com o texto"""
+    prefixo = " ".join(normalizar(texto).split())
+    if not prefixo:
+        return []
+    tipos = [tipo for tipo in (tipos or MODELOS) if tipo in MODELOS]
+    atuais = versoes([_chave_versao(tipo) for tipo in tipos])
+
+    resultados = []
+    for tipo, versao in zip(tipos, atuais):
+        for item in _obter_indice(tipo, versao).buscar(prefixo, limite):
+            resultados.append({"tipo": tipo, **item})
+    return resultados
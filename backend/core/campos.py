@@ -0,0 +1,126 @@
+"""
+Campos esparsos nas leituras da API (``?fields=`` e ``?omit=``).
+
+``?fields=nome,data_inicio`` limita a resposta aos campos listados e
+``?omit=descricao,criado_por`` remove campos dela. O corte é feito em dois
+pontos:
+
+- no serializer (``CamposDinamicosMixin``), que descarta os campos não
+  pedidos antes de serializar;
+- na consulta (``CamposEsparsosMixin``), cujo ``only()`` passa a ler apenas
+  as colunas dos campos pedidos. Relações não pedidas (ex.: ``criado_por``)
+  saem do ``select_related``, junto com o JOIN e suas colunas.
+
+As colunas de cada campo vêm do ``source`` dele no serializer, então os
+serializers e as consultas não precisam repetir a lista.
+"""
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import BaseSerializer
+
+PARAMETRO_CAMPOS = "fields"
+PARAMETRO_OMITIR = "omit"
+
+
+def _nomes(request, parametro):
+    valor = request.query_params.get(parametro, "")
+    return [nome.strip() for nome in valor.split(",") if nome.strip()]
+
+
+def campos_selecionados(request, disponiveis):
+    """
+    Nomes de ``disponiveis`` que devem aparecer na resposta, na ordem do
+    serializer, ou ``None`` se a requisição não restringe os campos.
+    """
+    pedidos = _nomes(request, PARAMETRO_CAMPOS)
+    omitidos = _nomes(request, PARAMETRO_OMITIR)
+    if not pedidos and not omitidos:
+        return None
+    for parametro, nomes in ((PARAMETRO_CAMPOS, pedidos), (PARAMETRO_OMITIR, omitidos)):
+        desconhecidos = [nome for nome in nomes if nome not in disponiveis]
+        if desconhecidos:
+            raise ValidationError(
+                {parametro: [f"Campos desconhecidos: {', '.join(desconhecidos)}."]}
+            )
+    return [
+        nome
+        for nome in disponiveis
+        if (not pedidos or nome in pedidos) and nome not in omitidos
+    ]
+
+
+def caminhos(campo):
+    """Caminhos do ORM lidos por um campo (ou serializer aninhado)"""
+    caminho = "__".join(campo.source_attrs)
+    if isinstance(campo, BaseSerializer):
+        return [
+            f"{caminho}__{sub}"
+            for subcampo in campo.fields.values()
+            for sub in caminhos(subcampo)
+        ]
+    return [caminho]
+
+
+def projetar(queryset, serializer, campos, fixos=()):
+    """Restringe ``only()`` e ``select_related`` às colunas dos ``campos``"""
+    colunas = list(fixos)
+    for nome in campos:
+        colunas.extend(caminhos(serializer.fields[nome]))
+    relacoes = {coluna.rsplit("__", 1)[0] for coluna in colunas if "__" in coluna}
+    queryset = queryset.select_related(None)
+    if relacoes:
+        # Sem argumentos, select_related() seguiria todas as relações
+        queryset = queryset.select_related(*sorted(relacoes))
+    return queryset.only(*colunas)
+
+
+class CamposDinamicosMixin:
+    """
+    Serializer que respeita ``?fields=`` e ``?omit=`` da requisição.
+
+    Com ``usuarios_incluidos`` no contexto (ver ``core.incluidos``),
+    ``criado_por`` passa a ser apenas o id do usuário.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Indica se os campos diferem dos declarados (ver CamposEsparsosMixin)
+        self.personalizado = False
+        if self.context.get("usuarios_incluidos") and "criado_por" in self.fields:
+            self.fields["criado_por"] = serializers.PrimaryKeyRelatedField(
+                read_only=True
+            )
+            self.personalizado = True
+        request = self.context.get("request")
+        if request is None:
+            return
+        selecionados = campos_selecionados(request, self.fields)
+        if selecionados is not None:
+            for nome in set(self.fields) - set(selecionados):
+                self.fields.pop(nome)
+            self.personalizado = True
+
+
+class CamposEsparsosMixin:
+    """
+    Aplica ``?fields=``/``?omit=`` à consulta de ``list`` e ``retrieve``.
+
+    ``campos_fixos`` são sempre lidos, como a chave da paginação por cursor.
+    """
+
+    campos_fixos = ("id", "criado_em")
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # Views genéricas (sem action) só fazem leituras
+        if getattr(self, "action", "list") not in ("list", "retrieve"):
+            return queryset
+        if getattr(self, "exportando", False):
+            # As colunas da exportação já vêm dos campos pedidos (core.streaming)
+            return queryset
+        # O serializer da resposta, já com os campos pedidos
+        serializer = self.get_serializer()
+        if not getattr(serializer, "personalizado", False):
+            return queryset
+        return projetar(queryset, serializer, serializer.fields, self.campos_fixos)
@@ -0,0 +1,238 @@
+"""
+Catálogo pré-montado de cada feira (``/api/feiras/{id}/catalogo/``).
+
+O catálogo é um único documento JSON com a feira, seus expositores e os
+produtos de cada expositor, guardado comprimido (gzip) em ``CatalogoFeira``
+e no cache. A primeira leitura monta o documento com três consultas; depois
+disso cada leitura confere o ``etag`` de ``CatalogoFeira`` (uma consulta pela
+chave primária) e serve o conteúdo do cache se ele for o da mesma versão, ou
+do banco caso contrário, sem consultar as tabelas de origem nem serializar
+nada.
+
+Os sinais de ``core.signals`` registram quais expositores mudaram (o próprio
+expositor ou algum de seus produtos) e, quando a transação é confirmada, só
+esses expositores e seus produtos são consultados de novo e trocados no
+documento existente. Alterações na própria feira remontam o documento, já
+que o nome dela se repete em todos os itens; o mesmo vale para os usuários
+de ``criado_por``. O número de ingressos vendidos fica de fora, pois muda a
+cada venda; ele continua disponível em ``/api/feiras/{id}/``.
+
+Como o ``etag`` é conferido no banco, um processo com o cache local (ou um
+cache antigo) nunca serve um documento desatualizado. Além do gzip gravado
+no banco, o cache guarda a versão em brotli, gerada uma vez ao preencher o
+cache (ver ``core.compressao``).
+"""
+
+import gzip
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import compressao
+from .models import CatalogoFeira, Feira, Expositor, Produto
+from .serializers import (
+    FeiraDetailSerializer,
+    ExpositorListSerializer,
+    ProdutoListSerializer,
+)
+from .transacoes import Acumulador, acumular
+
+
+def _chave(feira_id):
+    return f"core:catalogo:v2:{feira_id}"
+
+
+def _entrada(etag, conteudo):
+    """Entrada do cache: ``(etag, {codificação: conteúdo})``"""
+    variantes = {compressao.GZIP: conteudo}
+    if compressao.BROTLI in compressao.CODIFICACOES:
+        variantes[compressao.BROTLI] = compressao.comprimir(
+            gzip.decompress(conteudo), compressao.BROTLI
+        )
+    return etag, variantes
+
+
+def _dados_feira(feira):
+    dados = FeiraDetailSerializer(feira).data
+    # Muda a cada venda; consultado em /api/feiras/{id}/
+    dados.pop("ingressos_vendidos", None)
+    return dados
+
+
+def _ordem(expositor):
+    return (expositor["nome"], expositor["id"])
+
+
+def _dados_expositores(feira_id, ids=None):
+    """Expositores da feira (ou só os de ``ids``) com seus produtos"""
+    expositores = Expositor.objects.filter(feira_id=feira_id).select_related(
+        "feira", "criado_por"
+    )
+    produtos = Produto.objects.filter(expositor__feira_id=feira_id).select_related(
+        "expositor__feira", "criado_por"
+    )
+    if ids is not None:
+        expositores = expositores.filter(pk__in=ids)
+        produtos = produtos.filter(expositor_id__in=ids)
+
+    por_expositor = {}
+    for produto in produtos.order_by("nome", "id"):
+        por_expositor.setdefault(produto.expositor_id, []).append(produto)
+
+    resultado = []
+    for expositor in expositores:
+        dados = ExpositorListSerializer(expositor).data
+        dados["produtos"] = ProdutoListSerializer(
+            por_expositor.get(expositor.pk, []), many=True
+        ).data
+        resultado.append(dados)
+    return resultado
+
+
+def _gravar(catalogo, documento, criar=False):
+    conteudo = compressao.comprimir(
+        json.dumps(
+            documento, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+        ).encode(),
+        compressao.GZIP,
+    )
+    catalogo.conteudo = conteudo
+    catalogo.etag = '"{}"'.format(hashlib.sha256(conteudo).hexdigest()[:32])
+    catalogo.save(force_insert=criar)
+    transaction.on_commit(
+        lambda: cache.set(
+            _chave(catalogo.feira_id), _entrada(catalogo.etag, conteudo), None
+        )
+    )
+
+
+def construir(feira):
+    """Monta o catálogo completo da feira e o grava"""
+    expositores = sorted(_dados_expositores(feira.pk), key=_ordem)
+    documento = {"feira": _dados_feira(feira), "expositores": expositores}
+    catalogo = CatalogoFeira(feira=feira)
+    _gravar(catalogo, documento, criar=True)
+    return catalogo
+
+
+def obter(feira_id):
+    """
+    ``(etag, {codificação: conteúdo})`` do catálogo, com ao menos o gzip,
+    montando-o na primeira leitura.
+    Levanta ``Feira.DoesNotExist`` se a feira não existir.
+    """
+    etag = (
+        CatalogoFeira.objects.filter(feira_id=feira_id)
+        .values_list("etag", flat=True)
+        .first()
+    )
+    entrada = cache.get(_chave(feira_id))
+    if entrada is not None and entrada[0] == etag:
+        return entrada
+    catalogo = CatalogoFeira.objects.filter(feira_id=feira_id).first()
+    if catalogo is None:
+        feira = Feira.objects.select_related("criado_por").get(pk=feira_id)
+        try:
+            with transaction.atomic():
+                catalogo = construir(feira)
+        except IntegrityError:
+            # Outro processo montou o mesmo catálogo ao mesmo tempo
+            catalogo = CatalogoFeira.objects.get(feira_id=feira_id)
+    entrada = _entrada(catalogo.etag, bytes(catalogo.conteudo))
+    cache.set(_chave(feira_id), entrada, None)
+    return entrada
+
+
+def atualizar(feira_id, expositores=None):
+    """
+    Troca no catálogo existente os expositores indicados (e seus produtos);
+    sem ``expositores``, remonta o documento inteiro.
+    """
+    with transaction.atomic():
+        catalogo = (
+            CatalogoFeira.objects.select_for_update().filter(feira_id=feira_id).first()
+        )
+        if catalogo is None:
+            # Ainda não montado: será montado por inteiro na primeira leitura
+            return
+        if expositores is None:
+            feira = Feira.objects.select_related("criado_por").get(pk=feira_id)
+            documento = {
+                "feira": _dados_feira(feira),
+                "expositores": sorted(_dados_expositores(feira_id), key=_ordem),
+            }
+        else:
+            documento = json.loads(gzip.decompress(catalogo.conteudo))
+            ids = {str(pk) for pk in expositores}
+            mantidos = [e for e in documento["expositores"] if e["id"] not in ids]
+            # Passa pelo JSON para ordenar com os mesmos tipos do documento
+            novos = json.loads(
+                json.dumps(_dados_expositores(feira_id, ids), cls=JSONEncoder)
+            )
+            documento["expositores"] = sorted(mantidos + novos, key=_ordem)
+        _gravar(catalogo, documento)
+
+
+def remover(feira_id):
+    """Descarta o catálogo em cache de uma feira excluída"""
+    transaction.on_commit(lambda: cache.delete(_chave(feira_id)))
+
+
+class _Alteracoes(Acumulador):
+    """O que mudou em cada catálogo na transação"""
+
+    def __init__(self):
+        # feira_id -> ids de expositores alterados, ou None para remontar tudo
+        self.feiras = {}
+        # Expositores cuja feira só é conhecida ao confirmar (alterações de produto)
+        self.expositores = set()
+
+    def adicionar(self, feira_id, expositor_id):
+        if feira_id is None:
+            self.expositores.add(expositor_id)
+        elif expositor_id is None:
+            self.feiras[feira_id] = None
+        else:
+            atuais = self.feiras.setdefault(feira_id, set())
+            if atuais is not None:
+                atuais.add(expositor_id)
+
+    def executar(self):
+        for expositor_id, feira_id in Expositor.objects.filter(
+            pk__in=self.expositores
+        ).values_list("pk", "feira_id"):
+            self.adicionar(feira_id, expositor_id)
+        existentes = set(
+            Feira.objects.filter(pk__in=self.feiras).values_list("pk", flat=True)
+        )
+        for feira_id, expositores in self.feiras.items():
+            if feira_id in existentes:
+                atualizar(feira_id, expositores)
+
+
+def agendar(feira_id=None, expositor_id=None):
+    """
+    Registra uma alteração para atualizar o catálogo quando a transação
+    confirmar: só a feira remonta o catálogo inteiro, feira e expositor troca
+    esse expositor e só o expositor resolve a feira ao confirmar.
+    """
+    acumular(_Alteracoes, feira_id, expositor_id)
+
+
+def agendar_usuario(user_id):
+    """Remonta, ao confirmar, os catálogos em que o usuário aparece"""
+    feiras = (
+        CatalogoFeira.objects.filter(
+            Q(feira__criado_por_id=user_id)
+            | Q(feira__expositores__criado_por_id=user_id)
+            | Q(feira__expositores__produtos__criado_por_id=user_id)
+        )
+        .values_list("feira_id", flat=True)
+        .distinct()
+    )
+    for feira_id in feiras:
+        agendar(feira_id)
@@ -0,0 +1,151 @@
+"""
+Check-in de ingressos na portaria.
+
+Cada processo mantém, por feira, um dicionário
+``numero_ingresso -> [id, checkin_em]`` carregado sob demanda com uma única
+consulta. O número lido é procurado nesse índice, sem ida ao banco, e um
+ingresso que já teve check-in é respondido direto dele.
+
+A primeira leitura grava o check-in na hora, com um ``UPDATE`` que só
+preenche ``checkin_em`` vazio. Se o mesmo ingresso for lido em portarias
+atendidas por processos diferentes, só um ``UPDATE`` altera a linha: é ele
+que responde ``primeira_leitura``, e os demais devolvem o horário gravado.
+O mesmo ``UPDATE`` preenche ``atualizado_em``, usado pela sincronização.
+Assim nenhuma entrada admitida se perde se o processo for encerrado, e a
+entrada repetida é detectada em qualquer processo.
+
+Ingressos emitidos depois da carga do índice são procurados no banco na
+primeira leitura e acrescentados a ele. Alterações e exclusões de ingressos
+incrementam a versão da feira no cache compartilhado (``core.transacoes``),
+e o índice é recarregado em todos os processos.
+
+Os índices ficam num LRU limitado a ``CHECKIN_MAX_FEIRAS`` feiras. Cada
+feira é carregada sob um lock próprio: a carga de uma feira não bloqueia
+os check-ins das demais, e leituras simultâneas da mesma feira esperam uma
+única carga.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Feira, Ingresso
+from .transacoes import incrementar, versoes
+
+# feira_id -> IndiceFeira, do menos ao mais usado
+_indices = OrderedDict()
+# feira_id -> lock da carga em andamento
+_cargas = {}
+_lock = threading.Lock()
+
+
+class IndiceFeira:
+    """Ingressos de uma feira indexados pelo número"""
+
+    def __init__(self, feira_id, versao):
+        self.feira_id = feira_id
+        self.versao = versao
+        self.lock = threading.Lock()
+        self.dono_id = Feira.objects.values_list("criado_por_id", flat=True).get(
+            pk=feira_id
+        )
+        self.ingressos = {
+            numero: [pk, checkin_em]
+            for pk, numero, checkin_em in Ingresso.objects.filter(
+                feira_id=feira_id
+            ).values_list("id", "numero_ingresso", "checkin_em")
+        }
+
+    def procurar(self, numero_ingresso):
+        """Entrada do ingresso, consultando o banco se ainda não estiver no índice"""
+        entrada = self.ingressos.get(numero_ingresso)
+        if entrada is None:
+            linha = (
+                Ingresso.objects.filter(
+                    feira_id=self.feira_id, numero_ingresso=numero_ingresso
+                )
+                .values_list("id", "checkin_em")
+                .first()
+            )
+            if linha is not None:
+                with self.lock:
+                    entrada = self.ingressos.setdefault(numero_ingresso, list(linha))
+        return entrada
+
+
+def _chave_versao(feira_id):
+    return f"core:checkin:versao:{feira_id}"
+
+
+def invalidar(feira_id):
+    """Descarta o índice da feira neste e nos demais processos"""
+    with _lock:
+        _indices.pop(str(feira_id), None)
+    incrementar(_chave_versao(feira_id))
+
+
+def _indice_atual(feira_id, versao):
+    with _lock:
+        indice = _indices.get(feira_id)
+        if indice is None or indice.versao != versao:
+            return None
+        _indices.move_to_end(feira_id)
+        return indice
+
+
+def obter_indice(feira_id):
+    """Índice da feira; levanta ``Feira.DoesNotExist`` se ela não existir"""
+    feira_id = str(feira_id)
+    (versao,) = versoes([_chave_versao(feira_id)])
+    indice = _indice_atual(feira_id, versao)
+    if indice is not None:
+        return indice
+
+    with _lock:
+        carga = _cargas.setdefault(feira_id, threading.Lock())
+    try:
+        with carga:
+            indice = _indice_atual(feira_id, versao)
+            if indice is None:
+                # Consulta fora do lock global
+                indice = IndiceFeira(feira_id, versao)
+                with _lock:
+                    _indices[feira_id] = indice
+                    _indices.move_to_end(feira_id)
+                    while len(_indices) > settings.CHECKIN_MAX_FEIRAS:
+                        _indices.popitem(last=False)
+    finally:
+        with _lock:
+            if _cargas.get(feira_id) is carga:
+                del _cargas[feira_id]
+    return indice
+
+
+def registrar(indice, numero_ingresso):
+    """
+    Registra a leitura de um ingresso. Retorna ``None`` se o número não
+    pertence à feira, ou ``(primeira_leitura, checkin_em)``.
+    """
+    entrada = indice.procurar(numero_ingresso)
+    if entrada is None:
+        return None
+    if entrada[1] is not None:
+        return False, entrada[1]
+
+    agora = timezone.now()
+    gravados = Ingresso.objects.filter(pk=entrada[0], checkin_em__isnull=True).update(
+        checkin_em=agora, atualizado_em=agora
+    )
+    if gravados:
+        checkin_em = agora
+    else:
+        # Check-in feito por outro processo (ou o ingresso foi excluído)
+        linha = Ingresso.objects.filter(pk=entrada[0]).values_list("checkin_em").first()
+        if linha is None:
+            return None
+        checkin_em = linha[0]
+    with indice.lock:
+        entrada[1] = checkin_em
+    return bool(gravados), checkin_em
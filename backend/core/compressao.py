@@ -0,0 +1,173 @@
+"""
+Compressão das respostas (gzip e brotli).
+
+``CompressaoMiddleware`` comprime as respostas com pelo menos
+``COMPRESSAO_MINIMO`` bytes na codificação preferida pelo cliente no
+``Accept-Encoding``: brotli (``br``), se o pacote ``brotli`` estiver
+instalado, ou gzip. Respostas em fluxo (exportações, ``?stream=1``) são
+comprimidas bloco a bloco, sem juntar o conteúdo. O gzip fica a cargo do
+``GZipMiddleware`` do Django, com o mesmo tratamento do ETag e a mesma
+mitigação do BREACH (bytes aleatórios no cabeçalho do gzip).
+
+O brotli não tem onde receber esses bytes, então só é usado nas respostas
+sem segredos (``pode_usar_brotli``): leituras (GET/HEAD) anônimas, sem
+``Authorization``, sem ``Set-Cookie`` e sem token CSRF. As demais (dados do
+usuário, tokens JWT do login) saem em gzip.
+
+Respostas guardadas em cache (``core.respostas``, ``core.catalogo``) são
+comprimidas uma única vez, ao entrar no cache, com nível alto: ``variantes``
+gera as versões comprimidas e ``codificacao`` escolhe a que o cliente
+aceita. Essas respostas saem com ``Content-Encoding`` e o middleware não as
+comprime de novo. Como são iguais para todos os clientes e não ecoam dados
+da requisição, podem ir em brotli mesmo para usuários autenticados.
+"""
+
+import gzip
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+GZIP = "gzip"
+BROTLI = "br"
+# Em ordem de preferência
+CODIFICACOES = (BROTLI, GZIP) if brotli is not None else (GZIP,)
+
+# Qualidade do brotli a cada requisição: perto da taxa do gzip nível 6
+QUALIDADE_BROTLI = 5
+# Nos caches: as qualidades 10 e 11 custam dez vezes mais para pouco ganho
+QUALIDADE_BROTLI_CACHE = 9
+NIVEL_GZIP_CACHE = 9
+
+
+def aceitas(request):
+    """Codificações do ``Accept-Encoding`` da requisição, sem as de ``q=0``"""
+    resultado = set()
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        nome, *parametros = item.split(";")
+        q = 1.0
+        for parametro in parametros:
+            chave, _, valor = parametro.partition("=")
+            if chave.strip().lower() == "q":
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            resultado.add(nome.strip().lower())
+    return resultado
+
+
+def codificacao(request, disponiveis=CODIFICACOES):
+    """Codificação preferida entre ``disponiveis`` aceitas pelo cliente, ou ``None``"""
+    pedidas = aceitas(request)
+    for nome in CODIFICACOES:
+        if nome in disponiveis and (nome in pedidas or "*" in pedidas):
+            return nome
+    return None
+
+
+def pode_usar_brotli(request, response):
+    """Indica se a resposta não carrega segredos expostos ao BREACH"""
+    if request.method not in ("GET", "HEAD") or "HTTP_AUTHORIZATION" in request.META:
+        return False
+    if response.cookies or request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        return False
+    # O DRF repassa ao HttpRequest o usuário autenticado pela view
+    usuario = getattr(request, "user", None)
+    return usuario is None or not usuario.is_authenticated
+
+
+def comprimir(conteudo, nome):
+    """``conteudo`` comprimido em ``nome`` com o nível usado nos caches"""
+    if nome == BROTLI:
+        return brotli.compress(conteudo, quality=QUALIDADE_BROTLI_CACHE)
+    return gzip.compress(conteudo, compresslevel=NIVEL_GZIP_CACHE, mtime=0)
+
+
+def variantes(conteudo):
+    """
+    Versões comprimidas de ``conteudo`` por codificação, apenas as que
+    ficaram menores que o original; vazio abaixo de ``COMPRESSAO_MINIMO``.
+    """
+    if len(conteudo) < settings.COMPRESSAO_MINIMO:
+        return {}
+    resultado = {}
+    for nome in CODIFICACOES:
+        comprimido = comprimir(conteudo, nome)
+        if len(comprimido) < len(conteudo):
+            resultado[nome] = comprimido
+    return resultado
+
+
+def marcar(response, nome):
+    """Cabeçalhos de uma resposta cujo conteúdo já está comprimido em ``nome``"""
+    patch_vary_headers(response, ("Accept-Encoding",))
+    # ETag fraco, como no GZipMiddleware: outra representação do mesmo recurso
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response.headers["ETag"] = "W/" + etag
+    response.headers["Content-Encoding"] = nome
+
+
+def _brotli_em_fluxo(blocos):
+    compressor = brotli.Compressor(quality=QUALIDADE_BROTLI)
+    for bloco in blocos:
+        # flush: cada bloco chega ao cliente sem esperar os seguintes
+        yield compressor.process(bloco) + compressor.flush()
+    yield compressor.finish()
+
+
+async def _brotli_em_fluxo_async(blocos):
+    compressor = brotli.Compressor(quality=QUALIDADE_BROTLI)
+    async for bloco in blocos:
+        yield compressor.process(bloco) + compressor.flush()
+    yield compressor.finish()
+
+
+class CompressaoMiddleware(GZipMiddleware):
+    """Comprime as respostas em brotli ou gzip (ver o início do módulo)"""
+
+    def process_response(self, request, response):
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSAO_MINIMO
+        ):
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+
+        disponiveis = CODIFICACOES
+        if not pode_usar_brotli(request, response):
+            disponiveis = (GZIP,)
+        nome = codificacao(request, disponiveis)
+        if nome == GZIP:
+            return super().process_response(request, response)
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if nome is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _brotli_em_fluxo_async(
+                    response.streaming_content
+                )
+            else:
+                response.streaming_content = _brotli_em_fluxo(
+                    response.streaming_content
+                )
+            # O tamanho comprimido só é conhecido ao final
+            del response.headers["Content-Length"]
+        else:
+            comprimido = brotli.compress(response.content, quality=QUALIDADE_BROTLI)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers["Content-Length"] = str(len(comprimido))
+        marcar(response, nome)
+        return response
@@ -0,0 +1,127 @@
+"""
+Requisições condicionais (``ETag`` / ``Last-Modified``) nos viewsets.
+
+Os validadores são calculados no banco antes de buscar e serializar os
+objetos, de modo que valem para todos os processos:
+
+- detalhe: uma consulta com ``values_list`` dos campos de atualização do
+  objeto (e dos relacionados exibidos na resposta);
+- listagem: um único ``aggregate`` com ``Max`` desses campos e ``Count``
+  sobre o queryset já filtrado. O total muda quando um item sai da lista,
+  o que o ``Max`` sozinho não perceberia.
+
+Se o ``If-None-Match`` (ou, no detalhe, o ``If-Modified-Since``) confere,
+a resposta é ``304`` sem serialização. Nas listagens o ``If-Modified-Since``
+é ignorado, porque uma exclusão não altera a data mais recente. O total é
+reaproveitado pela paginação, então a listagem não faz consultas a mais.
+No modo cursor da paginação não há validadores, já que ele existe
+justamente para evitar o ``COUNT``.
+
+As vendas de ingressos marcam ``Feira.vendas_em`` (``core.ingressos``),
+que só entra nos validadores das feiras. Os dados do usuário exibidos em
+``criado_por`` não entram em nenhum validador: ``User`` não tem data de
+alteração, e uma troca de nome só aparece quando o objeto muda.
+"""
+
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def _etag(request, valores):
+    partes = [
+        request.get_full_path(),
+        request.accepted_media_type,
+        str(request.user.pk),
+        *map(str, valores),
+    ]
+    return "W/" + quote_etag(hashlib.sha256("|".join(partes).encode()).hexdigest())
+
+
+def _ultima_alteracao(datas):
+    datas = [data for data in datas if data is not None]
+    return int(max(datas).timestamp()) if datas else None
+
+
+class CondicionalMixin:
+    """
+    Adiciona ``ETag`` e ``Last-Modified`` a ``list`` e ``retrieve``.
+
+    ``campos_atualizacao`` lista os campos de data que mudam quando o conteúdo
+    da resposta muda, incluindo os de modelos relacionados exibidos.
+    """
+
+    campos_atualizacao = ("atualizado_em",)
+
+    def validadores_extras(self):
+        """Valores adicionais que entram no ETag da listagem"""
+        return []
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is not None and self.paginator.cursor_requested(request):
+            # O modo cursor existe para evitar o COUNT sobre a tabela inteira
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        agregados = queryset.order_by().aggregate(
+            total=Count("pk"),
+            **{
+                f"max_{i}": Max(campo)
+                for i, campo in enumerate(self.campos_atualizacao)
+            },
+        )
+        datas = [agregados[f"max_{i}"] for i in range(len(self.campos_atualizacao))]
+        # Reaproveitado pela paginação no lugar de um novo COUNT
+        self.total_filtrado = agregados["total"]
+        return self._responder_condicional(
+            request,
+            _etag(request, [agregados["total"], *datas, *self.validadores_extras()]),
+            _ultima_alteracao(datas),
+            False,
+            super().list,
+            *args,
+            **kwargs,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            datas = (
+                self.get_queryset()
+                .filter(**{self.lookup_field: lookup})
+                .values_list(*self.campos_atualizacao)
+                .first()
+            )
+        except (ValidationError, ValueError):
+            datas = None
+        if datas is None:
+            # Deixa o retrieve padrão responder 404
+            return super().retrieve(request, *args, **kwargs)
+        return self._responder_condicional(
+            request,
+            _etag(request, datas),
+            _ultima_alteracao(datas),
+            True,
+            super().retrieve,
+            *args,
+            **kwargs,
+        )
+
+    def _responder_condicional(
+        self, request, etag, ultima_alteracao, usar_data, gerar, *args, **kwargs
+    ):
+        nao_modificado = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=ultima_alteracao if usar_data else None,
+        )
+        if nao_modificado is None:
+            response = gerar(request, *args, **kwargs)
+        else:
+            response = nao_modificado
+        response["ETag"] = etag
+        if ultima_alteracao is not None:
+            response["Last-Modified"] = http_date(ultima_alteracao)
+        return response
@@ -0,0 +1,31 @@
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .search import buscar
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    SearchFilter que usa o índice textual (GIN/FTS5) quando o modelo tem um.
+
+    Modelos sem índice de busca, ou bancos sem suporte, continuam usando
+    o ``icontains`` do SearchFilter padrão sobre ``search_fields``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        texto = request.query_params.get(self.search_param, "")
+        if not texto.strip():
+            return queryset
+        resultado = buscar(queryset, texto)
+        if resultado is None:
+            return super().filter_queryset(request, queryset, view)
+        return resultado
+
+
+class RankedOrderingFilter(OrderingFilter):
+    """OrderingFilter que ordena pela relevância da busca quando não há ?ordering="""
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params and "search_rank" in queryset.query.annotations:
+            return ["-search_rank", *(self.get_default_ordering(view) or [])]
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,224 @@
+"""
+Importação de produtos e expositores a partir de CSV.
+
+O arquivo é lido em lotes de ``IMPORTACAO_LOTE`` linhas. Em cada lote:
+
+- os campos de cada linha são convertidos e validados pelos serializers
+  de importação, com as mesmas regras da API, mas sem consultar o banco;
+- as regras que valem para o lote inteiro (``validar_lote``, ex.: o
+  ``validate_preco`` dos produtos) são conferidas numa única passada sobre
+  as linhas já convertidas;
+- a existência do expositor (ou da feira) é conferida com uma única
+  consulta para o lote inteiro, assim como o nome único do expositor na
+  feira;
+- as linhas válidas são gravadas com um ``bulk_create``.
+
+Como o ``bulk_create`` não dispara os sinais de ``core.signals``, os
+documentos da busca, o catálogo, o autocomplete e o cache de respostas são
+atualizados aqui. A importação inteira roda numa transação; linhas com erro
+são apenas informadas no relatório, com o número da linha no arquivo.
+"""
+
+import csv
+from abc import ABC, abstractmethod
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from . import autocomplete, catalogo, respostas, search
+from .models import Feira, Expositor, Produto
+from .serializers import ExpositorImportacaoSerializer, ProdutoImportacaoSerializer
+
+# Erros detalhados no relatório; os demais são apenas contados
+MAXIMO_ERROS = 1000
+
+
+class ErroImportacao(Exception):
+    """Arquivo que não pode ser lido como CSV da importação"""
+
+
+class Relatorio:
+    """Resultado da importação"""
+
+    def __init__(self):
+        self.criados = 0
+        self.total_erros = 0
+        self.erros = []
+
+    def erro(self, linha, erros):
+        self.total_erros += 1
+        if len(self.erros) < MAXIMO_ERROS:
+            self.erros.append({"linha": linha, "erros": erros})
+
+    def como_dict(self):
+        return {
+            "criados": self.criados,
+            "total_erros": self.total_erros,
+            "erros": self.erros,
+        }
+
+
+class Importador(ABC):
+    """
+    Importação em lotes de um modelo com chave estrangeira para ``pai``.
+
+    As subclasses definem o serializer de cada linha, como buscar os pais de
+    um lote e como indexar os objetos criados.
+    """
+
+    model = None
+    serializer_class = None
+    pai = None
+    # Nomes de coluna aceitos além dos campos do serializer (ex.: os da exportação)
+    apelidos = {}
+
+    def __init__(self, criado_por, lote=None):
+        self.criado_por = criado_por
+        self.lote = lote or settings.IMPORTACAO_LOTE
+
+    def importar(self, arquivo):
+        """Importa as linhas do arquivo (texto) e retorna o ``Relatorio``"""
+        relatorio = Relatorio()
+        try:
+            leitor = csv.DictReader(arquivo)
+            self._conferir_colunas(leitor.fieldnames or [])
+            linhas = ((leitor.line_num, dados) for dados in leitor)
+            with transaction.atomic():
+                while bloco := list(islice(linhas, self.lote)):
+                    self._importar_bloco(bloco, relatorio)
+                if relatorio.criados:
+                    autocomplete.invalidar(self.model)
+                    respostas.invalidar(self.model)
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ErroImportacao(f"Arquivo CSV inválido: {exc}")
+        return relatorio
+
+    def _conferir_colunas(self, colunas):
+        campos = self.serializer_class().fields
+        presentes = {self.apelidos.get(coluna, coluna) for coluna in colunas}
+        faltando = [
+            nome
+            for nome, campo in campos.items()
+            if campo.required and nome not in presentes
+        ]
+        if faltando:
+            raise ErroImportacao(f"Colunas ausentes: {', '.join(faltando)}")
+
+    def _importar_bloco(self, bloco, relatorio):
+        # Um único serializer valida todas as linhas, como no many=True
+        serializer = self.serializer_class()
+        validos = []
+        for linha, dados in bloco:
+            for coluna, campo in self.apelidos.items():
+                if campo not in dados and coluna in dados:
+                    dados[campo] = dados[coluna]
+            try:
+                validos.append((linha, serializer.run_validation(dados)))
+            except ValidationError as exc:
+                relatorio.erro(linha, exc.detail)
+        erros_lote = self.validar_lote(validos)
+        for linha, erros in erros_lote.items():
+            relatorio.erro(linha, erros)
+        validos = [
+            (linha, dados) for linha, dados in validos if linha not in erros_lote
+        ]
+
+        pais = self.buscar_pais({dados[self.pai] for _, dados in validos})
+        objetos = []
+        for linha, dados in validos:
+            if dados[self.pai] not in pais:
+                relatorio.erro(
+                    linha, {self.pai: ["Objeto com este ID não encontrado."]}
+                )
+                continue
+            erros = self.validar(dados)
+            if erros:
+                relatorio.erro(linha, erros)
+                continue
+            dados[f"{self.pai}_id"] = dados.pop(self.pai)
+            objetos.append(self.model(criado_por=self.criado_por, **dados))
+
+        self.model.objects.bulk_create(objetos)
+        self.indexar(objetos, pais)
+        relatorio.criados += len(objetos)
+
+    @abstractmethod
+    def buscar_pais(self, ids):
+        """Dicionário id -> dados do pai, apenas dos ids existentes"""
+
+    def validar_lote(self, validos):
+        """Erros por linha (``{linha: erros}``) conferidos sobre o lote inteiro"""
+        return {}
+
+    def validar(self, dados):
+        """Erros da linha que dependem do banco ou das linhas anteriores"""
+        return None
+
+    @abstractmethod
+    def indexar(self, objetos, pais):
+        """Atualiza a busca e os catálogos com os objetos criados (sem sinais)"""
+
+
+class ImportadorProdutos(Importador):
+    model = Produto
+    serializer_class = ProdutoImportacaoSerializer
+    pai = "expositor"
+    apelidos = {"expositor_id": "expositor"}
+
+    def validar_lote(self, validos):
+        # validate_preco do ProdutoCreateUpdateSerializer, numa só passada
+        mensagem = self.serializer_class.PRECO_INVALIDO
+        return {
+            linha: {"preco": [mensagem]}
+            for linha, dados in validos
+            if dados["preco"] <= 0
+        }
+
+    def buscar_pais(self, ids):
+        return {
+            pk: (nome, feira_id, feira_nome)
+            for pk, nome, feira_id, feira_nome in Expositor.objects.filter(
+                pk__in=ids
+            ).values_list("pk", "nome", "feira_id", "feira__nome")
+        }
+
+    def indexar(self, objetos, pais):
+        search.indexar_novos_produtos(objetos, pais)
+        for expositor_id in {produto.expositor_id for produto in objetos}:
+            catalogo.agendar(pais[expositor_id][1], expositor_id)
+
+
+class ImportadorExpositores(Importador):
+    model = Expositor
+    serializer_class = ExpositorImportacaoSerializer
+    pai = "feira"
+    apelidos = {"feira_id": "feira"}
+
+    def __init__(self, criado_por, lote=None):
+        super().__init__(criado_por, lote)
+        # (feira, nome) já usados no banco ou em linhas anteriores do arquivo
+        self.usados = set()
+
+    def buscar_pais(self, ids):
+        return dict(Feira.objects.filter(pk__in=ids).values_list("pk", "nome"))
+
+    def _importar_bloco(self, bloco, relatorio):
+        nomes = {(dados.get("nome") or "").strip() for _, dados in bloco}
+        self.usados.update(
+            Expositor.objects.filter(nome__in=nomes).values_list("feira_id", "nome")
+        )
+        super()._importar_bloco(bloco, relatorio)
+
+    def validar(self, dados):
+        chave = (dados["feira"], dados["nome"])
+        if chave in self.usados:
+            return {"nome": ["Já existe um expositor com este nome nesta feira."]}
+        self.usados.add(chave)
+        return None
+
+    def indexar(self, objetos, pais):
+        search.indexar_novos_expositores(objetos, pais)
+        for expositor in objetos:
+            catalogo.agendar(expositor.feira_id, expositor.pk)
@@ -0,0 +1,78 @@
+"""
+Usuários incluídos uma única vez na listagem (``?include=users``).
+
+Por padrão cada linha traz o ``criado_por`` completo (``UserSerializer``),
+repetido em todas as linhas do mesmo usuário e lido com um JOIN. Com
+``?include=users`` as linhas trazem apenas o id em ``criado_por`` e a
+resposta ganha ``included.users``, com cada usuário da página uma vez,
+buscados com um único ``in_bulk``:
+
+    {"count": ..., "results": [{"id": ..., "criado_por": 7}, ...],
+     "included": {"users": {"7": {"id": 7, "username": ...}}}}
+
+O JOIN com a tabela de usuários sai da consulta da listagem
+(``core.campos.CamposEsparsosMixin``).
+"""
+
+from django.contrib.auth.models import User
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .serializers import UserSerializer
+
+PARAMETRO = "include"
+USUARIOS = "users"
+
+
+def usuarios_pedidos(request):
+    """Indica se a requisição pediu ``?include=users``"""
+    valor = request.query_params.get(PARAMETRO, "")
+    nomes = {nome.strip() for nome in valor.split(",") if nome.strip()}
+    desconhecidos = nomes - {USUARIOS}
+    if desconhecidos:
+        raise ValidationError(
+            {
+                PARAMETRO: [
+                    f"Inclusões desconhecidas: {', '.join(sorted(desconhecidos))}."
+                ]
+            }
+        )
+    return USUARIOS in nomes
+
+
+def usuarios_incluidos(linhas):
+    """``included.users`` dos ids de ``criado_por`` das linhas"""
+    ids = {linha["criado_por"] for linha in linhas if linha.get("criado_por")}
+    usuarios = User.objects.only(*UserSerializer.Meta.fields).in_bulk(ids)
+    return {str(pk): UserSerializer(usuario).data for pk, usuario in usuarios.items()}
+
+
+class UsuariosIncluidosMixin:
+    """
+    Adiciona ``?include=users`` ao ``list`` do viewset.
+
+    Deve vir depois dos mixins de cache e de requisições condicionais, para
+    que ``included`` faça parte da resposta guardada.
+    """
+
+    def incluir_usuarios(self):
+        return self.action == "list" and usuarios_pedidos(self.request)
+
+    def get_serializer_context(self):
+        contexto = super().get_serializer_context()
+        if self.incluir_usuarios():
+            contexto["usuarios_incluidos"] = True
+        return contexto
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if (
+            self.incluir_usuarios()
+            and isinstance(response, Response)
+            and response.status_code == 200
+        ):
+            data = response.data
+            if not isinstance(data, dict):
+                data = response.data = {"results": data}
+            data["included"] = {"users": usuarios_incluidos(data["results"])}
+        return response
@@ -0,0 +1,110 @@
+"""
+Emissão de ingressos com controle de capacidade.
+
+A reserva de lugares é um único ``UPDATE`` condicional sobre a linha da
+feira (``ingressos_vendidos + n <= capacidade``). O banco avalia a
+condição e incrementa o contador atomicamente: no PostgreSQL apenas a
+linha da feira fica bloqueada até o fim da transação, e uma compra
+concorrente reavalia a condição sobre o valor já incrementado; no SQLite
+as escritas já são serializadas. Assim não há venda acima da capacidade
+nem bloqueio da tabela inteira. O mesmo ``UPDATE`` marca ``vendas_em``,
+e não ``atualizado_em``: assim uma venda muda os validadores das feiras,
+mas não os dos expositores e produtos (``core.condicional``).
+
+O lugar volta à feira no ``post_delete`` do ingresso (``core.signals``),
+na mesma transação da exclusão, seja pela API, pelo admin (inclusive a ação
+de excluir os selecionados) ou em cascata (ex.: usuário excluído). Um
+ingresso trocado de feira passa o lugar com ``transferir``.
+"""
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import respostas
+from .models import Feira, Ingresso
+from .numeracao import get_allocator
+
+
+class IngressosEsgotados(Exception):
+    """Não há lugares suficientes na feira para a quantidade pedida"""
+
+
+def reservar(feira_id, quantidade=1):
+    """Reserva ``quantidade`` lugares na feira ou levanta IngressosEsgotados"""
+    atualizadas = (
+        Feira.objects.filter(pk=feira_id)
+        .filter(
+            Q(capacidade__isnull=True)
+            | Q(capacidade__gte=F("ingressos_vendidos") + quantidade)
+        )
+        .update(
+            ingressos_vendidos=F("ingressos_vendidos") + quantidade,
+            vendas_em=timezone.now(),
+        )
+    )
+    if not atualizadas:
+        raise IngressosEsgotados("Ingressos esgotados para esta feira.")
+
+
+def liberar(feira_id, quantidade=1):
+    """Devolve lugares reservados (ex.: ingresso excluído)"""
+    # Também marca a exclusão para que os pacotes offline (core.pacote)
+    # antigos sejam substituídos por um pacote completo
+    agora = timezone.now()
+    Feira.objects.filter(pk=feira_id).update(
+        ingressos_vendidos=Greatest(F("ingressos_vendidos") - quantidade, 0),
+        ingressos_excluidos_em=agora,
+        vendas_em=agora,
+    )
+
+
+def transferir(feira_anterior_id, feira_id):
+    """
+    Passa o lugar de um ingresso trocado de feira para a nova feira, ou
+    levanta IngressosEsgotados. Deve rodar na transação que salva o ingresso.
+    """
+    if feira_anterior_id == feira_id:
+        return
+    reservar(feira_id)
+    liberar(feira_anterior_id)
+
+
+def emitir(feira, criado_por, **kwargs):
+    """Reserva um lugar e cria o ingresso na mesma transação"""
+    with transaction.atomic():
+        reservar(feira.pk)
+        return Ingresso.objects.create(feira=feira, criado_por=criado_por, **kwargs)
+
+
+def emitir_em_lote(pedidos, criado_por):
+    """
+    Emite vários ingressos numa única transação.
+
+    ``pedidos`` é uma lista de pares ``(feira, quantidade)``. Os lugares são
+    reservados com um UPDATE por feira, em ordem de id para que compras
+    concorrentes não entrem em deadlock. Os números são pré-alocados de uma
+    vez e as linhas são gravadas com ``bulk_create``.
+    """
+    quantidades = {}
+    for feira, quantidade in pedidos:
+        quantidades[feira.pk] = quantidades.get(feira.pk, 0) + quantidade
+
+    with transaction.atomic():
+        for feira_id in sorted(quantidades, key=str):
+            reservar(feira_id, quantidades[feira_id])
+        numeros = iter(get_allocator().reservar(sum(quantidades.values())))
+        ingressos = [
+            Ingresso(
+                numero_ingresso=next(numeros),
+                feira=feira,
+                criado_por=criado_por,
+            )
+            for feira, quantidade in pedidos
+            for _ in range(quantidade)
+        ]
+        criados = Ingresso.objects.bulk_create(ingressos)
+        # bulk_create não dispara post_save
+        respostas.invalidar(Ingresso)
+        return criados
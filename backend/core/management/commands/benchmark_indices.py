@@ -0,0 +1,175 @@
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import Feira, Expositor, Produto, Ingresso
+
+
+class Rollback(Exception):
+    """Usada para desfazer a massa de dados ao final do benchmark"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Popula uma massa de dados temporária e mostra o plano de execução e o "
+        "tempo das consultas das listagens com e sem os índices compostos. "
+        "Tudo é desfeito ao final (rollback)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--feiras", type=int, default=200)
+        parser.add_argument("--expositores-por-feira", type=int, default=20)
+        parser.add_argument("--produtos-por-expositor", type=int, default=10)
+        parser.add_argument("--ingressos", type=int, default=200_000)
+        parser.add_argument("--usuarios", type=int, default=1_000)
+        parser.add_argument("--repeticoes", type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.popular(options)
+                consultas = self.consultas()
+
+                self.analisar()
+                depois = self.medir(consultas, options["repeticoes"])
+
+                self.remover_indices()
+                self.analisar()
+                antes = self.medir(consultas, options["repeticoes"])
+
+                self.relatorio(consultas, antes, depois)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def popular(self, options):
+        self.stdout.write("Populando dados...")
+        User.objects.bulk_create(
+            User(username=f"benchmark-{i}") for i in range(options["usuarios"])
+        )
+        usuarios = list(User.objects.filter(username__startswith="benchmark-"))
+        cidades = ["Brasília", "São Paulo", "Recife", "Curitiba", "Belém"]
+        estados = ["DF", "SP", "PE", "PR", "PA"]
+
+        feiras = Feira.objects.bulk_create(
+            Feira(
+                nome=f"Feira {i}",
+                descricao="Descrição",
+                data_inicio=date(2025, 1, 1),
+                data_termino=date(2025, 1, 2),
+                local="Centro",
+                cidade=cidades[i % len(cidades)],
+                estado=estados[i % len(estados)],
+                criado_por=usuarios[i % len(usuarios)],
+            )
+            for i in range(options["feiras"])
+        )
+        expositores = Expositor.objects.bulk_create(
+            (
+                Expositor(
+                    nome=f"Expositor {j}",
+                    descricao="Descrição",
+                    contato="contato@exemplo.com",
+                    feira=feira,
+                    criado_por=usuarios[j % len(usuarios)],
+                )
+                for feira in feiras
+                for j in range(options["expositores_por_feira"])
+            ),
+            batch_size=1_000,
+        )
+        Produto.objects.bulk_create(
+            (
+                Produto(
+                    nome=f"Produto {k}",
+                    descricao="Descrição",
+                    preco="9.90",
+                    expositor=expositor,
+                    criado_por=expositor.criado_por,
+                )
+                for expositor in expositores
+                for k in range(options["produtos_por_expositor"])
+            ),
+            batch_size=1_000,
+        )
+        Ingresso.objects.bulk_create(
+            (
+                Ingresso(
+                    numero_ingresso=f"BENCH-{i}",
+                    feira=feiras[i % len(feiras)],
+                    criado_por=usuarios[i % len(usuarios)],
+                )
+                for i in range(options["ingressos"])
+            ),
+            batch_size=1_000,
+        )
+
+        self.usuario = usuarios[0]
+        self.feira = feiras[0]
+        self.expositor = expositores[0]
+
+    def consultas(self):
+        """Consultas equivalentes às listagens dos viewsets"""
+        return {
+            "ingressos do usuário": Ingresso.objects.filter(
+                criado_por=self.usuario
+            ).order_by("-criado_em", "-id")[:20],
+            "ingressos por feira": Ingresso.objects.filter(
+                criado_por=self.usuario, feira=self.feira
+            ).order_by("-criado_em", "-id")[:20],
+            "feiras por cidade": Feira.objects.filter(
+                cidade=self.feira.cidade
+            ).order_by("-criado_em", "-id")[:20],
+            "feiras por estado": Feira.objects.filter(
+                estado=self.feira.estado
+            ).order_by("-criado_em", "-id")[:20],
+            "expositores por feira": Expositor.objects.filter(
+                feira=self.feira
+            ).order_by("-criado_em", "-id")[:20],
+            "produtos por expositor": Produto.objects.filter(
+                expositor=self.expositor
+            ).order_by("-criado_em", "-id")[:20],
+            "produtos por feira": Produto.objects.filter(
+                expositor__feira=self.feira
+            ).order_by("-criado_em", "-id")[:20],
+            "produtos recentes": Produto.objects.order_by("-criado_em", "-id")[:20],
+        }
+
+    def medir(self, consultas, repeticoes):
+        resultados = {}
+        for nome, queryset in consultas.items():
+            plano = queryset.explain()
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                list(queryset.all())
+            media = (time.perf_counter() - inicio) / repeticoes * 1000
+            resultados[nome] = (plano, media)
+        return resultados
+
+    def remover_indices(self):
+        with connection.cursor() as cursor:
+            for model in (Feira, Expositor, Produto, Ingresso):
+                for index in model._meta.indexes:
+                    cursor.execute(
+                        f"DROP INDEX {connection.ops.quote_name(index.name)}"
+                    )
+
+    def analisar(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def relatorio(self, consultas, antes, depois):
+        for nome in consultas:
+            plano_antes, tempo_antes = antes[nome]
+            plano_depois, tempo_depois = depois[nome]
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{nome}"))
+            self.stdout.write(f"  sem índices ({tempo_antes:.2f} ms):")
+            self.stdout.write(self.indentar(plano_antes))
+            self.stdout.write(f"  com índices ({tempo_depois:.2f} ms):")
+            self.stdout.write(self.indentar(plano_depois))
+
+    def indentar(self, texto):
+        return "\n".join(f"    {linha}" for linha in texto.splitlines())
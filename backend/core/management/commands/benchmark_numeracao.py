@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.numeracao import Aleatorio, SequencialEmBlocos
+
+
+class Rollback(Exception):
+    """Usada para desfazer a tabela e as faixas reservadas ao final"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o alocador aleatório original com o sequencial em blocos "
+        "inserindo números em uma tabela com índice único. Mostra a vazão a "
+        "cada trecho e quantas colisões (que seriam erros 500) ocorreram. "
+        "Tudo é desfeito ao final (rollback)."
+    )
+
+    tabela = "benchmark_numeracao"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--linhas", type=int, default=10_000_000)
+        parser.add_argument("--lote", type=int, default=10_000)
+        parser.add_argument(
+            "--relatorio-a-cada",
+            type=int,
+            default=1_000_000,
+            help="Intervalo de linhas entre as medições parciais",
+        )
+
+    def handle(self, *args, **options):
+        for nome, allocator in (
+            ("aleatório", Aleatorio()),
+            ("sequencial em blocos", SequencialEmBlocos()),
+        ):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{nome}"))
+            try:
+                with transaction.atomic():
+                    self.executar(allocator, options)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def executar(self, allocator, options):
+        tabela = connection.ops.quote_name(self.tabela)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {tabela} (numero varchar(50) NOT NULL UNIQUE)"
+            )
+            sql = f"INSERT INTO {tabela} (numero) VALUES (%s) ON CONFLICT DO NOTHING"
+
+            inseridas = colisoes = 0
+            inicio = parcial = time.perf_counter()
+            proximo_relatorio = options["relatorio_a_cada"]
+            while inseridas + colisoes < options["linhas"]:
+                quantidade = min(
+                    options["lote"], options["linhas"] - inseridas - colisoes
+                )
+                numeros = allocator.reservar(quantidade)
+                cursor.executemany(sql, [(numero,) for numero in numeros])
+                # Linhas ignoradas pelo ON CONFLICT são colisões
+                novas = cursor.rowcount
+                colisoes += quantidade - novas
+                inseridas += novas
+
+                if inseridas + colisoes >= proximo_relatorio:
+                    agora = time.perf_counter()
+                    taxa = options["relatorio_a_cada"] / (agora - parcial)
+                    self.stdout.write(
+                        f"  {inseridas + colisoes:>12,} linhas  "
+                        f"{taxa:>10,.0f} linhas/s  {colisoes} colisões"
+                    )
+                    parcial = agora
+                    proximo_relatorio += options["relatorio_a_cada"]
+
+            total = time.perf_counter() - inicio
+            self.stdout.write(
+                f"  total: {inseridas:,} inseridas, {colisoes} colisões, "
+                f"{inseridas / total:,.0f} linhas/s"
+            )
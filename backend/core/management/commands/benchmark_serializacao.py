@@ -0,0 +1,192 @@
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Feira, Expositor, Produto, Ingresso
+from core.serializacao import compilar
+from core.serializers import (
+    FeiraListSerializer,
+    ExpositorListSerializer,
+    ProdutoListSerializer,
+    IngressoDetailSerializer,
+)
+from core.views import (
+    FEIRA_LIST_ONLY,
+    EXPOSITOR_LIST_ONLY,
+    PRODUTO_LIST_ONLY,
+    INGRESSO_LIST_ONLY,
+)
+
+
+class Rollback(Exception):
+    """Usada para desfazer a massa de dados ao final do benchmark"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a vazão (linhas/s) das listagens serializadas pelos "
+        "ModelSerializers com a serialização compilada a partir de values() "
+        "(ver core/serializacao.py), incluindo a leitura do banco. Confere "
+        "também que as duas saídas são idênticas. Tudo é desfeito ao final "
+        "(rollback)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--linhas", type=int, default=20_000)
+        parser.add_argument("--repeticoes", type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.popular(options["linhas"])
+                for nome, serializer_class, queryset in self.listagens():
+                    self.medir(nome, serializer_class, queryset, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def popular(self, linhas):
+        self.stdout.write("Populando dados...")
+        usuario = User.objects.create(username="benchmark-serializacao")
+        feiras = Feira.objects.bulk_create(
+            (
+                Feira(
+                    nome=f"Feira {i}",
+                    descricao="Descrição " * 20,
+                    data_inicio=date(2025, 1, 1),
+                    data_termino=date(2025, 1, 2),
+                    local="Centro",
+                    cidade="Brasília",
+                    estado="DF",
+                    preco_ingresso="25.00",
+                    criado_por=usuario,
+                )
+                for i in range(linhas)
+            ),
+            batch_size=1_000,
+        )
+        expositores = Expositor.objects.bulk_create(
+            (
+                Expositor(
+                    nome=f"Expositor {i}",
+                    descricao="Descrição " * 20,
+                    contato="contato@exemplo.com",
+                    feira=feiras[i % 100],
+                    criado_por=usuario,
+                )
+                for i in range(linhas)
+            ),
+            batch_size=1_000,
+        )
+        Produto.objects.bulk_create(
+            (
+                Produto(
+                    nome=f"Produto {i}",
+                    descricao="Descrição " * 20,
+                    preco="9.90",
+                    expositor=expositores[i % 100],
+                    criado_por=usuario,
+                )
+                for i in range(linhas)
+            ),
+            batch_size=1_000,
+        )
+        Ingresso.objects.bulk_create(
+            (
+                Ingresso(
+                    numero_ingresso=f"BENCH-{i}",
+                    feira=feiras[i % 100],
+                    checkin_em=timezone.now(),
+                    criado_por=usuario,
+                )
+                for i in range(linhas)
+            ),
+            batch_size=1_000,
+        )
+
+    def listagens(self):
+        """Consultas equivalentes ao list de cada viewset, sem paginação"""
+        return [
+            (
+                "feiras",
+                FeiraListSerializer,
+                Feira.objects.select_related("criado_por").only(*FEIRA_LIST_ONLY),
+            ),
+            (
+                "expositores",
+                ExpositorListSerializer,
+                Expositor.objects.select_related("feira", "criado_por").only(
+                    *EXPOSITOR_LIST_ONLY
+                ),
+            ),
+            (
+                "produtos",
+                ProdutoListSerializer,
+                Produto.objects.select_related("expositor__feira", "criado_por").only(
+                    *PRODUTO_LIST_ONLY
+                ),
+            ),
+            (
+                "ingressos",
+                IngressoDetailSerializer,
+                Ingresso.objects.select_related("feira", "criado_por").only(
+                    *INGRESSO_LIST_ONLY
+                ),
+            ),
+        ]
+
+    def medir(self, nome, serializer_class, queryset, options):
+        queryset = queryset.order_by("-criado_em", "-id")
+        compilado = compilar(serializer_class(), extras=("id", "criado_em"))
+        caminhos = [
+            (
+                "ModelSerializer",
+                # all(): uma nova consulta a cada repetição, sem o cache do queryset
+                lambda: list(queryset.all()),
+                lambda objetos: serializer_class(objetos, many=True).data,
+            ),
+            (
+                "compilada",
+                lambda: list(queryset.values(*compilado.caminhos)),
+                compilado.serializar,
+            ),
+        ]
+
+        renderer = JSONRenderer()
+        saidas = [renderer.render(serializar(ler())) for _, ler, serializar in caminhos]
+        identicas = saidas[0] == saidas[1]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{nome}"))
+        self.stdout.write(f"  {'':<16} {'total':>14} {'só serialização':>18}")
+        taxas = {}
+        for rotulo, ler, serializar in caminhos:
+            melhor_total = melhor_serializacao = float("inf")
+            for _ in range(options["repeticoes"]):
+                inicio = time.perf_counter()
+                linhas = ler()
+                meio = time.perf_counter()
+                serializar(linhas)
+                fim = time.perf_counter()
+                melhor_total = min(melhor_total, fim - inicio)
+                melhor_serializacao = min(melhor_serializacao, fim - meio)
+            taxas[rotulo] = (
+                len(linhas) / melhor_total,
+                len(linhas) / melhor_serializacao,
+            )
+            self.stdout.write(
+                f"  {rotulo:<16} {taxas[rotulo][0]:>10,.0f} l/s "
+                f"{taxas[rotulo][1]:>14,.0f} l/s"
+            )
+        ganho = [
+            compilada / atual
+            for compilada, atual in zip(taxas["compilada"], taxas["ModelSerializer"])
+        ]
+        self.stdout.write(
+            f"  {ganho[0]:.1f}x no total, {ganho[1]:.1f}x na serialização, "
+            f"saídas {'idênticas' if identicas else 'DIFERENTES'}"
+        )
@@ -0,0 +1,40 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Feira
+from core.pacote import DELTA, gerar, versao_valida
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta o pacote binário dos ingressos de uma feira para leitores "
+        "offline. Com --desde gera apenas o delta desde a versão informada "
+        "(ver core/pacote.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("feira", help="ID da feira")
+        parser.add_argument("--desde", type=int, help="Versão do último pacote")
+        parser.add_argument(
+            "--saida", help="Arquivo de saída (padrão: ingressos-<feira>-<versao>.bin)"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            feira = Feira.objects.get(pk=options["feira"])
+        except (Feira.DoesNotExist, ValidationError):
+            raise CommandError(f"Feira não encontrada: {options['feira']}")
+        if options["desde"] is not None and not versao_valida(options["desde"]):
+            raise CommandError(f"Versão inválida: {options['desde']}")
+
+        dados, tipo, versao = gerar(feira, options["desde"])
+        saida = options["saida"] or f"ingressos-{feira.pk}-{versao}.bin"
+        with open(saida, "wb") as arquivo:
+            arquivo.write(dados)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Delta' if tipo == DELTA else 'Pacote completo'} gravado em "
+                f"{saida}: {len(dados):,} bytes, versão {versao}"
+            )
+        )
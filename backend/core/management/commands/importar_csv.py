@@ -0,0 +1,54 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importacao import ErroImportacao, ImportadorExpositores, ImportadorProdutos
+
+IMPORTADORES = {
+    "produtos": ImportadorProdutos,
+    "expositores": ImportadorExpositores,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa produtos ou expositores de um arquivo CSV em lotes, com as "
+        "mesmas validações da API (ver core/importacao.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("tipo", choices=IMPORTADORES)
+        parser.add_argument("arquivo", help="Arquivo CSV com cabeçalho")
+        parser.add_argument(
+            "--usuario", required=True, help="Username gravado em criado_por"
+        )
+        parser.add_argument(
+            "--lote", type=int, help="Linhas por lote (padrão: IMPORTACAO_LOTE)"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            usuario = User.objects.get(username=options["usuario"])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário não encontrado: {options['usuario']}")
+
+        importador = IMPORTADORES[options["tipo"]](usuario, options["lote"])
+        try:
+            with open(options["arquivo"], encoding="utf-8-sig", newline="") as arquivo:
+                relatorio = importador.importar(arquivo)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except ErroImportacao as exc:
+            raise CommandError(str(exc))
+
+        for erro in relatorio.erros:
+            self.stderr.write(f"Linha {erro['linha']}: {erro['erros']}")
+        if relatorio.total_erros > len(relatorio.erros):
+            self.stderr.write(
+                f"... e mais {relatorio.total_erros - len(relatorio.erros)} erros"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{relatorio.criados} {options['tipo']} importados, "
+                f"{relatorio.total_erros} linhas com erro"
+            )
+        )
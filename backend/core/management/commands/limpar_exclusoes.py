@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Exclusao
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove os registros de exclusão (tombstones) mais antigos que o "
+        "período de retenção usado pela sincronização com ?updated_since=."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias",
+            type=int,
+            default=settings.EXCLUSOES_RETENCAO_DIAS,
+            help="Dias de retenção (padrão: EXCLUSOES_RETENCAO_DIAS)",
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(days=options["dias"])
+        removidos, _ = Exclusao.objects.filter(excluido_em__lt=limite).delete()
+        self.stdout.write(self.style.SUCCESS(f"{removidos} registros removidos"))
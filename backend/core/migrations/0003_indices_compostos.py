@@ -0,0 +1,51 @@
+# Generated by Django 5.2.2 on 2026-10-18 04:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_feira_preco_ingresso'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expositor',
+            index=models.Index(fields=['criado_em', 'id'], name='expositor_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expositor',
+            index=models.Index(fields=['feira', 'criado_em', 'id'], name='expositor_feira_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feira',
+            index=models.Index(fields=['criado_em', 'id'], name='feira_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feira',
+            index=models.Index(fields=['cidade', 'criado_em', 'id'], name='feira_cidade_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feira',
+            index=models.Index(fields=['estado', 'criado_em', 'id'], name='feira_estado_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingresso',
+            index=models.Index(fields=['criado_por', 'criado_em', 'id'], name='ingresso_usuario_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingresso',
+            index=models.Index(fields=['feira', 'criado_em', 'id'], name='ingresso_feira_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['criado_em', 'id'], name='produto_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['expositor', 'criado_em', 'id'], name='produto_expositor_criado_idx'),
+        ),
+    ]
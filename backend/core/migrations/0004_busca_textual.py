@@ -0,0 +1,89 @@
+from django.db import migrations
+
+# Cópia de core.search no momento desta migration: os campos e o DDL ficam
+# congelados aqui, sem importar o código atual da aplicação
+SEARCH_CONFIG = "portuguese"
+SEARCH_FIELDS = {
+    "Feira": ["nome", "descricao", "cidade", "estado"],
+    "Expositor": ["nome", "descricao"],
+    "Produto": ["nome", "descricao"],
+}
+
+
+def _gin_index(model):
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    campos = SEARCH_FIELDS[model._meta.object_name]
+    vector = SearchVector(campos[0], weight="A", config=SEARCH_CONFIG)
+    if len(campos) > 1:
+        vector = vector + SearchVector(*campos[1:], weight="B", config=SEARCH_CONFIG)
+    return GinIndex(vector, name=f"{model._meta.model_name}_busca_idx")
+
+
+def _sqlite_tem_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(opcao == "ENABLE_FTS5" for (opcao,) in cursor.fetchall())
+
+
+def _sqlite_fts_sql(model):
+    tabela = model._meta.db_table
+    fts = f"{tabela}_fts"
+    campos = SEARCH_FIELDS[model._meta.object_name]
+    colunas = ", ".join(campos)
+    novos = ", ".join(f"new.{campo}" for campo in campos)
+    antigos = ", ".join(f"old.{campo}" for campo in campos)
+    return [
+        f'CREATE VIRTUAL TABLE "{fts}" USING fts5({colunas}, '
+        f"content='{tabela}', content_rowid='rowid', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{tabela}" BEGIN '
+        f'INSERT INTO "{fts}"(rowid, {colunas}) VALUES (new.rowid, {novos}); END',
+        f'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{tabela}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {colunas}) '
+        f"VALUES ('delete', old.rowid, {antigos}); END",
+        f'CREATE TRIGGER "{fts}_au" AFTER UPDATE ON "{tabela}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {colunas}) '
+        f"VALUES ('delete', old.rowid, {antigos}); "
+        f'INSERT INTO "{fts}"(rowid, {colunas}) VALUES (new.rowid, {novos}); END',
+        f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+    ]
+
+
+def _modelos(apps):
+    return [apps.get_model("core", nome) for nome in SEARCH_FIELDS]
+
+
+def criar_indices_busca(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for model in _modelos(apps):
+        if vendor == "postgresql":
+            schema_editor.add_index(model, _gin_index(model))
+        elif vendor == "sqlite" and _sqlite_tem_fts5(schema_editor.connection):
+            for sql in _sqlite_fts_sql(model):
+                schema_editor.execute(sql)
+
+
+def remover_indices_busca(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for model in _modelos(apps):
+        if vendor == "postgresql":
+            schema_editor.remove_index(model, _gin_index(model))
+        elif vendor == "sqlite":
+            fts = f"{model._meta.db_table}_fts"
+            schema_editor.execute(f'DROP TABLE IF EXISTS "{fts}"')
+            for evento in ("ai", "ad", "au"):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS "{fts}_{evento}"')
+
+
+class Migration(migrations.Migration):
+    """Índice GIN (PostgreSQL) ou tabelas FTS5 sombra (SQLite) para a busca"""
+
+    dependencies = [
+        ("core", "0003_indices_compostos"),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices_busca, remover_indices_busca),
+    ]
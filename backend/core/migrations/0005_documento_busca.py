@@ -0,0 +1,155 @@
+# Generated by Django 5.2.2 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+# Cópia de core.search no momento desta migration: os campos e o DDL ficam
+# congelados aqui, sem importar o código atual da aplicação
+SEARCH_CONFIG = "portuguese"
+SEARCH_FIELDS = ["nome", "descricao", "feira_nome", "expositor_nome"]
+
+
+def _gin_index(model):
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    vector = SearchVector(SEARCH_FIELDS[0], weight="A", config=SEARCH_CONFIG)
+    vector = vector + SearchVector(
+        *SEARCH_FIELDS[1:], weight="B", config=SEARCH_CONFIG
+    )
+    return GinIndex(vector, name=f"{model._meta.model_name}_busca_idx")
+
+
+def _sqlite_tem_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(opcao == "ENABLE_FTS5" for (opcao,) in cursor.fetchall())
+
+
+def _sqlite_fts_sql(model):
+    tabela = model._meta.db_table
+    fts = f"{tabela}_fts"
+    colunas = ", ".join(SEARCH_FIELDS)
+    novos = ", ".join(f"new.{campo}" for campo in SEARCH_FIELDS)
+    antigos = ", ".join(f"old.{campo}" for campo in SEARCH_FIELDS)
+    return [
+        f'CREATE VIRTUAL TABLE "{fts}" USING fts5({colunas}, '
+        f"content='{tabela}', content_rowid='rowid', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{tabela}" BEGIN '
+        f'INSERT INTO "{fts}"(rowid, {colunas}) VALUES (new.rowid, {novos}); END',
+        f'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{tabela}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {colunas}) '
+        f"VALUES ('delete', old.rowid, {antigos}); END",
+        f'CREATE TRIGGER "{fts}_au" AFTER UPDATE ON "{tabela}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {colunas}) '
+        f"VALUES ('delete', old.rowid, {antigos}); "
+        f'INSERT INTO "{fts}"(rowid, {colunas}) VALUES (new.rowid, {novos}); END',
+        f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+    ]
+
+
+def popular_documentos(apps, schema_editor):
+    Feira = apps.get_model("core", "Feira")
+    Expositor = apps.get_model("core", "Expositor")
+    Produto = apps.get_model("core", "Produto")
+    DocumentoBusca = apps.get_model("core", "DocumentoBusca")
+
+    DocumentoBusca.objects.bulk_create(
+        (
+            DocumentoBusca(
+                tipo="feira",
+                objeto_id=feira.pk,
+                nome=feira.nome,
+                descricao=feira.descricao,
+                feira_id=feira.pk,
+                feira_nome=feira.nome,
+            )
+            for feira in Feira.objects.iterator()
+        ),
+        batch_size=1000,
+    )
+    DocumentoBusca.objects.bulk_create(
+        (
+            DocumentoBusca(
+                tipo="expositor",
+                objeto_id=expositor.pk,
+                nome=expositor.nome,
+                descricao=expositor.descricao,
+                feira_id=expositor.feira_id,
+                feira_nome=expositor.feira.nome,
+                expositor_id=expositor.pk,
+                expositor_nome=expositor.nome,
+            )
+            for expositor in Expositor.objects.select_related("feira").iterator()
+        ),
+        batch_size=1000,
+    )
+    DocumentoBusca.objects.bulk_create(
+        (
+            DocumentoBusca(
+                tipo="produto",
+                objeto_id=produto.pk,
+                nome=produto.nome,
+                descricao=produto.descricao,
+                feira_id=produto.expositor.feira_id,
+                feira_nome=produto.expositor.feira.nome,
+                expositor_id=produto.expositor_id,
+                expositor_nome=produto.expositor.nome,
+                preco=produto.preco,
+            )
+            for produto in Produto.objects.select_related(
+                "expositor__feira"
+            ).iterator()
+        ),
+        batch_size=1000,
+    )
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.add_index(DocumentoBusca, _gin_index(DocumentoBusca))
+    elif vendor == "sqlite" and _sqlite_tem_fts5(schema_editor.connection):
+        for sql in _sqlite_fts_sql(DocumentoBusca):
+            schema_editor.execute(sql)
+
+
+def remover_documentos(apps, schema_editor):
+    DocumentoBusca = apps.get_model("core", "DocumentoBusca")
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.remove_index(DocumentoBusca, _gin_index(DocumentoBusca))
+    elif vendor == "sqlite":
+        fts = f"{DocumentoBusca._meta.db_table}_fts"
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{fts}"')
+        for evento in ("ai", "ad", "au"):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS "{fts}_{evento}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_busca_textual'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('feira', 'Feira'), ('expositor', 'Expositor'), ('produto', 'Produto')], max_length=20, verbose_name='Tipo')),
+                ('objeto_id', models.UUIDField(verbose_name='ID do Objeto')),
+                ('nome', models.CharField(max_length=200, verbose_name='Nome')),
+                ('descricao', models.TextField(verbose_name='Descrição')),
+                ('feira_id', models.UUIDField(db_index=True, verbose_name='ID da Feira')),
+                ('feira_nome', models.CharField(max_length=200, verbose_name='Nome da Feira')),
+                ('expositor_id', models.UUIDField(blank=True, db_index=True, null=True, verbose_name='ID do Expositor')),
+                ('expositor_nome', models.CharField(blank=True, max_length=200, verbose_name='Nome do Expositor')),
+                ('preco', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Preço')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Documento de Busca',
+                'verbose_name_plural': 'Documentos de Busca',
+                'unique_together': {('tipo', 'objeto_id')},
+            },
+        ),
+        migrations.RunPython(popular_documentos, remover_documentos),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.2 on 2026-10-18 04:41
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def contar_ingressos_vendidos(apps, schema_editor):
+    Feira = apps.get_model("core", "Feira")
+    Ingresso = apps.get_model("core", "Ingresso")
+    totais = (
+        Ingresso.objects.order_by()
+        .values_list("feira_id")
+        .annotate(total=Count("id"))
+    )
+    for feira_id, total in totais:
+        Feira.objects.filter(pk=feira_id).update(ingressos_vendidos=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_documento_busca"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feira",
+            name="capacidade",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Máximo de ingressos; vazio para ilimitado",
+                null=True,
+                verbose_name="Capacidade",
+            ),
+        ),
+        migrations.AddField(
+            model_name="feira",
+            name="ingressos_vendidos",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Ingressos Vendidos"
+            ),
+        ),
+        migrations.RunPython(contar_ingressos_vendidos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.2 on 2026-10-18 04:44
+
+from django.db import migrations, models
+
+
+def criar_contador(apps, schema_editor):
+    ContadorNumeracao = apps.get_model("core", "ContadorNumeracao")
+    ContadorNumeracao.objects.get_or_create(nome="ingresso")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_feira_capacidade"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContadorNumeracao",
+            fields=[
+                (
+                    "nome",
+                    models.CharField(
+                        max_length=50,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="Nome",
+                    ),
+                ),
+                (
+                    "proximo",
+                    models.BigIntegerField(default=1, verbose_name="Próximo Número"),
+                ),
+            ],
+            options={
+                "verbose_name": "Contador de Numeração",
+                "verbose_name_plural": "Contadores de Numeração",
+            },
+        ),
+        migrations.RunPython(criar_contador, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.2 on 2026-10-18 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_contador_numeracao"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingresso",
+            name="checkin_em",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Check-in em"
+            ),
+        ),
+    ]
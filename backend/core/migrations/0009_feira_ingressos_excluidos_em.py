@@ -0,0 +1,24 @@
+# Generated by Django 5.2.2 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_ingresso_checkin"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feira",
+            name="ingressos_excluidos_em",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="Pacotes offline anteriores a este momento não aceitam delta",
+                null=True,
+                verbose_name="Última Exclusão de Ingresso",
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_feira_ingressos_excluidos_em"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Exclusao",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("feira", "Feira"),
+                            ("expositor", "Expositor"),
+                            ("produto", "Produto"),
+                            ("ingresso", "Ingresso"),
+                        ],
+                        max_length=20,
+                        verbose_name="Tipo",
+                    ),
+                ),
+                ("objeto_id", models.UUIDField(verbose_name="ID do Objeto")),
+                (
+                    "dono_id",
+                    models.IntegerField(
+                        blank=True, null=True, verbose_name="ID do Dono"
+                    ),
+                ),
+                (
+                    "excluido_em",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Excluído em"),
+                ),
+            ],
+            options={
+                "verbose_name": "Exclusão",
+                "verbose_name_plural": "Exclusões",
+                "indexes": [
+                    models.Index(
+                        fields=["tipo", "excluido_em"],
+                        name="exclusao_tipo_excluido_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_exclusao"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogoFeira",
+            fields=[
+                (
+                    "feira",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="catalogo",
+                        serialize=False,
+                        to="core.feira",
+                        verbose_name="Feira",
+                    ),
+                ),
+                ("conteudo", models.BinaryField(verbose_name="Conteúdo (JSON gzip)")),
+                ("etag", models.CharField(max_length=100, verbose_name="ETag")),
+                (
+                    "gerado_em",
+                    models.DateTimeField(auto_now=True, verbose_name="Gerado em"),
+                ),
+            ],
+            options={
+                "verbose_name": "Catálogo da Feira",
+                "verbose_name_plural": "Catálogos das Feiras",
+            },
+        ),
+    ]
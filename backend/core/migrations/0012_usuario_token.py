@@ -0,0 +1,30 @@
+# Generated by Django 5.2.2 on 2026-10-18 05:43
+
+import django.contrib.auth.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("core", "0011_catalogo_feira"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UsuarioToken",
+            fields=[],
+            options={
+                "verbose_name": "Usuário do Token",
+                "verbose_name_plural": "Usuários do Token",
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("auth.user",),
+            managers=[
+                ("objects", django.contrib.auth.models.UserManager()),
+            ],
+        ),
+    ]
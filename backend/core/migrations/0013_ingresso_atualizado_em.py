@@ -0,0 +1,24 @@
+# Generated by Django 5.2.2 on 2026-10-18 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_usuario_token"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingresso",
+            name="atualizado_em",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="Atualizado em",
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.2 on 2026-10-18 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_ingresso_atualizado_em"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feira",
+            name="vendas_em",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="Muda quando ingressos_vendidos muda (venda ou exclusão)",
+                null=True,
+                verbose_name="Última Venda",
+            ),
+        ),
+    ]
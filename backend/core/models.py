@@ -22,6 +22,29 @@ class Feira(models.Model):
         verbose_name="Preço do Ingresso",
         default=10.00,
     )
+    capacidade = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Capacidade",
+        help_text="Máximo de ingressos; vazio para ilimitado",
+    )
+    ingressos_vendidos = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Ingressos Vendidos"
+    )
+    ingressos_excluidos_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Última Exclusão de Ingresso",
+        help_text="Pacotes offline anteriores a este momento não aceitam delta",
+    )
+    vendas_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Última Venda",
+        help_text="Muda quando ingressos_vendidos muda (venda ou exclusão)",
+    )
     criado_por = models.ForeignKey(
         User, on_delete=models.CASCADE, verbose_name="Criado por"
     )
@@ -32,6 +55,16 @@ class Feira(models.Model):
         verbose_name = "Feira"
         verbose_name_plural = "Feiras"
         ordering = ["-criado_em"]
+        # Índices seguem os filtros do FeiraViewSet + ordenação (criado_em, id)
+        indexes = [
+            models.Index(fields=["criado_em", "id"], name="feira_criado_idx"),
+            models.Index(
+                fields=["cidade", "criado_em", "id"], name="feira_cidade_criado_idx"
+            ),
+            models.Index(
+                fields=["estado", "criado_em", "id"], name="feira_estado_criado_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.nome
@@ -73,6 +106,12 @@ class Expositor(models.Model):
         verbose_name_plural = "Expositores"
         ordering = ["-criado_em"]
         unique_together = ["nome", "feira"]
+        indexes = [
+            models.Index(fields=["criado_em", "id"], name="expositor_criado_idx"),
+            models.Index(
+                fields=["feira", "criado_em", "id"], name="expositor_feira_criado_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nome} - {self.feira.nome}"
@@ -106,6 +145,13 @@ class Produto(models.Model):
         verbose_name = "Produto"
         verbose_name_plural = "Produtos"
         ordering = ["-criado_em"]
+        indexes = [
+            models.Index(fields=["criado_em", "id"], name="produto_criado_idx"),
+            models.Index(
+                fields=["expositor", "criado_em", "id"],
+                name="produto_expositor_criado_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nome} - R$ {self.preco}"
@@ -126,11 +172,25 @@ class Ingresso(models.Model):
         User, on_delete=models.CASCADE, verbose_name="Criado por"
     )
     criado_em = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    checkin_em = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name="Check-in em"
+    )
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
 
     class Meta:
         verbose_name = "Ingresso"
         verbose_name_plural = "Ingressos"
         ordering = ["-criado_em"]
+        # IngressoViewSet sempre filtra por criado_por e ordena por criado_em
+        indexes = [
+            models.Index(
+                fields=["criado_por", "criado_em", "id"],
+                name="ingresso_usuario_criado_idx",
+            ),
+            models.Index(
+                fields=["feira", "criado_em", "id"], name="ingresso_feira_criado_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Ingresso {self.numero_ingresso} - {self.feira.nome}"
@@ -138,8 +198,137 @@ class Ingresso(models.Model):
     def save(self, *args, **kwargs):
         if not self.numero_ingresso:
             # Gerar número único do ingresso
-            import random
-            import string
+            from .numeracao import get_allocator
 
-            self.numero_ingresso = f"ING-{''.join(random.choices(string.ascii_uppercase + string.digits, k=8))}"
+            self.numero_ingresso = get_allocator().proximo()
         super().save(*args, **kwargs)
+
+
+class ContadorNumeracao(models.Model):
+    """Contador persistente de onde as faixas de numeração são reservadas"""
+
+    nome = models.CharField(max_length=50, primary_key=True, verbose_name="Nome")
+    proximo = models.BigIntegerField(default=1, verbose_name="Próximo Número")
+
+    class Meta:
+        verbose_name = "Contador de Numeração"
+        verbose_name_plural = "Contadores de Numeração"
+
+    def __str__(self):
+        return f"{self.nome}: {self.proximo}"
+
+
+class DocumentoBusca(models.Model):
+    """Documento desnormalizado da busca global (feiras, expositores e produtos)"""
+
+    TIPO_FEIRA = "feira"
+    TIPO_EXPOSITOR = "expositor"
+    TIPO_PRODUTO = "produto"
+    TIPOS = [
+        (TIPO_FEIRA, "Feira"),
+        (TIPO_EXPOSITOR, "Expositor"),
+        (TIPO_PRODUTO, "Produto"),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPOS, verbose_name="Tipo")
+    objeto_id = models.UUIDField(verbose_name="ID do Objeto")
+    nome = models.CharField(max_length=200, verbose_name="Nome")
+    descricao = models.TextField(verbose_name="Descrição")
+    feira_id = models.UUIDField(db_index=True, verbose_name="ID da Feira")
+    feira_nome = models.CharField(max_length=200, verbose_name="Nome da Feira")
+    expositor_id = models.UUIDField(
+        null=True, blank=True, db_index=True, verbose_name="ID do Expositor"
+    )
+    expositor_nome = models.CharField(
+        max_length=200, blank=True, verbose_name="Nome do Expositor"
+    )
+    preco = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="Preço"
+    )
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Documento de Busca"
+        verbose_name_plural = "Documentos de Busca"
+        unique_together = ["tipo", "objeto_id"]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.nome}"
+
+
+class Exclusao(models.Model):
+    """Registro (tombstone) de um objeto excluído, usado na sincronização por delta"""
+
+    TIPO_FEIRA = "feira"
+    TIPO_EXPOSITOR = "expositor"
+    TIPO_PRODUTO = "produto"
+    TIPO_INGRESSO = "ingresso"
+    TIPOS = [
+        (TIPO_FEIRA, "Feira"),
+        (TIPO_EXPOSITOR, "Expositor"),
+        (TIPO_PRODUTO, "Produto"),
+        (TIPO_INGRESSO, "Ingresso"),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPOS, verbose_name="Tipo")
+    objeto_id = models.UUIDField(verbose_name="ID do Objeto")
+    # Sem chave estrangeira: o usuário pode ser excluído junto com o objeto
+    dono_id = models.IntegerField(null=True, blank=True, verbose_name="ID do Dono")
+    excluido_em = models.DateTimeField(auto_now_add=True, verbose_name="Excluído em")
+
+    class Meta:
+        verbose_name = "Exclusão"
+        verbose_name_plural = "Exclusões"
+        indexes = [
+            models.Index(
+                fields=["tipo", "excluido_em"], name="exclusao_tipo_excluido_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.get_tipo_display()} {self.objeto_id} excluído em {self.excluido_em}"
+        )
+
+
+class CatalogoFeira(models.Model):
+    """Catálogo pré-montado (feira, expositores e produtos) em JSON comprimido"""
+
+    feira = models.OneToOneField(
+        Feira,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="catalogo",
+        verbose_name="Feira",
+    )
+    conteudo = models.BinaryField(verbose_name="Conteúdo (JSON gzip)")
+    etag = models.CharField(max_length=100, verbose_name="ETag")
+    gerado_em = models.DateTimeField(auto_now=True, verbose_name="Gerado em")
+
+    class Meta:
+        verbose_name = "Catálogo da Feira"
+        verbose_name_plural = "Catálogos das Feiras"
+
+    def __str__(self):
+        return f"Catálogo de {self.feira_id}"
+
+
+class UsuarioToken(User):
+    """
+    Usuário autenticado por JWT (ver ``core.autenticacao``).
+
+    Só o ``id`` vem preenchido; o primeiro acesso a qualquer outro campo
+    carrega todos eles numa única consulta.
+    """
+
+    class Meta:
+        proxy = True
+        verbose_name = "Usuário do Token"
+        verbose_name_plural = "Usuários do Token"
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        deferidos = self.get_deferred_fields()
+        if fields is not None and deferidos.issuperset(fields):
+            # Um campo adiado pedido: carrega também os demais
+            fields = list(deferidos)
+        super().refresh_from_db(using, fields, **kwargs)
@@ -0,0 +1,164 @@
+"""
+Alocação do ``numero_ingresso``.
+
+O alocador é configurável por ``INGRESSO_NUMERO_ALLOCATOR``:
+
+- ``SequencialEmBlocos`` (padrão): cada processo reserva no banco uma faixa
+  de ``INGRESSO_NUMERO_BLOCO`` números com um único ``UPDATE`` no
+  ``ContadorNumeracao`` e distribui a faixa localmente, sem acessar o banco
+  a cada ingresso. Os números nunca colidem, dispensam novas tentativas e
+  chegam quase em ordem crescente ao índice único. O formato é
+  ``ING-`` + 10 dígitos + dígito verificador (algoritmo de Damm), que
+  detecta qualquer dígito trocado e qualquer inversão de dígitos vizinhos.
+- ``Aleatorio``: o esquema anterior, 8 caracteres aleatórios. Mantido para
+  comparação (``manage.py benchmark_numeracao``).
+"""
+
+import os
+import random
+import string
+import threading
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+from .models import ContadorNumeracao
+from .transacoes import agendar
+
+PREFIXO = "ING-"
+DIGITOS = 10
+
+# Tabela de quasigrupo do algoritmo de Damm
+_DAMM = (
+    (0, 3, 1, 7, 5, 9, 8, 6, 4, 2),
+    (7, 0, 9, 2, 1, 5, 4, 8, 6, 3),
+    (4, 2, 0, 6, 8, 7, 1, 3, 5, 9),
+    (1, 7, 5, 0, 9, 8, 3, 4, 2, 6),
+    (6, 1, 2, 3, 0, 4, 5, 9, 7, 8),
+    (3, 6, 7, 4, 2, 0, 9, 5, 8, 1),
+    (5, 8, 6, 9, 7, 2, 0, 1, 3, 4),
+    (8, 9, 4, 5, 3, 6, 2, 0, 1, 7),
+    (9, 4, 3, 8, 6, 1, 7, 2, 0, 5),
+    (2, 5, 8, 1, 4, 3, 6, 7, 9, 0),
+)
+
+
+def digito_verificador(digitos):
+    """Dígito verificador de Damm para uma sequência de dígitos"""
+    interim = 0
+    for digito in digitos:
+        interim = _DAMM[interim][int(digito)]
+    return str(interim)
+
+
+def formatar(numero):
+    """Formata um número sequencial como ``ING-<10 dígitos><verificador>``"""
+    digitos = f"{numero:0{DIGITOS}d}"
+    return f"{PREFIXO}{digitos}{digito_verificador(digitos)}"
+
+
+def numero_valido(numero_ingresso):
+    """Confere o formato e o dígito verificador sem consultar o banco"""
+    if not numero_ingresso.startswith(PREFIXO):
+        return False
+    digitos = numero_ingresso[len(PREFIXO) :]
+    if len(digitos) != DIGITOS + 1 or not digitos.isdigit():
+        return False
+    return digito_verificador(digitos) == "0"
+
+
+class Aleatorio:
+    """Esquema original: 8 caracteres aleatórios, depende do índice único"""
+
+    alfabeto = string.ascii_uppercase + string.digits
+
+    def proximo(self):
+        return f"{PREFIXO}{''.join(random.choices(self.alfabeto, k=8))}"
+
+    def reservar(self, quantidade):
+        return [self.proximo() for _ in range(quantidade)]
+
+
+class _Faixa:
+    """Faixa [inicio, fim) reservada no banco por um processo"""
+
+    def __init__(self, inicio, fim):
+        self.atual = inicio
+        self.fim = fim
+        self.pid = os.getpid()
+        # Confirmação pendente (core.transacoes.agendar), ou None se confirmada
+        self.pendente = None
+
+    def confirmar(self):
+        self.pendente = None
+
+    def utilizavel(self):
+        if self.atual >= self.fim or self.pid != os.getpid():
+            # Esgotada, ou herdada do processo pai após um fork
+            return False
+        # Reservada dentro de uma transação ainda não confirmada: só vale
+        # enquanto essa transação estiver aberta. Se ela foi desfeita, o
+        # callback foi descartado, o contador voltou atrás e a faixa pode ser
+        # entregue a outro processo.
+        return self.pendente is None or self.pendente() is not None
+
+
+class SequencialEmBlocos:
+    """Números sequenciais distribuídos a partir de faixas por processo"""
+
+    contador = "ingresso"
+
+    def __init__(self, bloco=None):
+        self.bloco = bloco or settings.INGRESSO_NUMERO_BLOCO
+        self._faixa = None
+        self._lock = threading.Lock()
+
+    def proximo(self):
+        return self.reservar(1)[0]
+
+    def reservar(self, quantidade):
+        """Reserva ``quantidade`` números, já formatados"""
+        numeros = []
+        with self._lock:
+            while len(numeros) < quantidade:
+                faixa = self._faixa
+                if faixa is None or not faixa.utilizavel():
+                    faixa = self._faixa = self._reservar_faixa(
+                        max(self.bloco, quantidade - len(numeros))
+                    )
+                fim = min(faixa.fim, faixa.atual + quantidade - len(numeros))
+                numeros.extend(range(faixa.atual, fim))
+                faixa.atual = fim
+        return [formatar(numero) for numero in numeros]
+
+    def _reservar_faixa(self, tamanho):
+        alias = router.db_for_write(ContadorNumeracao)
+        with transaction.atomic(using=alias):
+            contadores = ContadorNumeracao.objects.using(alias).filter(
+                nome=self.contador
+            )
+            if not contadores.update(proximo=F("proximo") + tamanho):
+                ContadorNumeracao.objects.using(alias).get_or_create(nome=self.contador)
+                contadores.update(proximo=F("proximo") + tamanho)
+            fim = contadores.values_list("proximo", flat=True).get()
+
+        faixa = _Faixa(fim - tamanho, fim)
+        if connections[alias].in_atomic_block:
+            faixa.pendente = agendar(faixa.confirmar, using=alias)
+        return faixa
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def get_allocator():
+    """Alocador configurado em ``INGRESSO_NUMERO_ALLOCATOR`` (um por processo)"""
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                _allocator = import_string(settings.INGRESSO_NUMERO_ALLOCATOR)()
+    return _allocator
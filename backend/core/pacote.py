@@ -0,0 +1,126 @@
+"""
+Pacote offline dos ingressos de uma feira para leitores sem conexão.
+
+O pacote é um array ordenado de chaves de 64 bits, uma por ingresso, obtidas
+com ``blake2b(numero_ingresso, digest_size=8)``. O leitor calcula a chave do
+código lido e faz uma busca binária; 8 bytes por ingresso cobrem os dois
+formatos de número (sequencial e o aleatório antigo) e a chance de colisão
+é desprezível mesmo com milhões de ingressos.
+
+Formato (inteiros big-endian)::
+
+    "EWSP" | formato u8 | tipo u8 | reservado u16 | versao u64 | desde u64
+    | quantidade u32 | quantidade x chave u64 (ordenadas)
+
+``tipo`` é ``COMPLETO`` ou ``DELTA``. ``versao`` é um instante em
+microssegundos desde a época Unix; o leitor guarda a versão recebida e a
+envia como ``desde`` na sincronização seguinte. O delta traz apenas os
+ingressos criados a partir de ``desde`` e deve ser unido ao pacote que o
+leitor já tem. A versão fica ``MARGEM`` antes do momento da exportação, de
+modo que ingressos de transações ainda abertas entrem no próximo delta
+(repetições são inofensivas). Se algum ingresso foi excluído depois de
+``desde``, o delta não consegue expressar a remoção e um pacote completo é
+devolvido no lugar.
+"""
+
+import struct
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone as dt_timezone
+from hashlib import blake2b
+
+from django.utils import timezone
+
+MAGICO = b"EWSP"
+FORMATO = 1
+COMPLETO = 0
+DELTA = 1
+MARGEM = timedelta(seconds=60)
+
+_CABECALHO = struct.Struct(">4sBBHQQI")
+_EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def chave(numero_ingresso):
+    """Chave de 64 bits de um número de ingresso"""
+    return int.from_bytes(
+        blake2b(numero_ingresso.encode(), digest_size=8).digest(), "big"
+    )
+
+
+def para_versao(instante):
+    """Converte um datetime em versão (microssegundos desde a época)"""
+    return (instante - _EPOCA) // timedelta(microseconds=1)
+
+
+def de_versao(versao):
+    """Converte uma versão de volta em datetime"""
+    return _EPOCA + timedelta(microseconds=versao)
+
+
+def versao_valida(versao):
+    """Indica se a versão está entre a época e o instante atual"""
+    return 0 <= versao <= para_versao(timezone.now())
+
+
+def gerar(feira, desde=None):
+    """
+    Monta o pacote da feira; com ``desde`` (uma versão) tenta um delta.
+    Retorna ``(bytes, tipo, versao)``.
+    """
+    versao = para_versao(timezone.now() - MARGEM)
+    ingressos = feira.ingressos.all()
+    tipo = COMPLETO
+    if desde is not None:
+        inicio = de_versao(desde)
+        excluidos_em = feira.ingressos_excluidos_em
+        if excluidos_em is None or excluidos_em < inicio:
+            tipo = DELTA
+            ingressos = ingressos.filter(criado_em__gte=inicio)
+
+    chaves = sorted(
+        chave(numero)
+        for numero in ingressos.values_list("numero_ingresso", flat=True).iterator(
+            chunk_size=5000
+        )
+    )
+    cabecalho = _CABECALHO.pack(
+        MAGICO,
+        FORMATO,
+        tipo,
+        0,
+        versao,
+        desde if tipo == DELTA else 0,
+        len(chaves),
+    )
+    corpo = struct.pack(f">{len(chaves)}Q", *chaves)
+    return cabecalho + corpo, tipo, versao
+
+
+class Pacote:
+    """Leitura de um pacote (implementação de referência para os leitores)"""
+
+    def __init__(self, dados):
+        magico, formato, self.tipo, _, self.versao, self.desde, quantidade = (
+            _CABECALHO.unpack_from(dados)
+        )
+        if magico != MAGICO or formato != FORMATO:
+            raise ValueError("Pacote de ingressos inválido.")
+        self.chaves = list(
+            struct.unpack_from(f">{quantidade}Q", dados, _CABECALHO.size)
+        )
+
+    def aplicar(self, delta):
+        """Une um delta a este pacote (ou substitui, se vier um completo)"""
+        if delta.tipo == COMPLETO:
+            self.chaves = delta.chaves
+        else:
+            self.chaves = sorted(set(self.chaves).union(delta.chaves))
+        self.versao = delta.versao
+
+    def __contains__(self, numero_ingresso):
+        alvo = chave(numero_ingresso)
+        posicao = bisect_left(self.chaves, alvo)
+        return posicao < len(self.chaves) and self.chaves[posicao] == alvo
+
+    def __len__(self):
+        return len(self.chaves)
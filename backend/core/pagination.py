@@ -0,0 +1,160 @@
+import base64
+import json
+import uuid
+from collections import OrderedDict
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Paginação por número de página com modo cursor (keyset) opcional.
+
+    Sem parâmetros extras o comportamento é o mesmo do PageNumberPagination.
+    Com ``?pagination=cursor`` (ou ao seguir um link com ``?cursor=``) as
+    páginas são obtidas por comparação com a posição ``(criado_em, id)`` da
+    última linha entregue, sem ``OFFSET`` e sem ``COUNT(*)``.
+    """
+
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    cursor_mode = "cursor"
+    invalid_cursor_message = "Cursor inválido."
+    invalid_ordering_message = (
+        "A paginação por cursor só suporta ordenação por criado_em."
+    )
+
+    def cursor_requested(self, request):
+        """Indica se o cliente pediu o modo cursor"""
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == self.cursor_mode
+        )
+
+    def django_paginator_class(self, object_list, per_page):
+        paginator = Paginator(object_list, per_page)
+        if self.known_count is not None:
+            # Total já calculado pela view (ex.: CondicionalMixin), evita outro COUNT
+            paginator.count = self.known_count
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_requested(request)
+        if not self.use_cursor:
+            self.known_count = getattr(view, "total_filtrado", None)
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.descending = self._get_descending(request)
+        self.display_page_controls = False
+
+        position, reverse = self._decode_cursor(request)
+        # A direção efetiva da consulta inverte ao navegar para trás
+        descending = self.descending != reverse
+
+        if position is not None:
+            criado_em, pk = position
+            if descending:
+                queryset = queryset.filter(
+                    Q(criado_em__lt=criado_em) | Q(criado_em=criado_em, pk__lt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(criado_em__gt=criado_em) | Q(criado_em=criado_em, pk__gt=pk)
+                )
+
+        if descending:
+            queryset = queryset.order_by("-criado_em", "-pk")
+        else:
+            queryset = queryset.order_by("criado_em", "pk")
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self._encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self._encode_cursor(self.page[0], reverse=True)
+
+    def _get_descending(self, request):
+        ordering = request.query_params.get("ordering")
+        if ordering in (None, "", "-criado_em"):
+            return True
+        if ordering == "criado_em":
+            return False
+        raise ValidationError({"ordering": self.invalid_ordering_message})
+
+    def _decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            criado_em = parse_datetime(data["c"])
+            pk = uuid.UUID(data["i"])
+            reverse = bool(data.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if criado_em is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (criado_em, pk), reverse
+
+    def _encode_cursor(self, obj, reverse):
+        # Linhas de values() (ver core/serializacao.py) ou instâncias
+        if isinstance(obj, dict):
+            criado_em, pk = obj["criado_em"], obj["id"]
+        else:
+            criado_em, pk = obj.criado_em, obj.pk
+        data = {"c": criado_em.isoformat(), "i": str(pk)}
+        if reverse:
+            data["r"] = 1
+        encoded = (
+            base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode())
+            .decode("ascii")
+            .rstrip("=")
+        )
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
@@ -0,0 +1,41 @@
+"""
+Parsers da API, pares dos renderers de ``core.renderers``.
+
+``ORJSONParser`` lê o JSON das requisições com o ``orjson`` (ou com o
+``JSONParser`` do DRF, se o corpo não vier em UTF-8).
+``MessagePackParser`` aceita ``Content-Type: application/msgpack``.
+"""
+
+import msgpack
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import MessagePackRenderer, ORJSONRenderer
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        # NaN e Infinity são rejeitados pelo orjson, como no modo estrito
+        if encoding.lower() not in ("utf-8", "utf8") or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackParser(BaseParser):
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
@@ -14,7 +14,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
 
         # Permissões de escrita são apenas permitidas para o proprietário do objeto.
-        return obj.criado_por == request.user
+        return obj.criado_por_id == request.user.pk
 
 
 class IsOwnerOnly(permissions.BasePermission):
@@ -24,4 +24,4 @@ class IsOwnerOnly(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # Permissões são apenas permitidas para o proprietário do objeto.
-        return obj.criado_por == request.user
+        return obj.criado_por_id == request.user.pk
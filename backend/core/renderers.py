@@ -0,0 +1,124 @@
+"""
+Renderers da API.
+
+``ORJSONRenderer`` gera o JSON das respostas com o ``orjson``, que
+serializa UUID, datas e horas nativamente; os demais tipos (Decimal, textos
+traduzíveis, querysets) passam pelo ``JSONEncoder`` do DRF, e a saída é a
+mesma do ``JSONRenderer``. O que o ``orjson`` recusa (ex.: inteiros acima
+de 64 bits) é gerado pelo ``json`` da biblioteca padrão.
+``MessagePackRenderer`` atende ``Accept: application/msgpack``.
+
+Renderers de exportação (``?format=csv`` e ``?format=ndjson``): as listagens
+nesses formatos são geradas em fluxo por ``core.streaming.ExportacaoMixin``
+e não passam por eles. Eles existem para que a negociação de conteúdo aceite
+os formatos e para renderizar as demais respostas (detalhe, erros) nos
+mesmos formatos. No CSV, textos que começam com ``=``, ``+``, ``-`` ou ``@``
+ganham um ``'`` na frente, para que a planilha não os execute como fórmula.
+"""
+
+import csv
+import io
+import json
+
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Tipos sem suporte nativo no orjson/msgpack, convertidos como no DRF
+_padrao = JSONEncoder().default
+
+# UTC_Z: "...+00:00" vira "...Z", como no JSONEncoder do DRF
+OPCOES_ORJSON = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def para_json(data):
+    """JSON compacto (bytes) de ``data``, com os tipos tratados como no DRF"""
+    try:
+        return orjson.dumps(data, default=_padrao, option=OPCOES_ORJSON)
+    except orjson.JSONEncodeError:
+        # Ex.: inteiros acima de 64 bits, aceitos pelo json
+        pass
+    return json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # O orjson não indenta com largura livre (API navegável, "; indent=4")
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = para_json(data)
+        # Como no JSONRenderer: JSON que também seja JavaScript válido
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_padrao, use_bin_type=True)
+
+
+def _linhas(data):
+    """Linhas (dicionários) de uma resposta paginada, lista ou objeto"""
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        data = data["results"]
+    if isinstance(data, dict):
+        return [data]
+    return list(data or [])
+
+
+# Início de célula interpretado como fórmula pelas planilhas
+INICIO_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+
+def celula_csv(valor):
+    """Neutraliza textos que a planilha executaria como fórmula"""
+    if isinstance(valor, str) and valor.startswith(INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def _plano(valor):
+    # Objetos aninhados (ex.: criado_por) viram JSON dentro da célula
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, cls=JSONEncoder, ensure_ascii=False)
+    return celula_csv(valor)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        linhas = _linhas(data)
+        colunas = list(dict.fromkeys(coluna for linha in linhas for coluna in linha))
+        saida = io.StringIO()
+        escritor = csv.DictWriter(saida, fieldnames=colunas)
+        escritor.writeheader()
+        for linha in linhas:
+            escritor.writerow({chave: _plano(valor) for chave, valor in linha.items()})
+        return saida.getvalue().encode(self.charset)
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b"".join(para_json(linha) + b"\n" for linha in _linhas(data))
@@ -0,0 +1,223 @@
+"""
+Cache de respostas das leituras públicas (``list``/``retrieve``).
+
+A chave de cada resposta combina URL, query string normalizada, formato
+negociado e a geração de cada modelo de que a resposta depende. As gerações
+são contadores no cache compartilhado (``django.core.cache``) incrementados
+pelos sinais de ``core.signals`` quando a transação que alterou o modelo é
+confirmada (``core.transacoes``). Uma alteração muda a chave de todas as
+respostas que dependem do modelo, então a invalidação é exata e não depende
+de tempo de expiração: entradas antigas apenas deixam de ser encontradas e
+são descartadas pelo limite do backend.
+
+O armazenamento das respostas é configurável em ``RESPOSTAS_CACHE_BACKEND``:
+
+- ``MemoriaLocal`` (padrão): LRU em memória por processo, limitado a
+  ``RESPOSTAS_CACHE_MAX_ITENS`` respostas.
+- ``CacheCompartilhado``: um cache do Django (``RESPOSTAS_CACHE_ALIAS``),
+  por exemplo Redis, compartilhado entre os processos.
+
+Em ambos os casos as gerações precisam estar num cache compartilhado entre
+os processos para que a invalidação alcance todos eles. Por isso o cache de
+respostas só é ligado por padrão com ``REDIS_URL`` configurado
+(``RESPOSTAS_CACHE_ATIVO``); com o ``LocMemCache`` de cada processo, uma
+escrita em um processo deixaria os demais servindo a resposta antiga.
+
+Apenas requisições GET anônimas são guardadas; usuários autenticados sempre
+recebem a resposta gerada na hora. As versões comprimidas (gzip, brotli) de
+cada resposta são geradas ao guardá-la, não a cada leitura (ver
+``core.compressao``).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.module_loading import import_string
+
+from . import compressao
+from .transacoes import Acumulador, acumular, incrementar, versoes
+
+# Cabeçalhos da resposta original repetidos nas respostas do cache
+CABECALHOS = ("ETag", "Last-Modified")
+
+
+class Entrada:
+    """Resposta já renderizada"""
+
+    def __init__(self, conteudo, content_type, status, cabecalhos=None, variantes=None):
+        self.conteudo = conteudo
+        self.content_type = content_type
+        self.status = status
+        self.cabecalhos = cabecalhos or {}
+        # Codificação -> conteúdo comprimido
+        self.variantes = variantes or {}
+
+    @classmethod
+    def de_resposta(cls, response):
+        return cls(
+            response.content,
+            response["Content-Type"],
+            response.status_code,
+            {nome: response[nome] for nome in CABECALHOS if response.has_header(nome)},
+            compressao.variantes(response.content),
+        )
+
+    def como_resposta(self, request):
+        """Resposta do cache, ou ``304`` se o ``If-None-Match`` conferir"""
+        codificacao = compressao.codificacao(request, self.variantes)
+        response = HttpResponse(
+            self.variantes[codificacao] if codificacao else self.conteudo,
+            content_type=self.content_type,
+            status=self.status,
+        )
+        for nome, valor in self.cabecalhos.items():
+            response[nome] = valor
+        if codificacao:
+            compressao.marcar(response, codificacao)
+        return get_conditional_response(
+            request, etag=self.cabecalhos.get("ETag"), response=response
+        )
+
+
+class MemoriaLocal:
+    """LRU em memória, limitado a ``RESPOSTAS_CACHE_MAX_ITENS`` entradas"""
+
+    def __init__(self, max_itens=None):
+        self.max_itens = max_itens or settings.RESPOSTAS_CACHE_MAX_ITENS
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        with self._lock:
+            entrada = self._itens.get(chave)
+            if entrada is not None:
+                self._itens.move_to_end(chave)
+            return entrada
+
+    def set(self, chave, entrada):
+        with self._lock:
+            self._itens[chave] = entrada
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+
+
+class CacheCompartilhado:
+    """Entradas num cache do Django compartilhado entre processos"""
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or settings.RESPOSTAS_CACHE_ALIAS]
+        # Só para recolher entradas que ninguém mais vai pedir
+        self.timeout = settings.RESPOSTAS_CACHE_TIMEOUT
+
+    def get(self, chave):
+        return self.cache.get(chave)
+
+    def set(self, chave, entrada):
+        self.cache.set(chave, entrada, self.timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Backend configurado em ``RESPOSTAS_CACHE_BACKEND`` (um por processo)"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(settings.RESPOSTAS_CACHE_BACKEND)()
+    return _backend
+
+
+def _chave_geracao(model):
+    return f"core:respostas:geracao:{model._meta.label_lower}"
+
+
+def geracoes(models):
+    """Geração atual de cada modelo, na ordem recebida"""
+    return versoes([_chave_geracao(model) for model in models])
+
+
+class _Incremento(Acumulador):
+    """Incrementa, ao confirmar, as gerações dos modelos alterados na transação"""
+
+    def __init__(self):
+        self.models = set()
+
+    def adicionar(self, model):
+        self.models.add(model)
+
+    def executar(self):
+        for model in self.models:
+            incrementar(_chave_geracao(model))
+
+
+def invalidar(model):
+    """Invalida as respostas que dependem do modelo quando a transação confirmar"""
+    acumular(_Incremento, model)
+
+
+def cacheavel(request):
+    return (
+        settings.RESPOSTAS_CACHE_ATIVO
+        and request.method == "GET"
+        and not request.user.is_authenticated
+    )
+
+
+def chave(request, models):
+    """Chave da resposta para a requisição e as gerações atuais dos modelos"""
+    consulta = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = f"{request.build_absolute_uri(request.path)}?{consulta}"
+    partes = [url, request.accepted_media_type, *map(str, geracoes(models))]
+    resumo = hashlib.sha256("|".join(partes).encode()).hexdigest()
+    return f"core:respostas:{resumo}"
+
+
+class CacheRespostaMixin:
+    """
+    Guarda as respostas de ``list`` e ``retrieve`` para requisições anônimas.
+
+    ``cache_dependencias`` lista os modelos cujo conteúdo aparece na resposta.
+    """
+
+    cache_dependencias = ()
+
+    def list(self, request, *args, **kwargs):
+        return self._responder_com_cache(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._responder_com_cache(super().retrieve, request, *args, **kwargs)
+
+    def _responder_com_cache(self, gerar, request, *args, **kwargs):
+        if not cacheavel(request):
+            return gerar(request, *args, **kwargs)
+        backend = get_backend()
+        chave_resposta = chave(request, self.cache_dependencias)
+        entrada = backend.get(chave_resposta)
+        if entrada is not None:
+            return entrada.como_resposta(request)
+
+        response = gerar(request, *args, **kwargs)
+        if response.status_code == 200:
+
+            def guardar(response):
+                backend.set(chave_resposta, Entrada.de_resposta(response))
+
+            response.add_post_render_callback(guardar)
+        return response
@@ -0,0 +1,311 @@
+"""
+Busca textual indexada para feiras, expositores e produtos.
+
+No PostgreSQL a busca usa um índice GIN sobre a expressão ``to_tsvector``
+dos campos pesquisáveis, mantido pelo próprio banco a cada escrita. No
+SQLite cada tabela ganha uma tabela virtual FTS5 sombra
+(``<tabela>_fts``) sincronizada por triggers de INSERT/UPDATE/DELETE.
+Os índices são criados pelas migrations ``0004_busca_textual`` e
+``0005_documento_busca``, que guardam a sua própria cópia do DDL abaixo.
+
+A busca global (``/api/search/``) consulta uma única tabela desnormalizada,
+``DocumentoBusca``, com um documento por feira, expositor e produto e os
+nomes da feira e do expositor já copiados. Os documentos são mantidos
+pelos sinais de ``core.signals`` através das funções ``indexar_*`` abaixo.
+"""
+
+import re
+
+from django.db import connection as default_connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Feira, Expositor, Produto, DocumentoBusca
+
+# Configuração de idioma usada no PostgreSQL (stemming em português)
+SEARCH_CONFIG = "portuguese"
+
+# Campos indexados por modelo; o primeiro campo tem peso maior no ranking
+SEARCH_FIELDS = {
+    Feira: ["nome", "descricao", "cidade", "estado"],
+    Expositor: ["nome", "descricao"],
+    Produto: ["nome", "descricao"],
+    DocumentoBusca: ["nome", "descricao", "feira_nome", "expositor_nome"],
+}
+
+# Pesos do bm25 no SQLite, na ordem de SEARCH_FIELDS
+SQLITE_WEIGHTS = {
+    Feira: [10.0, 1.0, 2.0, 2.0],
+    Expositor: [10.0, 1.0],
+    Produto: [10.0, 1.0],
+    DocumentoBusca: [10.0, 1.0, 3.0, 3.0],
+}
+
+_TERMO = re.compile(r"\w+", re.UNICODE)
+_fts_disponivel = {}
+
+
+def termos_busca(texto):
+    """Quebra o texto digitado em termos alfanuméricos"""
+    return _TERMO.findall(texto or "")
+
+
+def fts_table(model):
+    """Nome da tabela FTS5 sombra de um modelo no SQLite"""
+    return f"{model._meta.db_table}_fts"
+
+
+def search_vector(model):
+    """Expressão tsvector indexada no PostgreSQL para o modelo"""
+    from django.contrib.postgres.search import SearchVector
+
+    campos = SEARCH_FIELDS[model]
+    vector = SearchVector(campos[0], weight="A", config=SEARCH_CONFIG)
+    if len(campos) > 1:
+        vector = vector + SearchVector(*campos[1:], weight="B", config=SEARCH_CONFIG)
+    return vector
+
+
+def suporta_busca(model, connection=default_connection):
+    """Indica se existe índice de busca para o modelo no banco atual"""
+    if model not in SEARCH_FIELDS:
+        return False
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor != "sqlite":
+        return False
+    chave = (connection.alias, str(connection.settings_dict["NAME"]))
+    if chave not in _fts_disponivel:
+        tabelas = connection.introspection.table_names()
+        _fts_disponivel[chave] = {
+            model for model in SEARCH_FIELDS if fts_table(model) in tabelas
+        }
+    return model in _fts_disponivel[chave]
+
+
+def invalidar_cache_fts():
+    """Esquece a detecção das tabelas FTS (usado após migrations)"""
+    _fts_disponivel.clear()
+
+
+def buscar(queryset, texto, connection=default_connection):
+    """
+    Filtra o queryset pelos termos de busca e anota ``search_rank``
+    (maior é mais relevante). Texto sem termos (ex.: só pontuação) não
+    encontra nada. Retorna ``None`` se o modelo não tiver índice de busca
+    neste banco.
+    """
+    model = queryset.model
+    if not suporta_busca(model, connection):
+        return None
+
+    termos = termos_busca(texto)
+    if not termos:
+        return queryset.none()
+
+    if connection.vendor == "postgresql":
+        return _buscar_postgresql(queryset, termos)
+    return _buscar_sqlite(queryset, termos)
+
+
+def _buscar_postgresql(queryset, termos):
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    # Prefixo em cada termo para que a busca funcione enquanto se digita
+    query = SearchQuery(
+        " & ".join(f"{termo}:*" for termo in termos),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+    vector = search_vector(queryset.model)
+    return (
+        queryset.alias(search_document=vector)
+        .filter(search_document=query)
+        .annotate(search_rank=SearchRank(vector, query))
+    )
+
+
+def _buscar_sqlite(queryset, termos):
+    model = queryset.model
+    tabela = model._meta.db_table
+    fts = fts_table(model)
+    # Cada termo vira uma frase com prefixo; termos separados são combinados com AND
+    match = " ".join('"{}"*'.format(termo.replace('"', '""')) for termo in termos)
+    pesos = ", ".join(str(peso) for peso in SQLITE_WEIGHTS[model])
+
+    filtro = RawSQL(
+        f'"{tabela}".rowid IN (SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s)',
+        [match],
+        output_field=BooleanField(),
+    )
+    # bm25 é menor para resultados mais relevantes, por isso o sinal invertido
+    rank = RawSQL(
+        f'(SELECT -bm25("{fts}", {pesos}) FROM "{fts}" '
+        f'WHERE "{fts}" MATCH %s AND "{fts}".rowid = "{tabela}".rowid)',
+        [match],
+        output_field=FloatField(),
+    )
+    return queryset.filter(filtro).annotate(search_rank=rank)
+
+
+def indexar_feira(feira):
+    """Cria/atualiza o documento da feira e o nome copiado nos documentos filhos"""
+    DocumentoBusca.objects.update_or_create(
+        tipo=DocumentoBusca.TIPO_FEIRA,
+        objeto_id=feira.pk,
+        defaults={
+            "nome": feira.nome,
+            "descricao": feira.descricao,
+            "feira_id": feira.pk,
+            "feira_nome": feira.nome,
+        },
+    )
+    DocumentoBusca.objects.filter(feira_id=feira.pk).exclude(
+        feira_nome=feira.nome
+    ).update(feira_nome=feira.nome)
+
+
+def indexar_expositor(expositor):
+    """Cria/atualiza o documento do expositor e propaga nome/feira aos produtos"""
+    feira_nome = Feira.objects.values_list("nome", flat=True).get(pk=expositor.feira_id)
+    DocumentoBusca.objects.update_or_create(
+        tipo=DocumentoBusca.TIPO_EXPOSITOR,
+        objeto_id=expositor.pk,
+        defaults={
+            "nome": expositor.nome,
+            "descricao": expositor.descricao,
+            "feira_id": expositor.feira_id,
+            "feira_nome": feira_nome,
+            "expositor_id": expositor.pk,
+            "expositor_nome": expositor.nome,
+        },
+    )
+    DocumentoBusca.objects.filter(
+        tipo=DocumentoBusca.TIPO_PRODUTO, expositor_id=expositor.pk
+    ).update(
+        expositor_nome=expositor.nome,
+        feira_id=expositor.feira_id,
+        feira_nome=feira_nome,
+    )
+
+
+def indexar_produto(produto):
+    """Cria/atualiza o documento do produto"""
+    expositor_nome, feira_id, feira_nome = Expositor.objects.values_list(
+        "nome", "feira_id", "feira__nome"
+    ).get(pk=produto.expositor_id)
+    DocumentoBusca.objects.update_or_create(
+        tipo=DocumentoBusca.TIPO_PRODUTO,
+        objeto_id=produto.pk,
+        defaults={
+            "nome": produto.nome,
+            "descricao": produto.descricao,
+            "feira_id": feira_id,
+            "feira_nome": feira_nome,
+            "expositor_id": produto.expositor_id,
+            "expositor_nome": expositor_nome,
+            "preco": produto.preco,
+        },
+    )
+
+
+def indexar_novos_expositores(expositores, feiras):
+    """
+    Cria os documentos de expositores inseridos com ``bulk_create``, que não
+    dispara sinais; ``feiras`` mapeia o id da feira para o nome.
+    """
+    DocumentoBusca.objects.bulk_create(
+        DocumentoBusca(
+            tipo=DocumentoBusca.TIPO_EXPOSITOR,
+            objeto_id=expositor.pk,
+            nome=expositor.nome,
+            descricao=expositor.descricao,
+            feira_id=expositor.feira_id,
+            feira_nome=feiras[expositor.feira_id],
+            expositor_id=expositor.pk,
+            expositor_nome=expositor.nome,
+        )
+        for expositor in expositores
+    )
+
+
+def indexar_novos_produtos(produtos, expositores):
+    """
+    Cria os documentos de produtos inseridos com ``bulk_create``;
+    ``expositores`` mapeia o id do expositor para
+    ``(nome, feira_id, feira_nome)``.
+    """
+    documentos = []
+    for produto in produtos:
+        expositor_nome, feira_id, feira_nome = expositores[produto.expositor_id]
+        documentos.append(
+            DocumentoBusca(
+                tipo=DocumentoBusca.TIPO_PRODUTO,
+                objeto_id=produto.pk,
+                nome=produto.nome,
+                descricao=produto.descricao,
+                feira_id=feira_id,
+                feira_nome=feira_nome,
+                expositor_id=produto.expositor_id,
+                expositor_nome=expositor_nome,
+                preco=produto.preco,
+            )
+        )
+    DocumentoBusca.objects.bulk_create(documentos)
+
+
+def remover_documento(tipo, objeto_id):
+    """Remove o documento de um objeto excluído"""
+    DocumentoBusca.objects.filter(tipo=tipo, objeto_id=objeto_id).delete()
+
+
+def reparar_indices(connection):
+    """
+    Recria os triggers FTS quando o SQLite reconstrói uma tabela.
+
+    Migrations que alteram colunas no SQLite recriam a tabela inteira,
+    descartando os triggers e renumerando os rowids; nesse caso os triggers
+    são recriados e o índice é reconstruído a partir do conteúdo.
+    """
+    if connection.vendor != "sqlite":
+        return
+    objetos = set(connection.introspection.table_names())
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        objetos.update(nome for (nome,) in cursor.fetchall())
+        for model in SEARCH_FIELDS:
+            fts = fts_table(model)
+            if fts not in objetos:
+                continue
+            if all(f"{fts}_{evento}" in objetos for evento in ("ai", "ad", "au")):
+                continue
+            for evento in ("ai", "ad", "au"):
+                cursor.execute(f'DROP TRIGGER IF EXISTS "{fts}_{evento}"')
+            # Ignora o CREATE VIRTUAL TABLE: a tabela FTS já existe
+            for sql in _sqlite_fts_sql(model)[1:]:
+                cursor.execute(sql)
+    invalidar_cache_fts()
+
+
+def _sqlite_fts_sql(model):
+    tabela = model._meta.db_table
+    fts = fts_table(model)
+    campos = SEARCH_FIELDS[model]
+    colunas = ", ".join(campos)
+    novos = ", ".join(f"new.{campo}" for campo in campos)
+    antigos = ", ".join(f"old.{campo}" for campo in campos)
+    return [
+        f'CREATE VIRTUAL TABLE "{fts}" USING fts5({colunas}, '
+        f"content='{tabela}', content_rowid='rowid', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{tabela}" BEGIN '
+        f'INSERT INTO "{fts}"(rowid, {colunas}) VALUES (new.rowid, {novos}); END',
+        f'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{tabela}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {colunas}) '
+        f"VALUES ('delete', old.rowid, {antigos}); END",
+        f'CREATE TRIGGER "{fts}_au" AFTER UPDATE ON "{tabela}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {colunas}) '
+        f"VALUES ('delete', old.rowid, {antigos}); "
+        f'INSERT INTO "{fts}"(rowid, {colunas}) VALUES (new.rowid, {novos}); END',
+        f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+    ]
@@ -0,0 +1,201 @@
+"""
+Serialização compilada das listagens.
+
+O ``ModelSerializer`` percorre um objeto ``Field`` por atributo de cada
+linha, sobre instâncias de modelo. No ``list`` dos viewsets, o
+``SerializadorCompilado`` examina os campos do serializer uma única vez e
+guarda, para cada um, o caminho no ORM e a função que converte o valor do
+banco no valor da resposta (UUID, Decimal, datas). As linhas vêm de
+``values()``, sem instanciar modelos, e cada uma vira um dicionário com a
+mesma forma da saída do serializer.
+
+Campos sem conversão própria usam o ``to_representation`` do campo.
+Serializers com campos que precisam da instância (``source="*"``,
+``SerializerMethodField``, relações que não sejam a chave primária) não
+são compilados e seguem pelo caminho normal. ``SERIALIZACAO_COMPILADA =
+False`` desliga o modo compilado. ``manage.py benchmark_serializacao``
+compara a vazão dos dois caminhos.
+"""
+
+import decimal
+
+from django.conf import settings
+from rest_framework import ISO_8601
+from rest_framework import fields
+from rest_framework.relations import (
+    ManyRelatedField,
+    PrimaryKeyRelatedField,
+    RelatedField,
+)
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from rest_framework.settings import api_settings
+
+# Campos cujo valor lido do banco já é o valor da resposta
+IDENTIDADE = (fields.CharField, fields.IntegerField, fields.BooleanField)
+
+
+class NaoCompilavel(Exception):
+    """O serializer tem campos que só funcionam sobre instâncias"""
+
+
+def _uuid(campo):
+    if campo.uuid_format != "hex_verbose":
+        return campo.to_representation
+    return str
+
+
+def _decimal(campo):
+    coerce_to_string = getattr(
+        campo, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+    )
+    if not coerce_to_string or campo.localize or campo.decimal_places is None:
+        return campo.to_representation
+    # O DecimalField.quantize monta o contexto a cada chamada
+    contexto = decimal.getcontext().copy()
+    if campo.max_digits is not None:
+        contexto.prec = campo.max_digits
+    casas = decimal.Decimal(".1") ** campo.decimal_places
+
+    def converter(valor):
+        return "{:f}".format(
+            valor.quantize(casas, rounding=campo.rounding, context=contexto)
+        )
+
+    return converter
+
+
+def _data(campo):
+    if getattr(campo, "format", api_settings.DATE_FORMAT) != ISO_8601:
+        return campo.to_representation
+    return lambda valor: valor.isoformat()
+
+
+def _data_hora(campo):
+    if getattr(campo, "format", api_settings.DATETIME_FORMAT) != ISO_8601:
+        return campo.to_representation
+    # Mesmo fuso que o DateTimeField usaria nesta requisição
+    fuso = campo.timezone if hasattr(campo, "timezone") else campo.default_timezone()
+
+    def converter(valor):
+        if fuso is None or valor.tzinfo is None:
+            return campo.to_representation(valor)
+        texto = valor.astimezone(fuso).isoformat()
+        return texto[:-6] + "Z" if texto.endswith("+00:00") else texto
+
+    return converter
+
+
+# Ordem importa: DateTimeField é subclasse de DateField
+CONVERSORES = (
+    (fields.UUIDField, _uuid),
+    (fields.DecimalField, _decimal),
+    (fields.DateTimeField, _data_hora),
+    (fields.DateField, _data),
+)
+
+
+def _conversor(campo):
+    """Função valor -> resposta do campo, ou ``None`` se o valor já serve"""
+    if isinstance(campo, PrimaryKeyRelatedField):
+        if campo.pk_field is not None:
+            raise NaoCompilavel(campo.field_name)
+        # Chave estrangeira: values() já traz o id, como o PKOnlyObject do DRF
+        return None
+    if isinstance(
+        campo,
+        (fields.SerializerMethodField, RelatedField, ManyRelatedField),
+    ):
+        raise NaoCompilavel(campo.field_name)
+    for classe, fabrica in CONVERSORES:
+        if isinstance(campo, classe):
+            return fabrica(campo)
+    if isinstance(campo, IDENTIDADE):
+        return None
+    return campo.to_representation
+
+
+class SerializadorCompilado:
+    """
+    Monta as linhas de ``values(*caminhos)`` na forma do serializer.
+
+    ``extras`` são caminhos lidos além dos campos, como a posição da
+    paginação por cursor. Levanta ``NaoCompilavel`` se algum campo precisar
+    da instância.
+    """
+
+    def __init__(self, serializer, extras=()):
+        self._caminhos = dict.fromkeys(extras)
+        self.montar = self._compilar(serializer, "")
+        self.caminhos = list(self._caminhos)
+
+    def _compilar(self, serializer, prefixo):
+        itens = []
+        for nome, campo in serializer.fields.items():
+            if campo.write_only:
+                continue
+            if campo.source == "*" or isinstance(campo, ListSerializer):
+                raise NaoCompilavel(nome)
+            caminho = prefixo + "__".join(campo.source_attrs)
+            # Para serializers aninhados, o caminho da relação só indica se é nula
+            self._caminhos[caminho] = None
+            if isinstance(campo, BaseSerializer):
+                itens.append(
+                    (nome, caminho, self._compilar(campo, caminho + "__"), True)
+                )
+            else:
+                itens.append((nome, caminho, _conversor(campo), False))
+
+        def montar(linha):
+            resultado = {}
+            for nome, caminho, conversor, aninhado in itens:
+                valor = linha[caminho]
+                if valor is None:
+                    resultado[nome] = None
+                elif aninhado:
+                    resultado[nome] = conversor(linha)
+                elif conversor is None:
+                    resultado[nome] = valor
+                else:
+                    resultado[nome] = conversor(valor)
+            return resultado
+
+        return montar
+
+    def serializar(self, linhas):
+        montar = self.montar
+        return [montar(linha) for linha in linhas]
+
+
+def compilar(serializer, extras=()):
+    """``SerializadorCompilado`` do serializer, ou ``None`` se não for possível"""
+    try:
+        return SerializadorCompilado(serializer, extras)
+    except NaoCompilavel:
+        return None
+
+
+class ListaCompiladaMixin:
+    """
+    ``list`` com o ``SerializadorCompilado``.
+
+    Deve ser o último mixin antes do viewset, para que os demais (cache,
+    requisições condicionais, ``included``) recebam a resposta pronta.
+    """
+
+    def serializador_compilado(self):
+        if not settings.SERIALIZACAO_COMPILADA:
+            return None
+        # id e criado_em são a posição da paginação por cursor
+        return compilar(self.get_serializer(), extras=("id", "criado_em"))
+
+    def list(self, request, *args, **kwargs):
+        compilado = self.serializador_compilado()
+        if compilado is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        linhas = queryset.values(*compilado.caminhos)
+        page = self.paginate_queryset(linhas)
+        if page is not None:
+            return self.get_paginated_response(compilado.serializar(page))
+        return Response(compilado.serializar(linhas))
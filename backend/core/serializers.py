@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Feira, Expositor, Produto, Ingresso
+from .campos import CamposDinamicosMixin
+from .models import Feira, Expositor, Produto, Ingresso, DocumentoBusca
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -11,7 +12,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "email", "first_name", "last_name", "date_joined"]
 
 
-class FeiraListSerializer(serializers.ModelSerializer):
+class FeiraListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para listagem de feiras"""
 
     criado_por = UserSerializer(read_only=True)
@@ -28,11 +29,13 @@ class FeiraListSerializer(serializers.ModelSerializer):
             "cidade",
             "estado",
             "preco_ingresso",
+            "capacidade",
+            "ingressos_vendidos",
             "criado_por",
         ]
 
 
-class FeiraDetailSerializer(serializers.ModelSerializer):
+class FeiraDetailSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer detalhado para feiras"""
 
     criado_por = UserSerializer(read_only=True)
@@ -49,11 +52,19 @@ class FeiraDetailSerializer(serializers.ModelSerializer):
             "cidade",
             "estado",
             "preco_ingresso",
+            "capacidade",
+            "ingressos_vendidos",
+            "criado_por",
+            "criado_em",
+            "atualizado_em",
+        ]
+        read_only_fields = [
+            "id",
+            "ingressos_vendidos",
             "criado_por",
             "criado_em",
             "atualizado_em",
         ]
-        read_only_fields = ["id", "criado_por", "criado_em", "atualizado_em"]
 
     def validate(self, data):
         if data.get("data_inicio") and data.get("data_termino"):
@@ -78,6 +89,7 @@ class FeiraCreateUpdateSerializer(serializers.ModelSerializer):
             "cidade",
             "estado",
             "preco_ingresso",
+            "capacidade",
         ]
 
     def validate(self, data):
@@ -88,8 +100,19 @@ class FeiraCreateUpdateSerializer(serializers.ModelSerializer):
                 )
         return data
 
+    def validate_capacidade(self, value):
+        if (
+            value is not None
+            and self.instance is not None
+            and value < self.instance.ingressos_vendidos
+        ):
+            raise serializers.ValidationError(
+                "A capacidade não pode ser menor que os ingressos já vendidos."
+            )
+        return value
 
-class ExpositorListSerializer(serializers.ModelSerializer):
+
+class ExpositorListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para listagem de expositores"""
 
     criado_por = UserSerializer(read_only=True)
@@ -108,7 +131,7 @@ class ExpositorListSerializer(serializers.ModelSerializer):
         ]
 
 
-class ExpositorDetailSerializer(serializers.ModelSerializer):
+class ExpositorDetailSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer detalhado para expositores"""
 
     criado_por = UserSerializer(read_only=True)
@@ -144,7 +167,17 @@ class ExpositorCreateUpdateSerializer(serializers.ModelSerializer):
         fields = ["nome", "descricao", "contato", "feira"]
 
 
-class ProdutoListSerializer(serializers.ModelSerializer):
+class ExpositorImportacaoSerializer(ExpositorCreateUpdateSerializer):
+    """Linha da importação de expositores; a feira é conferida por lote"""
+
+    feira = serializers.UUIDField()
+
+    class Meta(ExpositorCreateUpdateSerializer.Meta):
+        # O nome único por feira também é conferido por lote
+        validators = []
+
+
+class ProdutoListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para listagem de produtos"""
 
     criado_por = UserSerializer(read_only=True)
@@ -165,7 +198,7 @@ class ProdutoListSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProdutoDetailSerializer(serializers.ModelSerializer):
+class ProdutoDetailSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer detalhado para produtos"""
 
     criado_por = UserSerializer(read_only=True)
@@ -199,17 +232,31 @@ class ProdutoDetailSerializer(serializers.ModelSerializer):
 class ProdutoCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer para criação e atualização de produtos"""
 
+    PRECO_INVALIDO = "O preço deve ser maior que zero."
+
     class Meta:
         model = Produto
         fields = ["nome", "descricao", "preco", "expositor"]
 
     def validate_preco(self, value):
         if value <= 0:
-            raise serializers.ValidationError("O preço deve ser maior que zero.")
+            raise serializers.ValidationError(self.PRECO_INVALIDO)
         return value
 
 
-class IngressoDetailSerializer(serializers.ModelSerializer):
+class ProdutoImportacaoSerializer(ProdutoCreateUpdateSerializer):
+    """
+    Linha da importação de produtos; o expositor e o preço são conferidos
+    por lote (ver ``core.importacao``)
+    """
+
+    expositor = serializers.UUIDField()
+
+    def validate_preco(self, value):
+        return value
+
+
+class IngressoDetailSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para ingressos"""
 
     criado_por = UserSerializer(read_only=True)
@@ -227,15 +274,19 @@ class IngressoDetailSerializer(serializers.ModelSerializer):
             "feira_nome",
             "preco",
             "data_emissao",
+            "checkin_em",
             "criado_por",
             "criado_em",
+            "atualizado_em",
         ]
         read_only_fields = [
             "id",
             "numero_ingresso",
             "data_emissao",
+            "checkin_em",
             "criado_por",
             "criado_em",
+            "atualizado_em",
             "feira_nome",
             "preco",
         ]
@@ -247,3 +298,80 @@ class IngressoCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ingresso
         fields = ["feira"]
+
+
+class IngressoLoteItemSerializer(serializers.Serializer):
+    """Feira e quantidade de um item da compra em lote"""
+
+    feira = serializers.UUIDField()
+    quantidade = serializers.IntegerField(min_value=1, default=1)
+
+
+class IngressoLoteSerializer(serializers.Serializer):
+    """
+    Serializer para compra de ingressos em lote.
+
+    Aceita ``{"feira": id, "quantidade": n}`` ou
+    ``{"itens": [{"feira": id, "quantidade": n}, ...]}``.
+    """
+
+    MAXIMO_POR_PEDIDO = 500
+
+    feira = serializers.UUIDField(required=False)
+    quantidade = serializers.IntegerField(min_value=1, default=1)
+    itens = IngressoLoteItemSerializer(many=True, required=False)
+
+    def validate(self, data):
+        itens = data.get("itens")
+        if itens is None:
+            if "feira" not in data:
+                raise serializers.ValidationError(
+                    'Informe "feira" e "quantidade" ou a lista "itens".'
+                )
+            itens = [{"feira": data["feira"], "quantidade": data["quantidade"]}]
+        if not itens:
+            raise serializers.ValidationError("A lista de itens está vazia.")
+
+        total = sum(item["quantidade"] for item in itens)
+        if total > self.MAXIMO_POR_PEDIDO:
+            raise serializers.ValidationError(
+                f"Máximo de {self.MAXIMO_POR_PEDIDO} ingressos por pedido."
+            )
+
+        # Uma única consulta para validar todas as feiras do pedido
+        feiras = Feira.objects.in_bulk({item["feira"] for item in itens})
+        faltando = {str(item["feira"]) for item in itens} - {str(pk) for pk in feiras}
+        if faltando:
+            raise serializers.ValidationError(
+                {"feira": [f"Feira não encontrada: {pk}" for pk in sorted(faltando)]}
+            )
+        data["pedidos"] = [
+            (feiras[item["feira"]], item["quantidade"]) for item in itens
+        ]
+        return data
+
+
+class CheckinSerializer(serializers.Serializer):
+    """Número lido na portaria"""
+
+    numero_ingresso = serializers.CharField(max_length=50)
+
+
+class DocumentoBuscaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """Serializer para resultados da busca global"""
+
+    id = serializers.UUIDField(source="objeto_id", read_only=True)
+
+    class Meta:
+        model = DocumentoBusca
+        fields = [
+            "tipo",
+            "id",
+            "nome",
+            "descricao",
+            "feira_id",
+            "feira_nome",
+            "expositor_id",
+            "expositor_nome",
+            "preco",
+        ]
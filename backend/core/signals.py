@@ -0,0 +1,185 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import autenticacao, autocomplete, catalogo, checkin, respostas, search
+from .models import (
+    Feira,
+    Expositor,
+    Produto,
+    Ingresso,
+    DocumentoBusca,
+    Exclusao,
+    UsuarioToken,
+)
+from .ingressos import liberar
+from .sincronizacao import registrar_exclusao
+
+
+@receiver(post_save, sender=Feira)
+def indexar_feira(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.indexar_feira(instance)
+
+
+@receiver(post_save, sender=Expositor)
+def indexar_expositor(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.indexar_expositor(instance)
+
+
+@receiver(post_save, sender=Produto)
+def indexar_produto(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.indexar_produto(instance)
+
+
+@receiver(post_delete, sender=Feira)
+def remover_feira(sender, instance, **kwargs):
+    # Remove também documentos de expositores/produtos que ainda restarem
+    DocumentoBusca.objects.filter(feira_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=Expositor)
+def remover_expositor(sender, instance, **kwargs):
+    search.remover_documento(DocumentoBusca.TIPO_EXPOSITOR, instance.pk)
+
+
+@receiver(post_delete, sender=Produto)
+def remover_produto(sender, instance, **kwargs):
+    search.remover_documento(DocumentoBusca.TIPO_PRODUTO, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Feira)
+@receiver([post_save, post_delete], sender=Expositor)
+@receiver([post_save, post_delete], sender=Produto)
+def alterar_autocomplete(sender, instance, created=False, **kwargs):
+    autocomplete.alterar(sender, instance.pk, created)
+
+
+@receiver([post_save, post_delete], sender=Ingresso)
+def invalidar_checkin(sender, instance, created=False, **kwargs):
+    # Ingressos novos são encontrados pelo índice na primeira leitura
+    if not created:
+        checkin.invalidar(instance.feira_id)
+
+
+@receiver([post_save, post_delete], sender=Feira)
+@receiver([post_save, post_delete], sender=Expositor)
+@receiver([post_save, post_delete], sender=Produto)
+@receiver([post_save, post_delete], sender=Ingresso)
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UsuarioToken)
+def invalidar_respostas(sender, update_fields=None, **kwargs):
+    # O login só atualiza last_login, que não aparece nas respostas
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    # UsuarioToken (o usuário da autenticação JWT) é um proxy de User
+    respostas.invalidar(sender._meta.concrete_model)
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UsuarioToken)
+def invalidar_autenticacao(sender, created=False, update_fields=None, **kwargs):
+    # Usuários novos ainda não estão no cache; o login só muda last_login
+    if created or (update_fields is not None and set(update_fields) == {"last_login"}):
+        return
+    transaction.on_commit(autenticacao.invalidar, robust=True)
+
+
+@receiver(post_delete, sender=Feira)
+def registrar_exclusao_feira(sender, instance, **kwargs):
+    registrar_exclusao(Exclusao.TIPO_FEIRA, instance.pk)
+
+
+@receiver(post_delete, sender=Expositor)
+def registrar_exclusao_expositor(sender, instance, **kwargs):
+    registrar_exclusao(Exclusao.TIPO_EXPOSITOR, instance.pk)
+
+
+@receiver(post_delete, sender=Produto)
+def registrar_exclusao_produto(sender, instance, **kwargs):
+    registrar_exclusao(Exclusao.TIPO_PRODUTO, instance.pk)
+
+
+@receiver(post_delete, sender=Ingresso)
+def liberar_lugar(sender, instance, **kwargs):
+    # Roda dentro da transação do delete(), também nas exclusões em cascata
+    liberar(instance.feira_id)
+
+
+@receiver(post_delete, sender=Ingresso)
+def registrar_exclusao_ingresso(sender, instance, **kwargs):
+    # A listagem de ingressos é por usuário, assim como seus tombstones
+    registrar_exclusao(Exclusao.TIPO_INGRESSO, instance.pk, instance.criado_por_id)
+
+
+@receiver(pre_save, sender=Expositor)
+def catalogo_expositor_movido(sender, instance, raw=False, **kwargs):
+    # Ao trocar de feira, o expositor também sai do catálogo da feira anterior
+    if raw or instance._state.adding:
+        return
+    anterior = (
+        Expositor.objects.filter(pk=instance.pk)
+        .values_list("feira_id", flat=True)
+        .first()
+    )
+    # Agendado no post_save: em autocommit o callback rodaria antes do UPDATE
+    instance._feira_anterior = (
+        anterior if anterior is not None and anterior != instance.feira_id else None
+    )
+
+
+@receiver(pre_save, sender=Produto)
+def catalogo_produto_movido(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    anterior = (
+        Produto.objects.filter(pk=instance.pk)
+        .values_list("expositor_id", flat=True)
+        .first()
+    )
+    instance._expositor_anterior = (
+        anterior if anterior is not None and anterior != instance.expositor_id else None
+    )
+
+
+@receiver(post_save, sender=Feira)
+def catalogo_feira(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created:
+        catalogo.agendar(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Expositor)
+def catalogo_expositor(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = instance.__dict__.pop("_feira_anterior", None)
+    if anterior is not None:
+        catalogo.agendar(anterior, instance.pk)
+    catalogo.agendar(instance.feira_id, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Produto)
+def catalogo_produto(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = instance.__dict__.pop("_expositor_anterior", None)
+    if anterior is not None:
+        catalogo.agendar(expositor_id=anterior)
+    catalogo.agendar(expositor_id=instance.expositor_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UsuarioToken)
+def catalogo_usuario(sender, instance, created=False, update_fields=None, **kwargs):
+    # O catálogo repete os dados do usuário em criado_por; last_login não aparece
+    if created or (update_fields is not None and set(update_fields) == {"last_login"}):
+        return
+    catalogo.agendar_usuario(instance.pk)
+
+
+@receiver(post_delete, sender=Feira)
+def catalogo_feira_removida(sender, instance, **kwargs):
+    catalogo.remover(instance.pk)
@@ -0,0 +1,148 @@
+"""
+Sincronização por delta das listagens (``?updated_since=<data ISO 8601>``).
+
+Com o parâmetro, a listagem traz apenas as linhas alteradas depois da data
+(``campos_sincronizacao``, por padrão ``atualizado_em``) e acrescenta à
+resposta:
+
+- ``excluidos``: IDs excluídos desde a data, lidos do registro de
+  ``Exclusao`` gravado pelos sinais de ``core.signals`` (inclusive nas
+  exclusões em cascata). Vai só na primeira página, para não repetir a
+  lista a cada página;
+- ``sincronizado_em``: a data a enviar na próxima sincronização.
+
+``sincronizado_em`` fica ``MARGEM`` antes do início da requisição, para que
+alterações de transações ainda abertas entrem na próxima sincronização
+(linhas repetidas são inofensivas para o espelho local). Os campos copiados
+de outros recursos (ex.: ``feira_nome``) não disparam o reenvio da linha; o
+cliente os obtém do seu espelho do recurso relacionado.
+
+Exclusões mais antigas que ``EXCLUSOES_RETENCAO_DIAS`` são removidas por
+``manage.py limpar_exclusoes``; uma data anterior a esse limite exige uma
+sincronização completa.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import Exclusao
+
+MARGEM = timedelta(seconds=60)
+PARAMETRO = "updated_since"
+
+
+def limite_retencao():
+    """Data mais antiga aceita em ``updated_since``"""
+    return timezone.now() - timedelta(days=settings.EXCLUSOES_RETENCAO_DIAS)
+
+
+def registrar_exclusao(tipo, objeto_id, dono_id=None):
+    """Grava o tombstone de um objeto excluído"""
+    Exclusao.objects.create(tipo=tipo, objeto_id=objeto_id, dono_id=dono_id)
+
+
+class SincronizacaoMixin:
+    """
+    Adiciona ``?updated_since=`` ao ``list`` do viewset.
+
+    ``tipo_exclusao`` é o tipo registrado em ``Exclusao`` para o modelo;
+    ``exclusoes_do_usuario`` restringe os tombstones aos do usuário logado.
+    """
+
+    tipo_exclusao = None
+    campos_sincronizacao = ("atualizado_em",)
+    exclusoes_do_usuario = False
+
+    def atualizado_desde(self):
+        """Data de ``?updated_since=`` já validada, ou ``None``"""
+        if not hasattr(self, "_atualizado_desde"):
+            self._atualizado_desde = None
+            valor = self.request.query_params.get(PARAMETRO)
+            if valor and self.action == "list":
+                try:
+                    desde = parse_datetime(valor)
+                except ValueError:
+                    desde = None
+                if desde is None:
+                    raise ValidationError({PARAMETRO: ["Data inválida."]})
+                if timezone.is_naive(desde):
+                    desde = timezone.make_aware(desde)
+                if desde < limite_retencao():
+                    raise ValidationError(
+                        {
+                            PARAMETRO: [
+                                "Data anterior ao registro de exclusões; "
+                                "faça uma sincronização completa."
+                            ]
+                        }
+                    )
+                self._atualizado_desde = desde
+        return self._atualizado_desde
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        desde = self.atualizado_desde()
+        if desde is not None:
+            filtro = Q()
+            for campo in self.campos_sincronizacao:
+                filtro |= Q(**{f"{campo}__gt": desde})
+            queryset = queryset.filter(filtro)
+        return queryset
+
+    def exclusoes(self):
+        """``(objeto_id, excluido_em)`` excluídos desde ``updated_since``"""
+        if not hasattr(self, "_exclusoes"):
+            exclusoes = Exclusao.objects.filter(
+                tipo=self.tipo_exclusao, excluido_em__gt=self.atualizado_desde()
+            )
+            if self.exclusoes_do_usuario:
+                exclusoes = exclusoes.filter(dono_id=self.request.user.pk)
+            self._exclusoes = list(
+                exclusoes.order_by("excluido_em").values_list(
+                    "objeto_id", "excluido_em"
+                )
+            )
+        return self._exclusoes
+
+    def primeira_pagina(self):
+        """Indica se a requisição pede a primeira página da listagem"""
+        params = self.request.query_params
+        paginator = self.paginator
+        if paginator is None:
+            return True
+        cursor = getattr(paginator, "cursor_query_param", None)
+        if cursor and params.get(cursor):
+            return False
+        pagina = getattr(paginator, "page_query_param", None)
+        return not pagina or params.get(pagina, "1") in ("", "1")
+
+    def validadores_extras(self):
+        # Uma exclusão muda a resposta sem mudar as linhas filtradas
+        if self.atualizado_desde() is None or not self.primeira_pagina():
+            return super().validadores_extras()
+        return [
+            *super().validadores_extras(),
+            *self.exclusoes()[-1:],
+            len(self.exclusoes()),
+        ]
+
+    def list(self, request, *args, **kwargs):
+        desde = self.atualizado_desde()
+        if desde is None:
+            return super().list(request, *args, **kwargs)
+        sincronizado_em = timezone.now() - MARGEM
+        response = super().list(request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            data = response.data
+            if not isinstance(data, dict):
+                data = response.data = {"results": data}
+            if self.primeira_pagina():
+                data["excluidos"] = [str(pk) for pk, _ in self.exclusoes()]
+            data["sincronizado_em"] = sincronizado_em
+        return response
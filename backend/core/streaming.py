@@ -0,0 +1,157 @@
+"""
+Respostas em fluxo (streaming) para coleções grandes.
+
+O queryset é percorrido com ``.iterator(chunk_size=...)`` (um cursor no
+servidor no PostgreSQL) e convertido em blocos, de modo que só um bloco de
+linhas fica em memória de cada vez, qualquer que seja o tamanho da coleção.
+
+Além do array JSON das ações aninhadas, as listagens podem ser exportadas
+inteiras com ``?format=csv`` ou ``?format=ndjson`` (``ExportacaoMixin``).
+A exportação lê apenas as colunas de ``campos_exportacao`` (ou as pedidas
+em ``?fields=`` / ``?omit=``) com ``values_list``, sem instanciar modelos
+nem passar pelos serializers.
+"""
+
+import csv
+import io
+from datetime import date, datetime, time
+from decimal import Decimal
+from itertools import islice
+from uuid import UUID
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework.settings import api_settings
+
+from .campos import campos_selecionados
+from .renderers import CSVRenderer, NDJSONRenderer, celula_csv, para_json
+
+CHUNK_SIZE = 1000
+STREAM_PARAM = "stream"
+
+
+def stream_requested(request):
+    """Indica se o cliente pediu a resposta em fluxo (``?stream=1``)"""
+    return request.query_params.get(STREAM_PARAM, "").lower() in ("1", "true")
+
+
+def blocos_serializados(queryset, serializer_class, context=None, chunk_size=None):
+    """Gera listas com os dados serializados de cada bloco do queryset"""
+    chunk_size = chunk_size or CHUNK_SIZE
+    for bloco in _blocos(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        yield serializer_class(bloco, many=True, context=context or {}).data
+
+
+def _blocos(iteravel, tamanho):
+    while True:
+        bloco = list(islice(iteravel, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+
+def _json_em_fluxo(blocos):
+    yield b"["
+    primeiro = True
+    for bloco in blocos:
+        # Um pedaço da resposta por bloco, não por objeto
+        texto = b",".join(para_json(item) for item in bloco)
+        yield texto if primeiro else b"," + texto
+        primeiro = False
+    yield b"]"
+
+
+def resposta_json_em_fluxo(queryset, serializer_class, context=None):
+    """Array JSON com todos os objetos do queryset, gerado bloco a bloco"""
+    return StreamingHttpResponse(
+        _json_em_fluxo(blocos_serializados(queryset, serializer_class, context)),
+        content_type="application/json",
+    )
+
+
+def _valor(valor):
+    """Valor de uma coluna no mesmo formato usado pela API em JSON"""
+    if isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        return valor.isoformat()
+    if isinstance(valor, (date, time)):
+        return valor.isoformat()
+    if isinstance(valor, (Decimal, UUID)):
+        return str(valor)
+    return valor
+
+
+def _csv_em_fluxo(colunas, blocos):
+    saida = io.StringIO()
+    escritor = csv.writer(saida)
+    escritor.writerow(colunas)
+    yield saida.getvalue()
+    for bloco in blocos:
+        saida.seek(0)
+        saida.truncate()
+        escritor.writerows(
+            [_valor(celula_csv(valor)) for valor in linha] for linha in bloco
+        )
+        yield saida.getvalue()
+
+
+def _ndjson_em_fluxo(colunas, blocos):
+    for bloco in blocos:
+        yield b"".join(
+            para_json(dict(zip(colunas, map(_valor, linha)))) + b"\n" for linha in bloco
+        )
+
+
+EXPORTADORES = {
+    CSVRenderer.format: (_csv_em_fluxo, CSVRenderer.media_type),
+    NDJSONRenderer.format: (_ndjson_em_fluxo, NDJSONRenderer.media_type),
+}
+
+
+def resposta_exportacao(queryset, campos, formato, nome):
+    """Todas as linhas do queryset com as colunas ``campos``, em fluxo"""
+    gerar, media_type = EXPORTADORES[formato]
+    colunas = [campo.replace("__", "_") for campo in campos]
+    linhas = queryset.values_list(*campos).iterator(chunk_size=CHUNK_SIZE)
+    response = StreamingHttpResponse(
+        gerar(colunas, _blocos(linhas, CHUNK_SIZE)),
+        content_type=f"{media_type}; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{nome}.{formato}"'
+    return response
+
+
+class ExportacaoMixin:
+    """
+    Exporta a listagem inteira com ``?format=csv`` ou ``?format=ndjson``.
+
+    Os filtros, a busca, a ordenação e as permissões são os da listagem; a
+    paginação não se aplica. ``campos_exportacao`` são os caminhos lidos com
+    ``values_list``, e o cabeçalho troca ``__`` por ``_`` (``feira__nome``
+    vira ``feira_nome``). ``?fields=`` e ``?omit=`` usam esses nomes do
+    cabeçalho. Deve vir antes dos mixins de cache e de requisições
+    condicionais, que não tratam respostas em fluxo.
+    """
+
+    campos_exportacao = ()
+    renderer_classes = [
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        CSVRenderer,
+        NDJSONRenderer,
+    ]
+
+    def list(self, request, *args, **kwargs):
+        formato = request.accepted_renderer.format
+        if formato not in EXPORTADORES:
+            return super().list(request, *args, **kwargs)
+        campos = self.campos_exportacao
+        colunas = {campo.replace("__", "_"): campo for campo in campos}
+        selecionados = campos_selecionados(request, list(colunas))
+        if selecionados is not None:
+            campos = [colunas[coluna] for coluna in selecionados]
+        self.exportando = True
+        queryset = self.filter_queryset(self.get_queryset())
+        nome = slugify(queryset.model._meta.verbose_name_plural)
+        return resposta_exportacao(queryset, campos, formato, nome)
@@ -1,3 +1,2078 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from .models import Feira, Expositor, Produto, Ingresso, DocumentoBusca, Exclusao
+from .views import FeiraViewSet
+
+
+class CoreAPIMixin:
+    """Usuário autenticado e helpers para criar dados"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="teste", password="senha123")
+        self.client.force_authenticate(self.user)
+
+    def criar_feira(self, nome="Feira", **kwargs):
+        dados = {
+            "nome": nome,
+            "descricao": "Descrição",
+            "data_inicio": date(2025, 1, 1),
+            "data_termino": date(2025, 1, 2),
+            "local": "Centro",
+            "cidade": "Brasília",
+            "estado": "DF",
+            "criado_por": self.user,
+        }
+        dados.update(kwargs)
+        return Feira.objects.create(**dados)
+
+    def criar_expositor(self, feira, nome="Expositor", **kwargs):
+        dados = {
+            "nome": nome,
+            "descricao": "Descrição",
+            "contato": "contato@exemplo.com",
+            "feira": feira,
+            "criado_por": self.user,
+        }
+        dados.update(kwargs)
+        return Expositor.objects.create(**dados)
+
+    def criar_produto(self, expositor, nome="Produto", **kwargs):
+        dados = {
+            "nome": nome,
+            "descricao": "Descrição",
+            "preco": "9.90",
+            "expositor": expositor,
+            "criado_por": self.user,
+        }
+        dados.update(kwargs)
+        return Produto.objects.create(**dados)
+
+    def criar_ingresso(self, feira, **kwargs):
+        dados = {"feira": feira, "criado_por": self.user}
+        dados.update(kwargs)
+        return Ingresso.objects.create(**dados)
+
+
+class CoreAPITestCase(CoreAPIMixin, APITestCase):
+    pass
+
+
+class DashboardTests(CoreAPITestCase):
+    def test_totais_e_feira_destaque(self):
+        feira_a = self.criar_feira("A")
+        feira_b = self.criar_feira("B")
+        expositor = self.criar_expositor(feira_a)
+        self.criar_produto(expositor)
+        self.criar_produto(expositor, "Outro")
+        self.criar_ingresso(feira_b)
+        self.criar_ingresso(feira_b)
+        self.criar_ingresso(feira_a)
+
+        response = self.client.get("/api/dashboard/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["totais"],
+            {"feiras": 2, "expositores": 1, "produtos": 2, "ingressos": 3},
+        )
+        self.assertEqual(response.data["feira_destaque"]["nome"], "B")
+        self.assertEqual(response.data["feira_destaque"]["total_ingressos"], 2)
+        por_feira = {item["nome"]: item for item in response.data["por_feira"]}
+        self.assertEqual(por_feira["A"]["produtos"], 2)
+        self.assertEqual(por_feira["A"]["expositores"], 1)
+
+    def test_ingressos_e_destaque_por_usuario(self):
+        feira_a = self.criar_feira("A")
+        feira_b = self.criar_feira("B")
+        self.criar_ingresso(feira_a)
+        outro = User.objects.create_user(username="outro", password="senha123")
+        for _ in range(2):
+            self.criar_ingresso(feira_b, criado_por=outro)
+        self.client.get("/api/dashboard/")
+
+        self.client.force_authenticate(outro)
+        response = self.client.get("/api/dashboard/")
+
+        self.assertEqual(response.data["totais"]["ingressos"], 2)
+        self.assertEqual(response.data["feira_destaque"]["nome"], "B")
+        por_feira = {item["nome"]: item for item in response.data["por_feira"]}
+        self.assertEqual(por_feira["A"]["ingressos"], 0)
+
+    def test_resposta_em_cache(self):
+        self.criar_feira()
+        self.client.get("/api/dashboard/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/dashboard/")
+        self.assertEqual(response.data["totais"]["feiras"], 1)
+
+    def test_exige_autenticacao(self):
+        self.client.force_authenticate(None)
+        response = self.client.get("/api/dashboard/")
+        self.assertEqual(response.status_code, 401)
+
+
+class ConsultasConstantesTests(CoreAPITestCase):
+    """Listagens executam um número fixo de consultas, sem N+1"""
+
+    def contar_consultas(self, url):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(contexto.captured_queries)
+
+    def popular(self, quantidade):
+        inicio = User.objects.count()
+        for i in range(inicio, inicio + quantidade):
+            outro = User.objects.create_user(username=f"usuario{i}")
+            feira = self.criar_feira(f"Feira {i}", criado_por=outro)
+            expositor = self.criar_expositor(feira, f"Expositor {i}", criado_por=outro)
+            self.criar_produto(expositor, f"Produto {i}", criado_por=outro)
+            self.criar_ingresso(feira)
+
+    def assertConsultasConstantes(self, url):
+        self.popular(1)
+        poucas = self.contar_consultas(url)
+        self.popular(15)
+        muitas = self.contar_consultas(url)
+        self.assertEqual(poucas, muitas)
+
+    def test_feiras(self):
+        self.assertConsultasConstantes("/api/feiras/")
+
+    def test_expositores(self):
+        self.assertConsultasConstantes("/api/expositores/")
+
+    def test_produtos(self):
+        self.assertConsultasConstantes("/api/produtos/")
+
+    def test_ingressos(self):
+        self.assertConsultasConstantes("/api/ingressos/")
+
+    def test_expositores_da_feira(self):
+        feira = self.criar_feira()
+        self.criar_expositor(feira, "Primeiro")
+        url = f"/api/feiras/{feira.pk}/expositores/"
+        poucas = self.contar_consultas(url)
+        for i in range(10):
+            outro = User.objects.create_user(username=f"expositor{i}")
+            self.criar_expositor(feira, f"Expositor {i}", criado_por=outro)
+        self.assertEqual(poucas, self.contar_consultas(url))
+
+    def test_produtos_do_expositor(self):
+        expositor = self.criar_expositor(self.criar_feira())
+        self.criar_produto(expositor)
+        url = f"/api/expositores/{expositor.pk}/produtos/"
+        poucas = self.contar_consultas(url)
+        for i in range(10):
+            outro = User.objects.create_user(username=f"produtor{i}")
+            self.criar_produto(expositor, f"Produto {i}", criado_por=outro)
+        self.assertEqual(poucas, self.contar_consultas(url))
+
+    def test_listagem_de_produtos_com_consultas_fixas(self):
+        self.popular(5)
+        # COUNT da paginação + a página com os joins
+        with self.assertNumQueries(2):
+            self.client.get("/api/produtos/")
+
+
+class PaginacaoCursorTests(CoreAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.expositor = self.criar_expositor(self.criar_feira())
+        self.produtos = [
+            self.criar_produto(self.expositor, f"Produto {i}") for i in range(45)
+        ]
+
+    def percorrer(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+        return ids
+
+    def test_percorre_todas_as_paginas_sem_repetir(self):
+        ids = self.percorrer("/api/produtos/?pagination=cursor")
+        esperado = [str(p.pk) for p in reversed(self.produtos)]
+        self.assertEqual(ids, esperado)
+
+    def test_acoes_aninhadas(self):
+        url = f"/api/expositores/{self.expositor.pk}/produtos/?pagination=cursor"
+        self.assertEqual(len(self.percorrer(url)), 45)
+
+    def test_link_anterior(self):
+        primeira = self.client.get("/api/produtos/?pagination=cursor")
+        segunda = self.client.get(primeira.data["next"])
+        anterior = self.client.get(segunda.data["previous"])
+        self.assertEqual(anterior.data["results"], primeira.data["results"])
+        self.assertIsNone(anterior.data["previous"])
+
+    def test_ordem_crescente(self):
+        ids = self.percorrer("/api/produtos/?pagination=cursor&ordering=criado_em")
+        self.assertEqual(ids, [str(p.pk) for p in self.produtos])
+
+    def test_modo_pagina_continua_padrao(self):
+        response = self.client.get("/api/produtos/?page=2")
+        self.assertEqual(response.data["count"], 45)
+        self.assertEqual(len(response.data["results"]), 20)
+
+    def test_cursor_invalido(self):
+        response = self.client.get("/api/produtos/?cursor=invalido")
+        self.assertEqual(response.status_code, 404)
+
+
+class BuscaTextualTests(CoreAPITestCase):
+    def buscar(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [item["nome"] for item in response.data["results"]]
+
+    def test_resultados_ordenados_por_relevancia(self):
+        self.criar_feira("Feira do Livro", descricao="Editoras locais")
+        self.criar_feira("Festival de Música", descricao="Shows e livro autografado")
+        self.criar_feira("Feira Gastronômica", descricao="Comidas típicas")
+
+        nomes = self.buscar("/api/feiras/?search=livro")
+
+        self.assertEqual(nomes, ["Feira do Livro", "Festival de Música"])
+
+    def test_prefixo_e_acentos(self):
+        self.criar_feira("Feira de Artesanato", cidade="Brasília")
+        self.assertEqual(
+            self.buscar("/api/feiras/?search=artes brasilia"), ["Feira de Artesanato"]
+        )
+
+    def test_indice_atualizado_ao_salvar_e_excluir(self):
+        expositor = self.criar_expositor(self.criar_feira())
+        produto = self.criar_produto(expositor, "Queijo minas")
+        self.assertEqual(self.buscar("/api/produtos/?search=queijo"), ["Queijo minas"])
+
+        produto.nome = "Doce de leite"
+        produto.save()
+        self.assertEqual(self.buscar("/api/produtos/?search=queijo"), [])
+        self.assertEqual(self.buscar("/api/produtos/?search=doce"), ["Doce de leite"])
+
+        produto.delete()
+        self.assertEqual(self.buscar("/api/produtos/?search=doce"), [])
+
+    def test_so_pontuacao_nao_encontra_nada(self):
+        self.criar_feira("Feira do Livro")
+        self.assertEqual(self.buscar("/api/feiras/?search=!!!"), [])
+
+    def test_ordering_explicito_tem_prioridade(self):
+        self.criar_expositor(self.criar_feira(), "Banca B", descricao="banca")
+        self.criar_expositor(self.criar_feira("Outra"), "Banca A", descricao="banca")
+        nomes = self.buscar("/api/expositores/?search=banca&ordering=nome")
+        self.assertEqual(nomes, ["Banca A", "Banca B"])
+
+    def test_reparar_indices_recria_triggers(self):
+        from .search import fts_table, reparar_indices
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER "{fts_table(Feira)}_ai"')
+        reparar_indices(connection)
+        self.criar_feira("Feira Nova")
+        self.assertEqual(self.buscar("/api/feiras/?search=nova"), ["Feira Nova"])
+
+
+class BuscaGlobalTests(CoreAPITestCase):
+    def buscar(self, consulta):
+        response = self.client.get("/api/search/", consulta)
+        self.assertEqual(response.status_code, 200)
+        return [(item["tipo"], item["nome"]) for item in response.data["results"]]
+
+    def test_busca_em_todas_as_entidades(self):
+        feira = self.criar_feira("Feira Orgânica")
+        expositor = self.criar_expositor(feira, "Sítio Orgânico")
+        produto = self.criar_produto(expositor, "Alface")
+
+        self.assertCountEqual(
+            self.buscar({"q": "organ"}),
+            [
+                ("feira", "Feira Orgânica"),
+                ("expositor", "Sítio Orgânico"),
+                ("produto", "Alface"),
+            ],
+        )
+        self.assertEqual(
+            self.buscar({"q": "alface", "tipo": "produto"}), [("produto", "Alface")]
+        )
+        response = self.client.get("/api/search/", {"q": "alface"})
+        resultado = response.data["results"][0]
+        self.assertEqual(resultado["id"], str(produto.pk))
+        self.assertEqual(resultado["feira_nome"], "Feira Orgânica")
+        self.assertEqual(resultado["expositor_nome"], "Sítio Orgânico")
+
+    def test_renomear_feira_atualiza_documentos_filhos(self):
+        feira = self.criar_feira("Feira Antiga")
+        self.criar_produto(self.criar_expositor(feira), "Pão")
+        feira.nome = "Feira Nova"
+        feira.save()
+        response = self.client.get("/api/search/", {"q": "pão"})
+        self.assertEqual(response.data["results"][0]["feira_nome"], "Feira Nova")
+
+    def test_exclusao_em_cascata_remove_documentos(self):
+        feira = self.criar_feira("Feira Temporária")
+        self.criar_produto(self.criar_expositor(feira), "Bolo")
+        feira.delete()
+        self.assertEqual(DocumentoBusca.objects.count(), 0)
+
+    def test_sem_termos(self):
+        self.criar_feira()
+        self.assertEqual(self.buscar({"q": "  "}), [])
+
+
+class AutocompleteTests(CoreAPITestCase):
+    def sugerir(self, **params):
+        response = self.client.get("/api/autocomplete/", params)
+        self.assertEqual(response.status_code, 200)
+        return [(item["tipo"], item["nome"]) for item in response.data["results"]]
+
+    def test_prefixo_em_qualquer_palavra_sem_acentos(self):
+        feira = self.criar_feira("Feira do Livro")
+        self.criar_expositor(feira, "Livraria Central")
+        self.assertEqual(
+            self.sugerir(q="LIV"),
+            [("feira", "Feira do Livro"), ("expositor", "Livraria Central")],
+        )
+        self.assertEqual(
+            self.sugerir(q="livr", tipo="expositor"),
+            [("expositor", "Livraria Central")],
+        )
+
+    def test_consulta_sem_banco_apos_aquecer(self):
+        self.criar_feira("Feira do Livro")
+        self.sugerir(q="fei")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.sugerir(q="feira d"), [("feira", "Feira do Livro")])
+
+    def test_sinais_trocam_o_registro_ao_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            feira = self.criar_feira("Feira Antiga")
+        self.assertEqual(self.sugerir(q="antiga"), [("feira", "Feira Antiga")])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            feira.nome = "Feira Nova"
+            feira.save()
+            # Antes de confirmar, o índice ainda é o anterior
+            self.assertEqual(self.sugerir(q="antiga"), [("feira", "Feira Antiga")])
+
+        # O índice foi corrigido no lugar, sem remontar do banco
+        with self.assertNumQueries(0):
+            self.assertEqual(self.sugerir(q="antiga"), [])
+            self.assertEqual(self.sugerir(q="nova"), [("feira", "Feira Nova")])
+        with self.captureOnCommitCallbacks(execute=True):
+            feira.delete()
+        self.assertEqual(self.sugerir(q="nova"), [])
+
+    def test_outro_processo_aplica_as_alteracoes(self):
+        from . import autocomplete
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.criar_feira("Feira Antiga")
+        self.sugerir(q="fei")
+        # Outro processo: índice local numa versão anterior à do cache
+        antigo = autocomplete._indices["feira"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.criar_feira("Feira Nova")
+        autocomplete._indices["feira"] = antigo
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.sugerir(q="feira"),
+                [("feira", "Feira Antiga"), ("feira", "Feira Nova")],
+            )
+
+
+class CapacidadeTests(CoreAPITestCase):
+    def comprar(self, feira):
+        return self.client.post("/api/ingressos/", {"feira": str(feira.pk)})
+
+    def test_nao_vende_acima_da_capacidade(self):
+        feira = self.criar_feira(capacidade=2)
+        self.assertEqual(self.comprar(feira).status_code, 201)
+        self.assertEqual(self.comprar(feira).status_code, 201)
+
+        response = self.comprar(feira)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("feira", response.data)
+        feira.refresh_from_db()
+        self.assertEqual(feira.ingressos_vendidos, 2)
+        self.assertEqual(feira.ingressos.count(), 2)
+
+    def test_exclusao_libera_lugar(self):
+        feira = self.criar_feira(capacidade=1)
+        self.comprar(feira)
+        self.assertEqual(self.comprar(feira).status_code, 400)
+
+        ingresso = feira.ingressos.get()
+        self.client.delete(f"/api/ingressos/{ingresso.pk}/")
+
+        self.assertEqual(self.comprar(feira).status_code, 201)
+
+    def test_exclusao_em_cascata_libera_lugar(self):
+        feira = self.criar_feira(capacidade=1)
+        outro = User.objects.create_user(username="outro", password="senha123")
+        self.client.force_authenticate(outro)
+        self.comprar(feira)
+
+        outro.delete()
+
+        feira.refresh_from_db()
+        self.assertEqual(feira.ingressos_vendidos, 0)
+
+    def test_exclusao_em_massa_no_admin_libera_lugares(self):
+        from django.contrib.admin.sites import site
+
+        feira = self.criar_feira(capacidade=2)
+        self.comprar(feira)
+        self.comprar(feira)
+
+        site._registry[Ingresso].delete_queryset(None, feira.ingressos.all())
+
+        feira.refresh_from_db()
+        self.assertEqual(feira.ingressos_vendidos, 0)
+
+    def test_troca_de_feira_no_admin_passa_o_lugar(self):
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+
+        feira_a = self.criar_feira("A")
+        feira_b = self.criar_feira("B", capacidade=1)
+        self.comprar(feira_a)
+        ingresso = feira_a.ingressos.get()
+        request = RequestFactory().post("/")
+        request.user = User.objects.create_superuser("admin", password="senha123")
+        admin_ingresso = site._registry[Ingresso]
+        Formulario = admin_ingresso.get_form(request, ingresso, change=True)
+        form = Formulario(
+            {"feira": str(feira_b.pk), "criado_por": self.user.pk}, instance=ingresso
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+
+        admin_ingresso.save_model(request, form.save(commit=False), form, True)
+
+        feira_a.refresh_from_db()
+        feira_b.refresh_from_db()
+        self.assertEqual(feira_a.ingressos_vendidos, 0)
+        self.assertEqual(feira_b.ingressos_vendidos, 1)
+
+    def test_sem_capacidade_e_ilimitado(self):
+        feira = self.criar_feira()
+        for _ in range(3):
+            self.assertEqual(self.comprar(feira).status_code, 201)
+        feira.refresh_from_db()
+        self.assertEqual(feira.ingressos_vendidos, 3)
+
+    def test_reserva_e_um_unico_update(self):
+        from .ingressos import IngressosEsgotados, reservar
+
+        feira = self.criar_feira(capacidade=1)
+        with self.assertNumQueries(1):
+            reservar(feira.pk)
+        with self.assertRaises(IngressosEsgotados):
+            reservar(feira.pk)
+
+    def test_capacidade_menor_que_vendidos(self):
+        feira = self.criar_feira(capacidade=5)
+        self.comprar(feira)
+        self.comprar(feira)
+        response = self.client.patch(
+            f"/api/feiras/{feira.pk}/", {"capacidade": 1}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class NumeracaoTests(CoreAPITestCase):
+    def test_numeros_sequenciais_com_digito_verificador(self):
+        from .numeracao import numero_valido
+
+        feira = self.criar_feira()
+        numeros = [self.criar_ingresso(feira).numero_ingresso for _ in range(5)]
+
+        self.assertEqual(numeros, sorted(numeros))
+        self.assertEqual(len(set(numeros)), 5)
+        self.assertTrue(all(numero_valido(numero) for numero in numeros))
+
+    def test_digito_verificador_detecta_erros(self):
+        from .numeracao import formatar, numero_valido
+
+        numero = formatar(1234567)
+        trocado = numero[:-3] + numero[-2] + numero[-3] + numero[-1]
+        alterado = numero[:-2] + str((int(numero[-2]) + 1) % 10) + numero[-1]
+        self.assertTrue(numero_valido(numero))
+        self.assertFalse(numero_valido(trocado))
+        self.assertFalse(numero_valido(alterado))
+        self.assertFalse(numero_valido("ING-ABCDEFGH"))
+
+    def test_faixa_reservada_em_transacao_desfeita_e_descartada(self):
+        from django.db import transaction
+
+        from .numeracao import SequencialEmBlocos
+
+        allocator = SequencialEmBlocos(bloco=10)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                perdido = allocator.proximo()
+                raise RuntimeError
+        # O contador voltou atrás junto com a transação; a faixa em memória
+        # não pode ser reaproveitada, senão outro processo receberia os mesmos números
+        outro_processo = SequencialEmBlocos(bloco=10).proximo()
+        self.assertNotEqual(allocator.proximo(), outro_processo)
+        self.assertEqual(perdido, outro_processo)
+
+    def test_uma_consulta_por_faixa(self):
+        from .numeracao import SequencialEmBlocos
+
+        allocator = SequencialEmBlocos(bloco=100)
+        allocator.proximo()
+        with self.assertNumQueries(0):
+            numeros = allocator.reservar(99)
+        self.assertEqual(len(set(numeros)), 99)
+
+
+class CompraEmLoteTests(CoreAPITestCase):
+    def test_compra_em_lote_de_uma_feira(self):
+        feira = self.criar_feira(capacidade=10)
+        response = self.client.post(
+            "/api/ingressos/bulk/",
+            {"feira": str(feira.pk), "quantidade": 4},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 4)
+        numeros = [item["numero_ingresso"] for item in response.data]
+        self.assertEqual(len(set(numeros)), 4)
+        feira.refresh_from_db()
+        self.assertEqual(feira.ingressos_vendidos, 4)
+        self.assertEqual(feira.ingressos.count(), 4)
+
+    def test_compra_em_lote_de_varias_feiras(self):
+        feira_a = self.criar_feira("A")
+        feira_b = self.criar_feira("B")
+        response = self.client.post(
+            "/api/ingressos/bulk/",
+            {
+                "itens": [
+                    {"feira": str(feira_a.pk), "quantidade": 2},
+                    {"feira": str(feira_b.pk), "quantidade": 3},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(feira_a.ingressos.count(), 2)
+        self.assertEqual(feira_b.ingressos.count(), 3)
+
+    def test_lote_acima_da_capacidade_nao_emite_nada(self):
+        feira_a = self.criar_feira("A")
+        feira_b = self.criar_feira("B", capacidade=1)
+        response = self.client.post(
+            "/api/ingressos/bulk/",
+            {
+                "itens": [
+                    {"feira": str(feira_a.pk), "quantidade": 2},
+                    {"feira": str(feira_b.pk), "quantidade": 2},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Ingresso.objects.exists())
+        feira_a.refresh_from_db()
+        self.assertEqual(feira_a.ingressos_vendidos, 0)
+
+    def test_consultas_nao_crescem_com_a_quantidade(self):
+        feira = self.criar_feira()
+        # A primeira emissão reserva a faixa de números do processo
+        self.criar_ingresso(feira)
+        consultas = []
+        for quantidade in (1, 50):
+            with CaptureQueriesContext(connection) as contexto:
+                self.client.post(
+                    "/api/ingressos/bulk/",
+                    {"feira": str(feira.pk), "quantidade": quantidade},
+                    format="json",
+                )
+            consultas.append(len(contexto))
+        self.assertEqual(consultas[0], consultas[1])
+
+    def test_feira_inexistente(self):
+        response = self.client.post(
+            "/api/ingressos/bulk/",
+            {"feira": "00000000-0000-0000-0000-000000000000"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class CheckinTests(CoreAPITestCase):
+    def ler(self, feira, numero):
+        return self.client.post(
+            f"/api/feiras/{feira.pk}/checkin/",
+            {"numero_ingresso": numero},
+            format="json",
+        )
+
+    def test_checkin_idempotente(self):
+        feira = self.criar_feira()
+        ingresso = self.criar_ingresso(feira)
+
+        primeira = self.ler(feira, ingresso.numero_ingresso)
+        segunda = self.ler(feira, ingresso.numero_ingresso)
+
+        self.assertEqual(primeira.status_code, 200)
+        self.assertTrue(primeira.data["primeira_leitura"])
+        self.assertFalse(segunda.data["primeira_leitura"])
+        self.assertEqual(primeira.data["checkin_em"], segunda.data["checkin_em"])
+
+    @override_settings(CHECKIN_MAX_FEIRAS=1)
+    def test_indices_limitados_por_lru(self):
+        from . import checkin
+
+        primeira, segunda = self.criar_feira("A"), self.criar_feira("B")
+        checkin.obter_indice(primeira.pk)
+        checkin.obter_indice(segunda.pk)
+
+        self.assertEqual(list(checkin._indices), [str(segunda.pk)])
+
+    def test_carga_fora_do_lock_global(self):
+        from . import checkin
+
+        feira = self.criar_feira()
+        original = checkin.IndiceFeira
+
+        def carregar(*args):
+            # Outras feiras continuam atendidas durante a consulta
+            self.assertFalse(checkin._lock.locked())
+            return original(*args)
+
+        with patch("core.checkin.IndiceFeira", side_effect=carregar):
+            checkin.obter_indice(feira.pk)
+
+    def test_gravacao_imediata_e_releitura_sem_consultas(self):
+        from .checkin import obter_indice, registrar
+
+        feira = self.criar_feira()
+        ingresso = self.criar_ingresso(feira)
+        indice = obter_indice(feira.pk)
+
+        with self.assertNumQueries(1):
+            primeira_leitura, checkin_em = registrar(indice, ingresso.numero_ingresso)
+        self.assertTrue(primeira_leitura)
+        ingresso.refresh_from_db()
+        self.assertEqual(ingresso.checkin_em, checkin_em)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                registrar(indice, ingresso.numero_ingresso), (False, checkin_em)
+            )
+
+    def test_leitura_repetida_em_outro_processo(self):
+        from .checkin import IndiceFeira, obter_indice, registrar
+
+        feira = self.criar_feira()
+        ingresso = self.criar_ingresso(feira)
+        indice = obter_indice(feira.pk)
+        # Índice carregado por outro processo antes do primeiro check-in
+        outro = IndiceFeira(str(feira.pk), indice.versao)
+
+        primeira_leitura, checkin_em = registrar(indice, ingresso.numero_ingresso)
+        self.assertTrue(primeira_leitura)
+        self.assertEqual(
+            registrar(outro, ingresso.numero_ingresso), (False, checkin_em)
+        )
+
+    def test_ingresso_emitido_depois_da_carga(self):
+        feira = self.criar_feira()
+        self.ler(feira, "ING-INEXISTENTE")
+        ingresso = self.criar_ingresso(feira)
+
+        response = self.ler(feira, ingresso.numero_ingresso)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["valido"])
+
+    def test_ingresso_de_outra_feira(self):
+        feira = self.criar_feira("A")
+        outra = self.criar_ingresso(self.criar_feira("B"))
+
+        response = self.ler(feira, outra.numero_ingresso)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.data["valido"])
+
+    def test_exclusao_invalida_o_indice(self):
+        feira = self.criar_feira()
+        ingresso = self.criar_ingresso(feira)
+        self.ler(feira, ingresso.numero_ingresso)
+
+        ingresso.delete()
+
+        self.assertEqual(self.ler(feira, ingresso.numero_ingresso).status_code, 404)
+
+    def test_apenas_dono_da_feira(self):
+        feira = self.criar_feira()
+        ingresso = self.criar_ingresso(feira)
+        outro = User.objects.create_user(username="outro", password="senha123")
+        self.client.force_authenticate(outro)
+
+        response = self.ler(feira, ingresso.numero_ingresso)
+
+        self.assertEqual(response.status_code, 403)
+
+
+class PacoteOfflineTests(CoreAPITestCase):
+    def baixar(self, feira, desde=None):
+        params = {} if desde is None else {"desde": desde}
+        return self.client.get(f"/api/feiras/{feira.pk}/pacote/", params)
+
+    def test_pacote_completo(self):
+        from .pacote import Pacote
+
+        feira = self.criar_feira()
+        ingressos = [self.criar_ingresso(feira) for _ in range(5)]
+        outra = self.criar_ingresso(self.criar_feira("Outra"))
+
+        response = self.baixar(feira)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Pacote-Tipo"], "completo")
+        pacote = Pacote(response.content)
+        self.assertEqual(len(pacote), 5)
+        self.assertEqual(pacote.chaves, sorted(pacote.chaves))
+        self.assertTrue(all(i.numero_ingresso in pacote for i in ingressos))
+        self.assertNotIn(outra.numero_ingresso, pacote)
+
+    def test_delta_traz_apenas_ingressos_novos(self):
+        from .pacote import MARGEM, Pacote, para_versao
+
+        feira = self.criar_feira()
+        antigo = self.criar_ingresso(feira)
+        Ingresso.objects.filter(pk=antigo.pk).update(
+            criado_em=timezone.now() - 2 * MARGEM
+        )
+        pacote = Pacote(self.baixar(feira).content)
+        novo = self.criar_ingresso(feira)
+
+        response = self.baixar(feira, pacote.versao)
+
+        self.assertEqual(response["X-Pacote-Tipo"], "delta")
+        delta = Pacote(response.content)
+        self.assertEqual(len(delta), 1)
+        pacote.aplicar(delta)
+        self.assertIn(antigo.numero_ingresso, pacote)
+        self.assertIn(novo.numero_ingresso, pacote)
+        self.assertLessEqual(pacote.versao, para_versao(timezone.now()))
+
+    def test_exclusao_forca_pacote_completo(self):
+        from .pacote import Pacote
+
+        feira = self.criar_feira()
+        ingressos = [self.criar_ingresso(feira) for _ in range(2)]
+        versao = Pacote(self.baixar(feira).content).versao
+        self.client.delete(f"/api/ingressos/{ingressos[0].pk}/")
+
+        response = self.baixar(feira, versao)
+
+        self.assertEqual(response["X-Pacote-Tipo"], "completo")
+        pacote = Pacote(response.content)
+        self.assertNotIn(ingressos[0].numero_ingresso, pacote)
+        self.assertIn(ingressos[1].numero_ingresso, pacote)
+
+    def test_apenas_dono_da_feira(self):
+        feira = self.criar_feira()
+        outro = User.objects.create_user(username="outro", password="senha123")
+        self.client.force_authenticate(outro)
+        self.assertEqual(self.baixar(feira).status_code, 403)
+
+    def test_versao_invalida(self):
+        feira = self.criar_feira()
+        self.assertEqual(self.baixar(feira, "abc").status_code, 400)
+
+    def test_comando_recusa_versao_invalida(self):
+        from django.core.management.base import CommandError
+
+        feira = self.criar_feira()
+        with self.assertRaises(CommandError):
+            call_command("exportar_pacote", str(feira.pk), "--desde=-1")
+
+
+@override_settings(RESPOSTAS_CACHE_ATIVO=True)
+class CacheRespostasTests(CoreAPITestCase):
+    def setUp(self):
+        # As gerações são incrementadas em um único callback por transação;
+        # executa também o registrado ao criar o usuário
+        with self.captureOnCommitCallbacks(execute=True):
+            super().setUp()
+        from .respostas import get_backend
+
+        get_backend().clear()
+        self.client.force_authenticate(None)
+
+    @override_settings(RESPOSTAS_CACHE_ATIVO=False)
+    def test_desligado_sem_cache_compartilhado(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            feira = self.criar_feira()
+
+        self.client.get(f"/api/feiras/{feira.pk}/")
+        # Outro processo pode ter alterado a feira: a leitura vai ao banco
+        Feira.objects.filter(pk=feira.pk).update(nome="Alterada")
+        response = self.client.get(f"/api/feiras/{feira.pk}/")
+
+        self.assertEqual(response.json()["nome"], "Alterada")
+
+    def test_segunda_leitura_sem_consultas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            feira = self.criar_feira()
+
+        primeira = self.client.get(f"/api/feiras/{feira.pk}/")
+        with self.assertNumQueries(0):
+            segunda = self.client.get(f"/api/feiras/{feira.pk}/")
+
+        self.assertEqual(segunda.status_code, 200)
+        self.assertEqual(segunda.content, primeira.content)
+
+    def test_alteracao_invalida_dependentes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            feira = self.criar_feira("Antiga")
+            self.criar_produto(self.criar_expositor(feira))
+        self.client.get("/api/produtos/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            feira.nome = "Nova"
+            feira.save()
+
+        response = self.client.get("/api/produtos/")
+        self.assertEqual(response.json()["results"][0]["feira_nome"], "Nova")
+
+    def test_invalida_somente_apos_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            feira = self.criar_feira()
+        self.client.get("/api/feiras/")
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.criar_ingresso(feira)
+        # Antes do commit ainda vale a resposta guardada
+        with self.assertNumQueries(0):
+            self.client.get("/api/feiras/")
+
+        for callback in callbacks:
+            callback()
+        with CaptureQueriesContext(connection) as contexto:
+            self.client.get("/api/feiras/")
+        self.assertGreater(len(contexto), 0)
+
+    def test_usuario_autenticado_nao_usa_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.criar_feira()
+        self.client.get("/api/feiras/")
+        self.client.force_authenticate(self.user)
+
+        with CaptureQueriesContext(connection) as contexto:
+            self.client.get("/api/feiras/")
+        self.assertGreater(len(contexto), 0)
+
+    def test_memoria_local_limitada(self):
+        from .respostas import MemoriaLocal
+
+        memoria = MemoriaLocal(max_itens=2)
+        for chave in "abc":
+            memoria.set(chave, chave)
+        self.assertIsNone(memoria.get("a"))
+        self.assertEqual(memoria.get("c"), "c")
+
+
+class TransacoesTests(CoreAPITestCase):
+    def setUp(self):
+        super().setUp()
+        from .transacoes import Acumulador
+
+        executados = self.executados = []
+
+        class Registro(Acumulador):
+            def __init__(self):
+                self.itens = set()
+
+            def adicionar(self, item):
+                self.itens.add(item)
+
+            def executar(self):
+                executados.append(self.itens)
+
+        self.Registro = Registro
+
+    def test_um_callback_por_transacao(self):
+        from django.db import transaction
+
+        from .transacoes import acumular
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            acumular(self.Registro, 1)
+            with transaction.atomic():
+                acumular(self.Registro, 2)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.executados, [{1, 2}])
+
+    def test_savepoint_desfeito_descarta_acumulador(self):
+        from django.db import transaction
+
+        from .transacoes import acumular
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    acumular(self.Registro, 1)
+                    raise ValueError
+            except ValueError:
+                pass
+            acumular(self.Registro, 2)
+
+        self.assertEqual(self.executados, [{2}])
+
+
+class RequisicoesCondicionaisTests(CoreAPITestCase):
+    def test_detalhe_304_sem_serializar(self):
+        feira = self.criar_feira()
+        response = self.client.get(f"/api/feiras/{feira.pk}/")
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f"/api/feiras/{feira.pk}/", HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_listagem_muda_com_exclusao(self):
+        feira = self.criar_feira()
+        ingressos = [self.criar_ingresso(feira) for _ in range(2)]
+        response = self.client.get("/api/ingressos/")
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/ingressos/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        ingressos[0].delete()
+        response = self.client.get("/api/ingressos/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_listagem_ve_alteracao_sem_sinais(self):
+        # Como a escrita feita por outro processo: sem sinais nem on_commit
+        feira = self.criar_feira()
+        etag = self.client.get("/api/feiras/")["ETag"]
+
+        Feira.objects.filter(pk=feira.pk).update(
+            nome="Alterada", atualizado_em=timezone.now() + timedelta(seconds=1)
+        )
+
+        response = self.client.get("/api/feiras/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_muda_com_relacionado(self):
+        feira = self.criar_feira()
+        expositor = self.criar_expositor(feira)
+        etag = self.client.get(f"/api/expositores/{expositor.pk}/")["ETag"]
+
+        feira.nome = "Outro nome"
+        feira.save()
+
+        response = self.client.get(
+            f"/api/expositores/{expositor.pk}/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_venda_nao_muda_etag_de_expositores(self):
+        feira = self.criar_feira()
+        expositor = self.criar_expositor(feira)
+        detalhe = f"/api/expositores/{expositor.pk}/"
+        etags = {
+            url: self.client.get(url)["ETag"]
+            for url in ("/api/expositores/", detalhe, "/api/feiras/")
+        }
+
+        self.client.post("/api/ingressos/", {"feira": str(feira.pk)})
+
+        for url in ("/api/expositores/", detalhe):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, 304, url)
+        # ingressos_vendidos faz parte da feira (vendas_em)
+        response = self.client.get(
+            "/api/feiras/", HTTP_IF_NONE_MATCH=etags["/api/feiras/"]
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_checkin_muda_etag_de_ingressos(self):
+        feira = self.criar_feira()
+        ingresso = self.criar_ingresso(feira)
+        etag = self.client.get("/api/ingressos/")["ETag"]
+
+        self.client.post(
+            f"/api/feiras/{feira.pk}/checkin/",
+            {"numero_ingresso": ingresso.numero_ingresso},
+            format="json",
+        )
+
+        response = self.client.get("/api/ingressos/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(RESPOSTAS_CACHE_ATIVO=True)
+    def test_cache_de_respostas_responde_304(self):
+        from .respostas import get_backend
+
+        get_backend().clear()
+        self.client.force_authenticate(None)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.criar_feira()
+        etag = self.client.get("/api/feiras/")["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/feiras/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class SincronizacaoTests(CoreAPITestCase):
+    def test_apenas_alterados_desde_a_data(self):
+        antiga = self.criar_feira("Antiga")
+        Feira.objects.filter(pk=antiga.pk).update(
+            atualizado_em=timezone.now() - timedelta(days=1)
+        )
+        nova = self.criar_feira("Nova")
+        desde = (timezone.now() - timedelta(hours=1)).isoformat()
+
+        response = self.client.get("/api/feiras/", {"updated_since": desde})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([f["id"] for f in response.data["results"]], [str(nova.pk)])
+        self.assertEqual(response.data["excluidos"], [])
+        self.assertIn("sincronizado_em", response.data)
+
+    def test_exclusao_em_cascata_gera_tombstones(self):
+        feira = self.criar_feira()
+        expositor = self.criar_expositor(feira)
+        produto = self.criar_produto(expositor)
+        ingresso = self.criar_ingresso(feira)
+        desde = (timezone.now() - timedelta(minutes=1)).isoformat()
+
+        esperados = {
+            "/api/feiras/": feira.pk,
+            "/api/expositores/": expositor.pk,
+            "/api/produtos/": produto.pk,
+            "/api/ingressos/": ingresso.pk,
+        }
+
+        feira.delete()
+
+        for url, pk in esperados.items():
+            response = self.client.get(url, {"updated_since": desde})
+            self.assertEqual(response.data["excluidos"], [str(pk)], url)
+
+    def test_tombstones_de_ingressos_sao_por_usuario(self):
+        ingresso = self.criar_ingresso(self.criar_feira())
+        desde = (timezone.now() - timedelta(minutes=1)).isoformat()
+        ingresso.delete()
+        outro = User.objects.create_user(username="outro", password="senha123")
+        self.client.force_authenticate(outro)
+
+        response = self.client.get("/api/ingressos/", {"updated_since": desde})
+
+        self.assertEqual(response.data["excluidos"], [])
+
+    def test_checkin_reenvia_ingresso(self):
+        feira = self.criar_feira()
+        ingresso = self.criar_ingresso(feira)
+        Ingresso.objects.filter(pk=ingresso.pk).update(
+            criado_em=timezone.now() - timedelta(days=1),
+            atualizado_em=timezone.now() - timedelta(days=1),
+        )
+        desde = (timezone.now() - timedelta(hours=1)).isoformat()
+        self.assertEqual(
+            self.client.get("/api/ingressos/", {"updated_since": desde}).data[
+                "results"
+            ],
+            [],
+        )
+
+        self.client.post(
+            f"/api/feiras/{feira.pk}/checkin/",
+            {"numero_ingresso": ingresso.numero_ingresso},
+            format="json",
+        )
+
+        response = self.client.get("/api/ingressos/", {"updated_since": desde})
+        self.assertEqual(
+            [i["id"] for i in response.data["results"]], [str(ingresso.pk)]
+        )
+
+    def test_excluidos_apenas_na_primeira_pagina(self):
+        feira = self.criar_feira()
+        for i in range(3):
+            self.criar_expositor(feira, nome=f"Expositor {i}")
+        excluido = self.criar_expositor(feira, nome="Excluído")
+        pk = excluido.pk
+        desde = (timezone.now() - timedelta(minutes=1)).isoformat()
+        excluido.delete()
+
+        from .pagination import KeysetPagination
+
+        with patch.object(KeysetPagination, "page_size", 2):
+            primeira = self.client.get("/api/expositores/", {"updated_since": desde})
+            segunda = self.client.get(
+                "/api/expositores/", {"updated_since": desde, "page": 2}
+            )
+
+        self.assertEqual(primeira.data["excluidos"], [str(pk)])
+        self.assertEqual(len(segunda.data["results"]), 1)
+        self.assertNotIn("excluidos", segunda.data)
+
+    def test_exclusao_muda_etag(self):
+        feira = self.criar_feira()
+        desde = (timezone.now() - timedelta(minutes=1)).isoformat()
+        Feira.objects.update(atualizado_em=timezone.now() - timedelta(hours=1))
+        etag = self.client.get("/api/feiras/", {"updated_since": desde})["ETag"]
+
+        Exclusao.objects.create(tipo=Exclusao.TIPO_FEIRA, objeto_id=feira.pk)
+
+        response = self.client.get(
+            "/api/feiras/", {"updated_since": desde}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_data_invalida_ou_antiga(self):
+        self.assertEqual(
+            self.client.get("/api/feiras/", {"updated_since": "ontem"}).status_code,
+            400,
+        )
+        antiga = (timezone.now() - timedelta(days=3650)).isoformat()
+        self.assertEqual(
+            self.client.get("/api/feiras/", {"updated_since": antiga}).status_code,
+            400,
+        )
+
+
+class CatalogoTests(CoreAPITestCase):
+    # Os catálogos são atualizados por um único callback de on_commit por
+    # transação; os dados são criados dentro de captureOnCommitCallbacks
+    # para que cada bloco se comporte como uma transação confirmada
+
+    def catalogo(self, feira, **extra):
+        return self.client.get(f"/api/feiras/{feira.pk}/catalogo/", **extra)
+
+    def conteudo(self, response):
+        import gzip
+        import json
+
+        return json.loads(gzip.decompress(response.content))
+
+    def test_documento_completo_servido_do_cache(self):
+        feira = self.criar_feira()
+        expositor = self.criar_expositor(feira)
+        self.criar_produto(expositor, "Queijo")
+        self.criar_produto(expositor, "Doce")
+
+        self.catalogo(feira)
+        # Só o etag de CatalogoFeira, para conferir a versão do cache
+        with self.assertNumQueries(1):
+            response = self.catalogo(feira, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        documento = self.conteudo(response)
+        self.assertEqual(documento["feira"]["id"], str(feira.pk))
+        self.assertEqual(
+            [p["nome"] for p in documento["expositores"][0]["produtos"]],
+            ["Doce", "Queijo"],
+        )
+
+    def test_cache_com_documento_antigo(self):
+        import gzip
+
+        from django.core.cache import cache
+
+        from .catalogo import _chave
+
+        feira = self.criar_feira("Nova")
+        self.catalogo(feira)
+        # Como um processo que guardou uma versão anterior do documento
+        antigo = gzip.compress(b'{"feira":{"nome":"Antiga"},"expositores":[]}')
+        cache.set(_chave(feira.pk), ('"antigo"', {"gzip": antigo}), None)
+
+        response = self.catalogo(feira, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertNotEqual(response["ETag"], '"antigo"')
+        self.assertEqual(self.conteudo(response)["feira"]["nome"], "Nova")
+
+    def test_publico(self):
+        feira = self.criar_feira()
+        self.client.force_authenticate(None)
+
+        self.assertEqual(self.catalogo(feira).status_code, 200)
+        response = self.client.get(f"/api/feiras/{feira.pk}/expositores/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_sem_gzip_e_304(self):
+        feira = self.criar_feira()
+        response = self.catalogo(feira)
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response.json()["expositores"], [])
+
+        response = self.catalogo(feira, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_atualizacao_incremental(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            feira = self.criar_feira()
+            expositor_a = self.criar_expositor(feira, "A")
+            expositor_b = self.criar_expositor(feira, "B")
+            produto = self.criar_produto(expositor_a, "Antigo")
+        self.catalogo(feira)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            produto.nome = "Novo"
+            produto.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            expositor_b.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.criar_expositor(feira, "C")
+
+        documento = self.catalogo(feira).json()
+        self.assertEqual([e["nome"] for e in documento["expositores"]], ["A", "C"])
+        self.assertEqual(documento["expositores"][0]["produtos"][0]["nome"], "Novo")
+
+    def test_expositor_movido_sai_da_feira_anterior(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            feira_a = self.criar_feira("A")
+            feira_b = self.criar_feira("B")
+            expositor = self.criar_expositor(feira_a)
+        self.catalogo(feira_a)
+        self.catalogo(feira_b)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            expositor.feira = feira_b
+            expositor.save()
+
+        self.assertEqual(self.catalogo(feira_a).json()["expositores"], [])
+        self.assertEqual(len(self.catalogo(feira_b).json()["expositores"]), 1)
+
+    def test_feira_inexistente(self):
+        response = self.client.get(
+            "/api/feiras/00000000-0000-0000-0000-000000000000/catalogo/"
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class CatalogoAutocommitTests(CoreAPIMixin, APITransactionTestCase):
+    # Sem a transação dos testes: cada save confirma na hora, como nas
+    # requisições da API (ATOMIC_REQUESTS desligado)
+
+    def documento(self, feira):
+        response = self.client.get(f"/api/feiras/{feira.pk}/catalogo/")
+        return {
+            e["nome"]: [p["nome"] for p in e["produtos"]]
+            for e in response.json()["expositores"]
+        }
+
+    def test_produto_e_expositor_movidos(self):
+        feira_a = self.criar_feira("A")
+        feira_b = self.criar_feira("B")
+        expositor = self.criar_expositor(feira_a, "E")
+        expositor_2 = self.criar_expositor(feira_a, "E2")
+        produto = self.criar_produto(expositor, "P")
+        self.documento(feira_a)
+        self.documento(feira_b)
+
+        response = self.client.patch(
+            f"/api/produtos/{produto.pk}/",
+            {"expositor": str(expositor_2.pk)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.documento(feira_a), {"E": [], "E2": ["P"]})
+
+        response = self.client.patch(
+            f"/api/expositores/{expositor_2.pk}/",
+            {"feira": str(feira_b.pk)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.documento(feira_a), {"E": []})
+        self.assertEqual(self.documento(feira_b), {"E2": ["P"]})
+
+    def test_usuario_alterado(self):
+        feira = self.criar_feira()
+        self.criar_expositor(feira)
+        self.documento(feira)
+
+        self.user.username = "renomeado"
+        self.user.save()
+        response = self.client.get(f"/api/feiras/{feira.pk}/catalogo/")
+        documento = response.json()
+        self.assertEqual(documento["feira"]["criado_por"]["username"], "renomeado")
+        self.assertEqual(
+            documento["expositores"][0]["criado_por"]["username"], "renomeado"
+        )
+
+
+class AcoesAninhadasTests(CoreAPITestCase):
+    def test_expositores_paginados(self):
+        feira = self.criar_feira()
+        for i in range(3):
+            self.criar_expositor(feira, f"Expositor {i}")
+
+        from .pagination import KeysetPagination
+
+        with patch.object(KeysetPagination, "page_size", 2):
+            response = self.client.get(f"/api/feiras/{feira.pk}/expositores/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_produtos_em_fluxo(self):
+        from . import streaming
+
+        expositor = self.criar_expositor(self.criar_feira())
+        for i in range(5):
+            self.criar_produto(expositor, f"Produto {i}")
+
+        with patch.object(streaming, "CHUNK_SIZE", 2):
+            response = self.client.get(
+                f"/api/expositores/{expositor.pk}/produtos/", {"stream": "1"}
+            )
+            # Um único SELECT lido em blocos pelo cursor
+            with self.assertNumQueries(1):
+                corpo = b"".join(response.streaming_content)
+
+        self.assertTrue(response.streaming)
+        produtos = json.loads(corpo)
+        self.assertEqual(len(produtos), 5)
+        self.assertEqual(produtos[0]["expositor_nome"], expositor.nome)
+
+    def test_fluxo_vazio(self):
+        feira = self.criar_feira()
+        response = self.client.get(
+            f"/api/feiras/{feira.pk}/expositores/", {"stream": "true"}
+        )
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), [])
+
+
+class ExportacaoTests(CoreAPITestCase):
+    def test_produtos_em_csv_com_filtro(self):
+        feira = self.criar_feira("Feira, Centro")
+        expositor = self.criar_expositor(feira, "Barraca")
+        self.criar_produto(expositor, "Queijo", preco="12.50")
+        self.criar_produto(expositor, "Doce")
+        self.criar_produto(self.criar_expositor(self.criar_feira("Outra")))
+
+        response = self.client.get(
+            "/api/produtos/",
+            {"format": "csv", "expositor__feira": str(feira.pk), "ordering": "nome"},
+        )
+        with self.assertNumQueries(1):
+            corpo = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="produtos.csv"', response["Content-Disposition"])
+        linhas = list(csv.DictReader(io.StringIO(corpo)))
+        self.assertEqual([linha["nome"] for linha in linhas], ["Doce", "Queijo"])
+        self.assertEqual(linhas[1]["preco"], "12.50")
+        self.assertEqual(linhas[1]["expositor_feira_nome"], "Feira, Centro")
+        self.assertEqual(linhas[1]["criado_por_username"], "teste")
+
+    def test_ingressos_em_ndjson_apenas_do_usuario(self):
+        feira = self.criar_feira()
+        meus = {str(self.criar_ingresso(feira).pk) for _ in range(3)}
+        outro = User.objects.create_user(username="outro", password="senha123")
+        self.criar_ingresso(feira, criado_por=outro)
+
+        response = self.client.get("/api/ingressos/", {"format": "ndjson"})
+        linhas = [
+            json.loads(linha)
+            for linha in b"".join(response.streaming_content).splitlines()
+        ]
+
+        self.assertEqual(
+            response["Content-Type"], "application/x-ndjson; charset=utf-8"
+        )
+        self.assertEqual({linha["id"] for linha in linhas}, meus)
+        self.assertEqual(linhas[0]["feira_nome"], feira.nome)
+        self.assertIsNone(linhas[0]["checkin_em"])
+
+    def test_exportacao_exige_permissao_da_listagem(self):
+        self.client.force_authenticate(None)
+        response = self.client.get("/api/ingressos/", {"format": "csv"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_exportacao_vazia_traz_cabecalho(self):
+        response = self.client.get("/api/feiras/", {"format": "csv"})
+        corpo = b"".join(response.streaming_content).decode()
+        self.assertEqual(
+            corpo.splitlines(),
+            [",".join(FeiraViewSet.campos_exportacao).replace("__", "_")],
+        )
+
+    def test_csv_neutraliza_formulas(self):
+        feira = self.criar_feira()
+        self.criar_expositor(
+            feira, '=HYPERLINK("http://x")', descricao="@SUM(A1)", contato="+5561"
+        )
+
+        response = self.client.get("/api/expositores/", {"format": "csv"})
+        corpo = b"".join(response.streaming_content).decode()
+        linha = next(csv.DictReader(io.StringIO(corpo)))
+
+        self.assertEqual(linha["nome"], '\'=HYPERLINK("http://x")')
+        self.assertEqual(linha["descricao"], "'@SUM(A1)")
+        self.assertEqual(linha["contato"], "'+5561")
+
+    def test_exportacao_respeita_fields(self):
+        self.criar_feira("Feira A")
+
+        response = self.client.get(
+            "/api/feiras/", {"format": "csv", "fields": "nome,criado_por_username"}
+        )
+        corpo = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(
+            corpo.splitlines(), ["nome,criado_por_username", "Feira A,teste"]
+        )
+        response = self.client.get("/api/feiras/", {"format": "csv", "fields": "x"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_detalhe_em_csv(self):
+        feira = self.criar_feira()
+        response = self.client.get(f"/api/feiras/{feira.pk}/", {"format": "csv"})
+        linhas = list(csv.DictReader(io.StringIO(response.content.decode())))
+        self.assertEqual(linhas[0]["nome"], feira.nome)
+
+
+class ImportacaoTests(CoreAPITestCase):
+    def arquivo(self, conteudo):
+        return SimpleUploadedFile("dados.csv", conteudo.encode("utf-8-sig"))
+
+    def test_importa_produtos_em_lote(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            expositor = self.criar_expositor(self.criar_feira())
+        linhas = ["nome,descricao,preco,expositor"] + [
+            f"Produto {i},Descrição,{i + 1}.50,{expositor.pk}" for i in range(30)
+        ]
+
+        with override_settings(IMPORTACAO_LOTE=10):
+            with self.captureOnCommitCallbacks(execute=True):
+                with CaptureQueriesContext(connection) as consultas:
+                    response = self.client.post(
+                        "/api/produtos/importar/",
+                        {"arquivo": self.arquivo("\n".join(linhas))},
+                    )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["criados"], 30)
+        self.assertEqual(Produto.objects.filter(expositor=expositor).count(), 30)
+        self.assertEqual(
+            DocumentoBusca.objects.filter(tipo=DocumentoBusca.TIPO_PRODUTO).count(), 30
+        )
+        # Uma consulta dos expositores por lote, nenhuma por linha
+        selects_expositor = [
+            consulta
+            for consulta in consultas.captured_queries
+            if consulta["sql"].startswith("SELECT")
+            and 'FROM "core_expositor"' in consulta["sql"]
+        ]
+        self.assertEqual(len(selects_expositor), 3)
+        catalogo = self.client.get(f"/api/feiras/{expositor.feira_id}/catalogo/")
+        self.assertEqual(len(catalogo.json()["expositores"][0]["produtos"]), 30)
+
+    def test_relatorio_com_erros_por_linha(self):
+        expositor = self.criar_expositor(self.criar_feira())
+        conteudo = (
+            "nome,descricao,preco,expositor_id\n"
+            f"Bom,Descrição,10.00,{expositor.pk}\n"
+            f"Grátis,Descrição,0,{expositor.pk}\n"
+            "Órfão,Descrição,5.00,00000000-0000-0000-0000-000000000000\n"
+            f"Sem preço,Descrição,abc,{expositor.pk}\n"
+        )
+
+        response = self.client.post(
+            "/api/produtos/importar/", {"arquivo": self.arquivo(conteudo)}
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["criados"], 1)
+        self.assertEqual(response.data["total_erros"], 3)
+        erros = {erro["linha"]: erro["erros"] for erro in response.data["erros"]}
+        self.assertEqual(set(erros), {3, 4, 5})
+        self.assertIn("preco", erros[3])
+        self.assertIn("expositor", erros[4])
+        self.assertIn("preco", erros[5])
+
+    def test_preco_conferido_por_lote(self):
+        from decimal import Decimal
+
+        from .importacao import ImportadorProdutos
+        from .serializers import ProdutoImportacaoSerializer
+
+        # A regra de validate_preco sai da validação de cada linha
+        serializer = ProdutoImportacaoSerializer()
+        self.assertEqual(serializer.validate_preco(Decimal("-1")), Decimal("-1"))
+        erros = ImportadorProdutos(self.user).validar_lote(
+            [(2, {"preco": Decimal("10")}), (3, {"preco": Decimal("-1")})]
+        )
+        self.assertEqual(list(erros), [3])
+        self.assertIn("preco", erros[3])
+
+    def test_expositores_com_nome_repetido(self):
+        feira = self.criar_feira()
+        self.criar_expositor(feira, "Existente")
+        conteudo = (
+            "nome,descricao,contato,feira\n"
+            f"Existente,D,c@x.com,{feira.pk}\n"
+            f"Novo,D,c@x.com,{feira.pk}\n"
+            f"Novo,D,c@x.com,{feira.pk}\n"
+        )
+
+        response = self.client.post(
+            "/api/expositores/importar/", {"arquivo": self.arquivo(conteudo)}
+        )
+
+        self.assertEqual(response.data["criados"], 1)
+        self.assertEqual([erro["linha"] for erro in response.data["erros"]], [2, 4])
+        self.assertTrue(feira.expositores.filter(nome="Novo").exists())
+
+    def test_colunas_ausentes(self):
+        response = self.client.post(
+            "/api/produtos/importar/", {"arquivo": self.arquivo("nome,preco\nA,1\n")}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("expositor", response.data["arquivo"][0])
+
+    def test_exige_autenticacao(self):
+        self.client.force_authenticate(None)
+        response = self.client.post(
+            "/api/produtos/importar/", {"arquivo": self.arquivo("nome\n")}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_comando(self):
+        feira = self.criar_feira()
+        caminho = os.path.join(tempfile.mkdtemp(), "expositores.csv")
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            arquivo.write(f"nome,descricao,contato,feira\nA,D,c,{feira.pk}\n")
+
+        saida = io.StringIO()
+        call_command(
+            "importar_csv", "expositores", caminho, usuario="teste", stdout=saida
+        )
+
+        self.assertIn("1 expositores importados", saida.getvalue())
+        self.assertEqual(feira.expositores.count(), 1)
+
+
+class CamposEsparsosTests(CoreAPITestCase):
+    def consultar(self, url, params):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url, params)
+        return response, [consulta["sql"] for consulta in consultas.captured_queries]
+
+    def test_fields_reduz_resposta_e_colunas(self):
+        self.criar_feira("Feira do Livro", descricao="x" * 1000)
+
+        response, consultas = self.consultar(
+            "/api/feiras/", {"fields": "nome,data_inicio,cidade"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(response.data["results"][0]), ["nome", "data_inicio", "cidade"]
+        )
+        listagem = consultas[-1]
+        self.assertIn('"core_feira"."nome"', listagem)
+        self.assertNotIn('"core_feira"."descricao"', listagem)
+        self.assertNotIn("auth_user", listagem)
+
+    def test_omit_em_produtos(self):
+        expositor = self.criar_expositor(self.criar_feira())
+        self.criar_produto(expositor)
+
+        response, consultas = self.consultar(
+            "/api/produtos/", {"omit": "descricao,criado_por,feira_nome"}
+        )
+
+        produto = response.data["results"][0]
+        self.assertNotIn("descricao", produto)
+        self.assertNotIn("criado_por", produto)
+        self.assertEqual(produto["expositor_nome"], expositor.nome)
+        listagem = consultas[-1]
+        self.assertNotIn('"core_produto"."descricao"', listagem)
+        self.assertNotIn("core_feira", listagem)
+        self.assertIn('"core_expositor"."nome"', listagem)
+
+    def test_detalhe_e_cursor(self):
+        feira = self.criar_feira()
+        self.criar_ingresso(feira)
+
+        detalhe = self.client.get(f"/api/feiras/{feira.pk}/", {"fields": "nome"})
+        ingressos = self.client.get(
+            "/api/ingressos/",
+            {"fields": "numero_ingresso,feira_nome", "pagination": "cursor"},
+        )
+
+        self.assertEqual(detalhe.data, {"nome": feira.nome})
+        self.assertEqual(
+            list(ingressos.data["results"][0]), ["numero_ingresso", "feira_nome"]
+        )
+
+    def test_campo_desconhecido(self):
+        response = self.client.get("/api/feiras/", {"fields": "nome,senha"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("senha", response.data["fields"][0])
+
+
+class UsuariosIncluidosTests(CoreAPITestCase):
+    def test_produtos_com_usuarios_incluidos(self):
+        outro = User.objects.create_user(username="outro", password="senha123")
+        expositor = self.criar_expositor(self.criar_feira())
+        for i in range(3):
+            self.criar_produto(expositor, f"Produto {i}")
+        self.criar_produto(expositor, "Do outro", criado_por=outro)
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get("/api/produtos/", {"include": "users"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {produto["criado_por"] for produto in response.data["results"]},
+            {self.user.pk, outro.pk},
+        )
+        usuarios = response.data["included"]["users"]
+        self.assertEqual(set(usuarios), {str(self.user.pk), str(outro.pk)})
+        self.assertEqual(usuarios[str(outro.pk)]["username"], "outro")
+        # Sem JOIN na listagem; os usuários vêm de uma única consulta
+        sql = [consulta["sql"] for consulta in consultas.captured_queries]
+        self.assertEqual(sum("auth_user" in consulta for consulta in sql), 1)
+        self.assertNotIn("auth_user", sql[-2])
+
+    def test_combina_com_fields(self):
+        self.criar_feira()
+        response = self.client.get(
+            "/api/feiras/", {"include": "users", "fields": "nome,criado_por"}
+        )
+        self.assertEqual(
+            response.data["results"][0], {"nome": "Feira", "criado_por": self.user.pk}
+        )
+        self.assertIn(str(self.user.pk), response.data["included"]["users"])
+
+    def test_sem_include_mantem_usuario_aninhado(self):
+        self.criar_ingresso(self.criar_feira())
+        response = self.client.get("/api/ingressos/")
+        self.assertEqual(response.data["results"][0]["criado_por"]["username"], "teste")
+        self.assertNotIn("included", response.data)
+
+    def test_anonimo_em_cache(self):
+        self.client.force_authenticate(None)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.criar_feira()
+        primeira = self.client.get("/api/feiras/", {"include": "users"})
+        segunda = self.client.get("/api/feiras/", {"include": "users"})
+        self.assertEqual(primeira.content, segunda.content)
+        self.assertIn(b'"included"', segunda.content)
+
+    def test_inclusao_desconhecida(self):
+        response = self.client.get("/api/feiras/", {"include": "feiras"})
+        self.assertEqual(response.status_code, 400)
+
+
+class SerializacaoCompiladaTests(CoreAPITestCase):
+    def setUp(self):
+        super().setUp()
+        feira = self.criar_feira("Feira do Livro", capacidade=100)
+        expositor = self.criar_expositor(feira, "Livraria")
+        self.criar_produto(expositor, "Romance", preco="49.90")
+        self.criar_produto(expositor, "Poesia", preco="1000.00")
+        self.criar_ingresso(feira)
+        Ingresso.objects.update(checkin_em=timezone.now())
+
+    def comparar(self, url, params=None):
+        with override_settings(SERIALIZACAO_COMPILADA=False):
+            esperado = self.client.get(url, params)
+        compilado = self.client.get(url, params)
+        self.assertEqual(compilado.status_code, 200)
+        self.assertEqual(compilado.json(), esperado.json())
+        return compilado.json()
+
+    def test_mesma_saida_nas_listagens(self):
+        for url in ("/api/feiras/", "/api/expositores/", "/api/produtos/"):
+            with self.subTest(url=url):
+                self.assertTrue(self.comparar(url)["results"])
+        ingressos = self.comparar("/api/ingressos/")
+        self.assertIsNotNone(ingressos["results"][0]["checkin_em"])
+
+    def test_mesma_saida_com_parametros(self):
+        self.comparar("/api/produtos/", {"pagination": "cursor"})
+        self.comparar("/api/produtos/", {"include": "users"})
+        self.comparar("/api/produtos/", {"fields": "nome,preco,feira_nome"})
+        self.comparar("/api/feiras/", {"search": "livro"})
+
+    def test_listagem_sem_instanciar_modelos(self):
+        with patch.object(Produto, "__init__", side_effect=AssertionError):
+            response = self.client.get("/api/produtos/")
+        self.assertEqual(response.data["count"], 2)
+
+    def test_serializer_nao_compilavel(self):
+        from rest_framework import serializers
+
+        from .serializacao import compilar
+        from .serializers import ProdutoListSerializer
+
+        class ComMetodo(ProdutoListSerializer):
+            rotulo = serializers.SerializerMethodField()
+
+            class Meta(ProdutoListSerializer.Meta):
+                fields = [*ProdutoListSerializer.Meta.fields, "rotulo"]
+
+            def get_rotulo(self, obj):
+                return str(obj)
+
+        self.assertIsNone(compilar(ComMetodo()))
+        self.assertIsNotNone(compilar(ProdutoListSerializer()))
+
+
+class RenderersTests(CoreAPITestCase):
+    def test_mesma_saida_do_json_renderer(self):
+        import uuid
+        from decimal import Decimal
+
+        from django.utils.translation import gettext_lazy
+        from rest_framework.exceptions import ErrorDetail
+        from rest_framework.renderers import JSONRenderer
+
+        from .renderers import ORJSONRenderer
+
+        data = {
+            "id": uuid.uuid4(),
+            "preco": Decimal("9.90"),
+            "em": timezone.now(),
+            "sem_fuso": timezone.now().replace(tzinfo=None, microsecond=0),
+            "dia": date(2025, 1, 1),
+            "erro": ErrorDetail("inválido", code="invalid"),
+            "texto": gettext_lazy("Sim"),
+            "separador": "a\u2028b\u2029",
+            "lista": Feira.objects.none(),
+            1: [None, True, 1.5],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
+
+    def test_json_invalido(self):
+        response = self.client.post(
+            "/api/feiras/", b'{"nome": ', content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("JSON parse error", response.json()["detail"])
+
+    def test_criacao_em_json(self):
+        response = self.client.post(
+            "/api/feiras/",
+            json.dumps(
+                {
+                    "nome": "Feira Nova",
+                    "descricao": "Descrição",
+                    "data_inicio": "2025-01-01",
+                    "data_termino": "2025-01-02",
+                    "local": "Centro",
+                    "cidade": "Brasília",
+                    "estado": "DF",
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.json()["nome"], "Feira Nova")
+
+    def test_msgpack_pelo_accept(self):
+        import msgpack
+
+        self.criar_feira()
+        response = self.client.get("/api/feiras/", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        dados = msgpack.unpackb(response.content)
+        self.assertEqual(dados, self.client.get("/api/feiras/").json())
+
+    def test_criacao_em_msgpack(self):
+        import msgpack
+
+        corpo = msgpack.packb(
+            {
+                "nome": "Feira Binária",
+                "descricao": "Descrição",
+                "data_inicio": "2025-01-01",
+                "data_termino": "2025-01-02",
+                "local": "Centro",
+                "cidade": "Brasília",
+                "estado": "DF",
+            }
+        )
+        response = self.client.post(
+            "/api/feiras/",
+            corpo,
+            content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(msgpack.unpackb(response.content)["nome"], "Feira Binária")
+
+
+class CompressaoTests(CoreAPITestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(10):
+            self.criar_feira(f"Feira {i}")
+
+    def descomprimir(self, response):
+        import gzip
+
+        from .compressao import brotli
+
+        conteudo = b"".join(response) if response.streaming else response.content
+        if response["Content-Encoding"] == "br":
+            return brotli.decompress(conteudo)
+        return gzip.decompress(conteudo)
+
+    def test_listagem_em_gzip(self):
+        normal = self.client.get("/api/feiras/")
+        response = self.client.get("/api/feiras/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(self.descomprimir(response), normal.content)
+
+    def test_codificacao_recusada_ou_resposta_pequena(self):
+        response = self.client.get(
+            "/api/feiras/", HTTP_ACCEPT_ENCODING="gzip;q=0, identity"
+        )
+        self.assertNotIn("Content-Encoding", response)
+        with override_settings(COMPRESSAO_MINIMO=1_000_000):
+            response = self.client.get("/api/feiras/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_exportacao_em_fluxo(self):
+        normal = self.client.get("/api/feiras/", {"format": "ndjson"})
+        response = self.client.get(
+            "/api/feiras/", {"format": "ndjson"}, HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(
+            self.descomprimir(response), b"".join(normal.streaming_content)
+        )
+
+    @override_settings(RESPOSTAS_CACHE_ATIVO=True)
+    def test_resposta_do_cache_ja_comprimida(self):
+        from .respostas import get_backend
+
+        get_backend().clear()
+        self.client.force_authenticate(None)
+        normal = self.client.get("/api/feiras/")
+        self.client.get("/api/feiras/", HTTP_ACCEPT_ENCODING="gzip")
+
+        # Servida dos bytes guardados, sem consultas nem nova compressão
+        with patch(
+            "django.middleware.gzip.compress_string", side_effect=AssertionError
+        ), patch("core.compressao.comprimir", side_effect=AssertionError):
+            with self.assertNumQueries(0):
+                response = self.client.get("/api/feiras/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(self.descomprimir(response), normal.content)
+
+    def test_brotli_preferido(self):
+        self.client.force_authenticate(None)
+        normal = self.client.get("/api/feiras/")
+        response = self.client.get("/api/feiras/", HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(self.descomprimir(response), normal.content)
+
+        # O catálogo é o mesmo documento para todos, comprimido ao entrar no
+        # cache: sem segredos, vai em brotli também para usuários autenticados
+        self.client.force_authenticate(self.user)
+        feira = Feira.objects.first()
+        response = self.client.get(
+            f"/api/feiras/{feira.pk}/catalogo/", HTTP_ACCEPT_ENCODING="br"
+        )
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(json.loads(self.descomprimir(response))["expositores"], [])
+
+    def test_brotli_em_fluxo(self):
+        self.client.force_authenticate(None)
+        normal = self.client.get("/api/feiras/", {"format": "ndjson"})
+        response = self.client.get(
+            "/api/feiras/", {"format": "ndjson"}, HTTP_ACCEPT_ENCODING="br"
+        )
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(
+            self.descomprimir(response), b"".join(normal.streaming_content)
+        )
+
+    def test_respostas_com_segredos_em_gzip(self):
+        # Usuário autenticado: BREACH, só o gzip tem a mitigação
+        response = self.client.get("/api/feiras/", HTTP_ACCEPT_ENCODING="br, gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+        response = self.client.get("/api/feiras/", HTTP_ACCEPT_ENCODING="br")
+        self.assertNotIn("Content-Encoding", response)
+
+        # Login anônimo com os tokens JWT na resposta
+        self.client.force_authenticate(None)
+        with override_settings(COMPRESSAO_MINIMO=1):
+            response = self.client.post(
+                "/auth/login/",
+                {"username": "teste", "password": "senha123"},
+                format="json",
+                HTTP_ACCEPT_ENCODING="br, gzip",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+
+class AutenticacaoTests(CoreAPITestCase):
+    def setUp(self):
+        super().setUp()
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        self.client.force_authenticate(None)
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.feira = self.criar_feira()
+
+    def consultas_ao_usuario(self, url):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # A listagem lê o usuário num JOIN; só conta a busca direta dele
+        return [q["sql"] for q in contexto if 'FROM "auth_user" WHERE' in q["sql"]]
+
+    def test_leitura_sem_consultar_o_usuario(self):
+        self.assertEqual(len(self.consultas_ao_usuario("/api/ingressos/")), 1)
+        self.assertEqual(self.consultas_ao_usuario("/api/ingressos/"), [])
+        self.assertEqual(self.consultas_ao_usuario("/api/feiras/"), [])
+
+    def test_usuario_desativado_ou_excluido(self):
+        self.client.get("/api/feiras/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get("/api/feiras/").status_code, 401)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = True
+            self.user.save()
+        self.assertEqual(self.client.get("/api/feiras/").status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(self.client.get("/api/feiras/").status_code, 401)
+
+    def test_situacao_expira(self):
+        self.client.get("/api/feiras/")
+        # Sem sinal, como numa alteração feita por outro processo
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get("/api/feiras/").status_code, 200)
+
+        daqui_a_pouco = time.monotonic() + settings.AUTENTICACAO_CACHE_TIMEOUT + 1
+        with patch("core.autenticacao.time.monotonic", return_value=daqui_a_pouco):
+            self.assertEqual(self.client.get("/api/feiras/").status_code, 401)
+
+    def test_usuario_carregado_sob_demanda(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from .autenticacao import JWTUsuarioTokenAuthentication
+
+        autenticacao = JWTUsuarioTokenAuthentication()
+        token = AccessToken.for_user(self.user)
+        with self.assertNumQueries(1):
+            usuario = autenticacao.get_user(token)
+            self.assertEqual(usuario, self.user)
+        with self.assertNumQueries(1):
+            self.assertTrue(usuario.is_active)
+            self.assertEqual(usuario.username, "teste")
+            self.assertEqual(usuario.email, "")
+            self.assertEqual(usuario.date_joined, self.user.date_joined)
+
+    def test_escrita_e_dono(self):
+        response = self.client.patch(
+            f"/api/feiras/{self.feira.pk}/", {"nome": "Renomeada"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+
+        outro = User.objects.create_user(username="outro", password="senha123")
+        outra = self.criar_feira("Alheia", criado_por=outro)
+        response = self.client.patch(
+            f"/api/feiras/{outra.pk}/", {"nome": "X"}, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post(
+            "/api/expositores/",
+            {"nome": "Novo", "descricao": "D", "contato": "c", "feira": self.feira.pk},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        expositor = Expositor.objects.get(nome="Novo")
+        self.assertEqual(expositor.criado_por_id, self.user.pk)
+
+    def test_perfil_e_senha_com_usuario_renomeado(self):
+        # Renomeado depois da emissão do token (ex.: pelo admin)
+        User.objects.filter(pk=self.user.pk).update(username="renomeado")
+
+        response = self.client.put(
+            "/auth/profile/", {"first_name": "Ana"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"]["username"], "renomeado")
+        response = self.client.post(
+            "/auth/change-password/",
+            {
+                "old_password": "senha123",
+                "new_password": "OutraSenha!234",
+                "new_password_confirm": "OutraSenha!234",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        usuario = User.objects.get(pk=self.user.pk)
+        self.assertEqual(usuario.username, "renomeado")
+        self.assertEqual(usuario.first_name, "Ana")
+        self.assertTrue(usuario.check_password("OutraSenha!234"))
@@ -0,0 +1,119 @@
+"""
+Trabalho agendado para quando a transação confirmar.
+
+Os sinais de ``core.signals`` disparam uma vez por objeto, e uma exclusão em
+cascata chega a centenas deles. ``acumular`` junta essas chamadas num único
+acumulador por transação (e por conexão), registrado uma vez com
+``transaction.on_commit``; ao confirmar, ele faz o trabalho de todas de uma
+vez (ex.: ``core.respostas``, ``core.catalogo``, ``core.autocomplete``).
+
+O registro guarda apenas uma referência fraca ao acumulador: a referência
+forte é a do próprio ``on_commit``. Quando a transação, ou o savepoint em
+que o acumulador foi criado, é desfeita, o Django descarta o callback, o
+acumulador é liberado e a próxima chamada cria outro. ``agendar`` usa o
+mesmo recurso para indicar se um callback ainda vai rodar (ver
+``core.numeracao``).
+
+As versões (``versoes`` / ``incrementar``) são contadores no cache
+compartilhado que esses callbacks incrementam para avisar os demais
+processos.
+"""
+
+import threading
+import time
+import weakref
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+_local = threading.local()
+
+
+class Acumulador:
+    """
+    Base dos acumuladores: ``adicionar`` recebe os argumentos de cada
+    chamada a ``acumular`` e ``executar`` roda uma vez, ao confirmar.
+    """
+
+    def adicionar(self, *args):
+        raise NotImplementedError
+
+    def executar(self):
+        raise NotImplementedError
+
+    def __call__(self):
+        self.executar()
+
+
+def _pendentes():
+    if not hasattr(_local, "pendentes"):
+        _local.pendentes = weakref.WeakValueDictionary()
+    return _local.pendentes
+
+
+def acumular(classe, *args, using=None):
+    """
+    Passa ``args`` ao acumulador ``classe`` da transação atual, criando-o e
+    registrando-o no ``on_commit`` na primeira chamada. Fora de uma
+    transação, o acumulador roda na hora.
+    """
+    alias = using or DEFAULT_DB_ALIAS
+    chave = (alias, classe)
+    pendentes = _pendentes()
+    acumulador = pendentes.get(chave)
+    if acumulador is not None:
+        acumulador.adicionar(*args)
+        return
+    acumulador = classe()
+    acumulador.adicionar(*args)
+    if transaction.get_connection(alias).in_atomic_block:
+        pendentes[chave] = acumulador
+
+    def executar():
+        # Chamadas feitas durante a execução já vão para um acumulador novo
+        if pendentes.get(chave) is acumulador:
+            del pendentes[chave]
+        acumulador()
+
+    # A função guarda a única referência forte ao acumulador
+    transaction.on_commit(executar, using=alias, robust=True)
+
+
+class _Callback:
+    def __init__(self, funcao):
+        self.funcao = funcao
+
+    def __call__(self):
+        self.funcao()
+
+
+def agendar(funcao, using=None):
+    """
+    ``transaction.on_commit(funcao)`` que retorna uma referência fraca ao
+    callback. Ela fica vazia quando o callback já rodou ou foi descartado
+    por um rollback da transação ou do savepoint em que foi registrado.
+    """
+    callback = _Callback(funcao)
+    transaction.on_commit(callback, using=using)
+    return weakref.ref(callback)
+
+
+def versoes(chaves):
+    """Valor atual de cada contador, na ordem recebida"""
+    valores = cache.get_many(chaves)
+    for chave in chaves:
+        if chave not in valores:
+            # Valor inicial único, para que um cache esvaziado nunca
+            # coincida com uma versão antiga guardada em algum processo
+            cache.add(chave, time.time_ns(), None)
+            valores[chave] = cache.get(chave)
+    return [valores[chave] for chave in chaves]
+
+
+def incrementar(chave):
+    """Incrementa o contador e retorna o novo valor, ou ``None`` se não existir"""
+    try:
+        return cache.incr(chave)
+    except ValueError:
+        # Sem versão registrada: a próxima leitura cria uma nova
+        return None
@@ -6,6 +6,9 @@ from .views import (
     ProdutoViewSet,
     IngressoViewSet,
     api_root,
+    dashboard,
+    autocomplete,
+    BuscaGlobalView,
 )
 
 router = DefaultRouter()
@@ -16,5 +19,8 @@ router.register(r"ingressos", IngressoViewSet)
 
 urlpatterns = [
     path("", api_root, name="api-root"),
+    path("api/dashboard/", dashboard, name="dashboard"),
+    path("api/search/", BuscaGlobalView.as_view(), name="search"),
+    path("api/autocomplete/", autocomplete, name="autocomplete"),
     path("api/", include(router.urls)),
 ]
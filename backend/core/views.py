@@ -1,10 +1,25 @@
+import codecs
+import gzip
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Count
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from django.shortcuts import render
-from rest_framework import viewsets, permissions, status
+from rest_framework import generics, viewsets, permissions, status
+from rest_framework.generics import get_object_or_404
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import Feira, Expositor, Produto, Ingresso
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import MultiPartParser
+from .models import Feira, Expositor, Produto, Ingresso, DocumentoBusca, Exclusao
 from .serializers import (
     FeiraListSerializer,
     FeiraDetailSerializer,
@@ -17,8 +32,89 @@ from .serializers import (
     ProdutoCreateUpdateSerializer,
     IngressoDetailSerializer,
     IngressoCreateSerializer,
+    IngressoLoteSerializer,
+    CheckinSerializer,
+    DocumentoBuscaSerializer,
+    UserSerializer,
 )
+from .pacote import DELTA, gerar as gerar_pacote, versao_valida
+from . import compressao
+from .catalogo import obter as obter_catalogo
+from .campos import CamposEsparsosMixin
+from .checkin import obter_indice, registrar
+from .condicional import CondicionalMixin
+from .respostas import CacheRespostaMixin
+from .serializacao import ListaCompiladaMixin
+from .sincronizacao import SincronizacaoMixin
+from .streaming import ExportacaoMixin, resposta_json_em_fluxo, stream_requested
+from .filters import FullTextSearchFilter, RankedOrderingFilter
+from .incluidos import UsuariosIncluidosMixin
+from .importacao import ErroImportacao, ImportadorExpositores, ImportadorProdutos
+from .ingressos import IngressosEsgotados, emitir_em_lote, reservar
 from .permissions import IsOwnerOrReadOnly
+from .autocomplete import autocompletar
+from .search import buscar, termos_busca
+
+
+def _campos_usuario(relacao):
+    """Campos do usuário relacionado lidos pelo UserSerializer aninhado"""
+    return [f"{relacao}__{campo}" for campo in UserSerializer.Meta.fields]
+
+
+# Projeções usadas nas listagens: apenas as colunas que os serializers leem,
+# mais criado_em, que é a chave da paginação por cursor
+FEIRA_LIST_ONLY = [
+    *FeiraListSerializer.Meta.fields,
+    "criado_em",
+    *_campos_usuario("criado_por"),
+]
+EXPOSITOR_LIST_ONLY = [
+    "id",
+    "nome",
+    "descricao",
+    "contato",
+    "criado_em",
+    "feira__nome",
+    *_campos_usuario("criado_por"),
+]
+PRODUTO_LIST_ONLY = [
+    "id",
+    "nome",
+    "descricao",
+    "preco",
+    "criado_em",
+    "expositor__nome",
+    "expositor__feira__nome",
+    *_campos_usuario("criado_por"),
+]
+INGRESSO_LIST_ONLY = [
+    "id",
+    "numero_ingresso",
+    "data_emissao",
+    "checkin_em",
+    "criado_em",
+    "atualizado_em",
+    "feira__nome",
+    "feira__preco_ingresso",
+    *_campos_usuario("criado_por"),
+]
+
+
+def _importar_csv(request, importador_class):
+    """Importa o CSV enviado no campo ``arquivo`` e responde com o relatório"""
+    arquivo = request.FILES.get("arquivo")
+    if arquivo is None:
+        raise ValidationError({"arquivo": ["Envie um arquivo CSV."]})
+    try:
+        # utf-8-sig aceita o BOM que o Excel grava no início do arquivo
+        relatorio = importador_class(request.user).importar(
+            codecs.iterdecode(arquivo, "utf-8-sig")
+        )
+    except ErroImportacao as exc:
+        raise ValidationError({"arquivo": [str(exc)]})
+    if relatorio.total_erros and not relatorio.criados:
+        return Response(relatorio.como_dict(), status=status.HTTP_400_BAD_REQUEST)
+    return Response(relatorio.como_dict(), status=status.HTTP_201_CREATED)
 
 
 @api_view(["GET"])
@@ -39,6 +135,9 @@ def api_root(request):
                 "expositores": "/api/expositores/",
                 "produtos": "/api/produtos/",
                 "ingressos": "/api/ingressos/",
+                "dashboard": "/api/dashboard/",
+                "search": "/api/search/?q=",
+                "autocomplete": "/api/autocomplete/?q=",
                 "auth": {
                     "login": "/auth/login/",
                     "register": "/auth/register/",
@@ -51,21 +150,206 @@ def api_root(request):
                 "feiras": "Gerenciar feiras - CRUD completo",
                 "expositores": "Gerenciar expositores por feira",
                 "produtos": "Gerenciar produtos por expositor",
-                "ingressos": "Gerenciar ingressos (apenas usuários autenticados)",
+                "ingressos": "Gerenciar ingressos (apenas usuários autenticados); compra em lote em /api/ingressos/bulk/",
+                "dashboard": "Totais e destaques do sistema (apenas usuários autenticados)",
+                "search": "Busca global em feiras, expositores e produtos",
+                "autocomplete": "Sugestões de nomes por prefixo",
             },
         }
     )
 
 
-class FeiraViewSet(viewsets.ModelViewSet):
+DASHBOARD_CACHE_KEY = "core:dashboard"
+
+
+def _dashboard_geral():
+    """Totais e contagens por feira iguais para todos os usuários"""
+    totais = {
+        "feiras": Feira.objects.count(),
+        "expositores": Expositor.objects.count(),
+        "produtos": Produto.objects.count(),
+    }
+
+    # Contagens por feira: uma consulta agrupada por tabela filha
+    expositores_por_feira = dict(
+        Expositor.objects.order_by().values_list("feira_id").annotate(total=Count("id"))
+    )
+    produtos_por_feira = dict(
+        Produto.objects.order_by()
+        .values_list("expositor__feira_id")
+        .annotate(total=Count("id"))
+    )
+    por_feira = [
+        {
+            "id": feira_id,
+            "nome": nome,
+            "expositores": expositores_por_feira.get(feira_id, 0),
+            "produtos": produtos_por_feira.get(feira_id, 0),
+        }
+        for feira_id, nome in Feira.objects.values_list("id", "nome")
+    ]
+    return {"totais": totais, "por_feira": por_feira}
+
+
+def _dashboard_usuario(user_id, por_feira):
+    """Ingressos do usuário por feira e a feira em destaque para ele"""
+    # Como em /api/ingressos/, cada usuário vê apenas os próprios ingressos
+    ingressos_por_feira = dict(
+        Ingresso.objects.filter(criado_por_id=user_id)
+        .order_by()
+        .values_list("feira_id")
+        .annotate(total=Count("id"))
+    )
+
+    # Feira com mais ingressos do usuário; sem ingressos, a mais recente
+    feira_destaque = None
+    destaque = max(
+        por_feira, key=lambda item: ingressos_por_feira.get(item["id"], 0), default=None
+    )
+    if destaque is not None:
+        feira = Feira.objects.select_related("criado_por").get(pk=destaque["id"])
+        feira_destaque = dict(FeiraListSerializer(feira).data)
+        feira_destaque["total_ingressos"] = ingressos_por_feira.get(destaque["id"], 0)
+
+    return {
+        "ingressos": sum(ingressos_por_feira.values()),
+        "ingressos_por_feira": ingressos_por_feira,
+        "feira_destaque": feira_destaque,
+    }
+
+
+def _em_cache(chave, calcular):
+    data = cache.get(chave)
+    if data is None:
+        data = calcular()
+        cache.set(chave, data, settings.DASHBOARD_CACHE_TIMEOUT)
+    return data
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def dashboard(request):
+    """Totais, feira em destaque e contagens por feira para o dashboard"""
+    geral = _em_cache(DASHBOARD_CACHE_KEY, _dashboard_geral)
+    # Os ingressos são por usuário, então essa parte tem uma chave por usuário
+    usuario = _em_cache(
+        f"{DASHBOARD_CACHE_KEY}:{request.user.pk}",
+        lambda: _dashboard_usuario(request.user.pk, geral["por_feira"]),
+    )
+    ingressos = usuario["ingressos_por_feira"]
+    return Response(
+        {
+            "totais": {**geral["totais"], "ingressos": usuario["ingressos"]},
+            "feira_destaque": usuario["feira_destaque"],
+            "por_feira": [
+                {**item, "ingressos": ingressos.get(item["id"], 0)}
+                for item in geral["por_feira"]
+            ],
+        }
+    )
+
+
+AUTOCOMPLETE_LIMITE_MAXIMO = 50
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def autocomplete(request):
+    """Sugestões de nomes de feiras, expositores e produtos por prefixo"""
+    tipos = request.query_params.get("tipo")
+    try:
+        limite = int(request.query_params.get("limit", 10))
+    except ValueError:
+        limite = 10
+    limite = max(1, min(limite, AUTOCOMPLETE_LIMITE_MAXIMO))
+    resultados = autocompletar(
+        request.query_params.get("q", ""),
+        tipos=tipos.split(",") if tipos else None,
+        limite=limite,
+    )
+    return Response({"results": resultados})
+
+
+class BuscaGlobalView(CamposEsparsosMixin, generics.ListAPIView):
+    """
+    Busca global em feiras, expositores e produtos.
+
+    Consulta a tabela desnormalizada DocumentoBusca com uma única consulta
+    indexada. Parâmetros: ``q`` (texto) e ``tipo`` (feira, expositor ou
+    produto, separados por vírgula).
+    """
+
+    serializer_class = DocumentoBuscaSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = PageNumberPagination
+    campos_fixos = ("id",)
+
+    def get_queryset(self):
+        queryset = DocumentoBusca.objects.all()
+        tipos = self.request.query_params.get("tipo")
+        if tipos:
+            queryset = queryset.filter(tipo__in=tipos.split(","))
+
+        texto = self.request.query_params.get("q", "")
+        if not termos_busca(texto):
+            return queryset.none()
+
+        resultado = buscar(queryset, texto)
+        if resultado is None:
+            return queryset.filter(nome__icontains=texto).order_by("nome")
+        return resultado.order_by("-search_rank", "nome")
+
+
+class FeiraViewSet(
+    ExportacaoMixin,
+    CamposEsparsosMixin,
+    CacheRespostaMixin,
+    SincronizacaoMixin,
+    CondicionalMixin,
+    UsuariosIncluidosMixin,
+    ListaCompiladaMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet para operações CRUD de feiras"""
 
     queryset = Feira.objects.all()
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    tipo_exclusao = Exclusao.TIPO_FEIRA
+    # ingressos_vendidos muda a cada ingresso emitido ou excluído
+    cache_dependencias = (Feira, Ingresso, User)
+    # vendas_em acompanha ingressos_vendidos (core.ingressos)
+    campos_atualizacao = ("atualizado_em", "vendas_em")
+    campos_sincronizacao = ("atualizado_em", "vendas_em")
+    filter_backends = [
+        DjangoFilterBackend,
+        FullTextSearchFilter,
+        RankedOrderingFilter,
+    ]
     filterset_fields = ["cidade", "estado"]
     search_fields = ["nome", "descricao", "cidade", "estado"]
     ordering_fields = ["nome", "data_inicio", "data_termino", "criado_em"]
     ordering = ["-criado_em"]
+    campos_exportacao = (
+        "id",
+        "nome",
+        "descricao",
+        "data_inicio",
+        "data_termino",
+        "local",
+        "cidade",
+        "estado",
+        "preco_ingresso",
+        "capacidade",
+        "ingressos_vendidos",
+        "criado_por__username",
+        "criado_em",
+        "atualizado_em",
+    )
+
+    def get_queryset(self):
+        queryset = Feira.objects.select_related("criado_por")
+        if self.action == "list":
+            queryset = queryset.only(*FEIRA_LIST_ONLY)
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -78,7 +362,8 @@ class FeiraViewSet(viewsets.ModelViewSet):
         """
         Instantiates and returns the list of permissions for this view.
         """
-        if self.action in ["list", "retrieve"]:
+        # As ações públicas (expositores, catalogo) também ficam abertas
+        if self.action in ["list", "retrieve", "expositores", "catalogo"]:
             permission_classes = [permissions.AllowAny]
         elif self.action == "create":
             permission_classes = [permissions.IsAuthenticated]
@@ -104,20 +389,155 @@ class FeiraViewSet(viewsets.ModelViewSet):
     def expositores(self, request, pk=None):
         """Retorna os expositores de uma feira específica"""
         feira = self.get_object()
-        expositores = feira.expositores.all()
-        serializer = ExpositorListSerializer(expositores, many=True)
-        return Response(serializer.data)
+        expositores = (
+            Expositor.objects.filter(feira=feira)
+            .select_related("feira", "criado_por")
+            .only(*EXPOSITOR_LIST_ONLY)
+        )
+        if stream_requested(request):
+            return resposta_json_em_fluxo(expositores, ExpositorListSerializer)
+        page = self.paginate_queryset(expositores)
+        serializer = ExpositorListSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["get"], permission_classes=[permissions.AllowAny])
+    def catalogo(self, request, pk=None):
+        """
+        Feira, expositores e produtos num único documento pré-montado.
 
+        O JSON já comprimido (brotli ou gzip) é enviado como está quando o
+        cliente aceita a codificação; ver ``core.catalogo``.
+        """
+        try:
+            etag, variantes = obter_catalogo(pk)
+        except (Feira.DoesNotExist, DjangoValidationError):
+            raise NotFound("Feira não encontrada.")
+
+        response = get_conditional_response(request, etag=etag)
+        codificacao = None
+        if response is None:
+            codificacao = compressao.codificacao(request, variantes)
+            if codificacao:
+                conteudo = variantes[codificacao]
+            else:
+                conteudo = gzip.decompress(variantes[compressao.GZIP])
+            response = HttpResponse(conteudo, content_type="application/json")
+        response["ETag"] = etag
+        if codificacao:
+            compressao.marcar(response, codificacao)
+        else:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        return response
 
-class ExpositorViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=["post"], serializer_class=CheckinSerializer)
+    def checkin(self, request, pk=None):
+        """
+        Check-in de um ingresso na portaria (apenas o dono da feira).
+
+        Procura o número no índice em memória de ``core.checkin`` e grava o
+        check-in na primeira leitura; ler o mesmo ingresso de novo, em
+        qualquer processo, devolve o horário do primeiro check-in.
+        """
+        serializer = CheckinSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            indice = obter_indice(pk)
+        except (Feira.DoesNotExist, DjangoValidationError):
+            raise NotFound("Feira não encontrada.")
+        if indice.dono_id != request.user.pk:
+            raise PermissionDenied()
+
+        numero = serializer.validated_data["numero_ingresso"]
+        resultado = registrar(indice, numero)
+        if resultado is None:
+            return Response(
+                {"numero_ingresso": numero, "valido": False},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        primeira_leitura, checkin_em = resultado
+        return Response(
+            {
+                "numero_ingresso": numero,
+                "valido": True,
+                "primeira_leitura": primeira_leitura,
+                "checkin_em": checkin_em,
+            }
+        )
+
+    @action(detail=True, methods=["get"])
+    def pacote(self, request, pk=None):
+        """
+        Pacote binário dos ingressos para leitura offline (apenas o dono).
+
+        ``?desde=<versao>`` devolve só os ingressos novos; ver ``core.pacote``.
+        """
+        feira = get_object_or_404(
+            Feira.objects.only("id", "criado_por_id", "ingressos_excluidos_em"),
+            pk=pk,
+        )
+        if feira.criado_por_id != request.user.pk:
+            raise PermissionDenied()
+        desde = request.query_params.get("desde")
+        if desde is not None:
+            try:
+                desde = int(desde)
+            except ValueError:
+                desde = -1
+            if not versao_valida(desde):
+                raise ValidationError({"desde": ["Versão inválida."]})
+
+        dados, tipo, versao = gerar_pacote(feira, desde)
+        response = HttpResponse(dados, content_type="application/octet-stream")
+        response["Content-Disposition"] = (
+            f'attachment; filename="ingressos-{feira.pk}-{versao}.bin"'
+        )
+        response["X-Pacote-Tipo"] = "delta" if tipo == DELTA else "completo"
+        response["X-Pacote-Versao"] = str(versao)
+        return response
+
+
+class ExpositorViewSet(
+    ExportacaoMixin,
+    CamposEsparsosMixin,
+    CacheRespostaMixin,
+    SincronizacaoMixin,
+    CondicionalMixin,
+    UsuariosIncluidosMixin,
+    ListaCompiladaMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet para operações CRUD de expositores"""
 
     queryset = Expositor.objects.all()
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    tipo_exclusao = Exclusao.TIPO_EXPOSITOR
+    cache_dependencias = (Expositor, Feira, User)
+    campos_atualizacao = ("atualizado_em", "feira__atualizado_em")
+    filter_backends = [
+        DjangoFilterBackend,
+        FullTextSearchFilter,
+        RankedOrderingFilter,
+    ]
     filterset_fields = ["feira"]
     search_fields = ["nome", "descricao"]
     ordering_fields = ["nome", "criado_em"]
     ordering = ["-criado_em"]
+    campos_exportacao = (
+        "id",
+        "nome",
+        "descricao",
+        "contato",
+        "feira_id",
+        "feira__nome",
+        "criado_por__username",
+        "criado_em",
+        "atualizado_em",
+    )
+
+    def get_queryset(self):
+        queryset = Expositor.objects.select_related("feira", "criado_por")
+        if self.action == "list":
+            queryset = queryset.only(*EXPOSITOR_LIST_ONLY)
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -142,24 +562,75 @@ class ExpositorViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(criado_por=self.request.user)
 
+    @action(detail=False, methods=["post"], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """Importa expositores de um arquivo CSV"""
+        return _importar_csv(request, ImportadorExpositores)
+
     @action(detail=True, methods=["get"], permission_classes=[permissions.AllowAny])
     def produtos(self, request, pk=None):
         """Retorna os produtos de um expositor específico"""
         expositor = self.get_object()
-        produtos = expositor.produtos.all()
-        serializer = ProdutoListSerializer(produtos, many=True)
-        return Response(serializer.data)
-
-
-class ProdutoViewSet(viewsets.ModelViewSet):
+        produtos = (
+            Produto.objects.filter(expositor=expositor)
+            .select_related("expositor__feira", "criado_por")
+            .only(*PRODUTO_LIST_ONLY)
+        )
+        if stream_requested(request):
+            return resposta_json_em_fluxo(produtos, ProdutoListSerializer)
+        page = self.paginate_queryset(produtos)
+        serializer = ProdutoListSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class ProdutoViewSet(
+    ExportacaoMixin,
+    CamposEsparsosMixin,
+    CacheRespostaMixin,
+    SincronizacaoMixin,
+    CondicionalMixin,
+    UsuariosIncluidosMixin,
+    ListaCompiladaMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet para operações CRUD de produtos"""
 
     queryset = Produto.objects.all()
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    tipo_exclusao = Exclusao.TIPO_PRODUTO
+    cache_dependencias = (Produto, Expositor, Feira, User)
+    campos_atualizacao = (
+        "atualizado_em",
+        "expositor__atualizado_em",
+        "expositor__feira__atualizado_em",
+    )
+    filter_backends = [
+        DjangoFilterBackend,
+        FullTextSearchFilter,
+        RankedOrderingFilter,
+    ]
     filterset_fields = ["expositor", "expositor__feira"]
     search_fields = ["nome", "descricao"]
     ordering_fields = ["nome", "preco", "criado_em"]
     ordering = ["-criado_em"]
+    campos_exportacao = (
+        "id",
+        "nome",
+        "descricao",
+        "preco",
+        "expositor_id",
+        "expositor__nome",
+        "expositor__feira_id",
+        "expositor__feira__nome",
+        "criado_por__username",
+        "criado_em",
+        "atualizado_em",
+    )
+
+    def get_queryset(self):
+        queryset = Produto.objects.select_related("expositor__feira", "criado_por")
+        if self.action == "list":
+            queryset = queryset.only(*PRODUTO_LIST_ONLY)
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -184,34 +655,88 @@ class ProdutoViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(criado_por=self.request.user)
 
-
-class IngressoViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["post"], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """Importa produtos de um arquivo CSV"""
+        return _importar_csv(request, ImportadorProdutos)
+
+
+class IngressoViewSet(
+    ExportacaoMixin,
+    CamposEsparsosMixin,
+    SincronizacaoMixin,
+    CondicionalMixin,
+    UsuariosIncluidosMixin,
+    ListaCompiladaMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet para operações de ingressos"""
 
     queryset = Ingresso.objects.all()
+    tipo_exclusao = Exclusao.TIPO_INGRESSO
+    exclusoes_do_usuario = True
+    campos_atualizacao = ("atualizado_em", "feira__atualizado_em")
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ["feira"]
     search_fields = ["numero_ingresso", "feira__nome"]
     ordering_fields = ["data_emissao", "criado_em"]
     ordering = ["-criado_em"]
+    campos_exportacao = (
+        "id",
+        "numero_ingresso",
+        "feira_id",
+        "feira__nome",
+        "feira__preco_ingresso",
+        "data_emissao",
+        "checkin_em",
+        "criado_em",
+        "atualizado_em",
+    )
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
 
     def get_serializer_class(self):
         if self.action == "create":
             return IngressoCreateSerializer
+        if self.action == "bulk":
+            return IngressoLoteSerializer
         return IngressoDetailSerializer
 
     def get_queryset(self):
         """Retorna apenas os ingressos do usuário autenticado"""
-        return Ingresso.objects.filter(criado_por=self.request.user)
+        queryset = Ingresso.objects.filter(criado_por=self.request.user)
+        queryset = queryset.select_related("feira", "criado_por")
+        if self.action == "list":
+            queryset = queryset.only(*INGRESSO_LIST_ONLY)
+        return queryset
 
     def perform_create(self, serializer):
-        serializer.save(criado_por=self.request.user)
+        try:
+            with transaction.atomic():
+                reservar(serializer.validated_data["feira"].pk)
+                serializer.save(criado_por=self.request.user)
+        except IngressosEsgotados as exc:
+            raise ValidationError({"feira": [str(exc)]})
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Emite vários ingressos numa única transação"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            ingressos = emitir_em_lote(
+                serializer.validated_data["pedidos"], request.user
+            )
+        except IngressosEsgotados as exc:
+            raise ValidationError({"feira": [str(exc)]})
+        return Response(
+            IngressoDetailSerializer(ingressos, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
 
     def destroy(self, request, *args, **kwargs):
         """Override para permitir apenas exclusão"""
         instance = self.get_object()
-        if instance.criado_por != request.user:
+        if instance.criado_por_id != request.user.pk:
             return Response(
                 {"error": "Você só pode excluir seus próprios ingressos."},
                 status=status.HTTP_403_FORBIDDEN,
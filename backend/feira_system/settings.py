@@ -56,6 +56,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.compressao.CompressaoMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -156,21 +157,110 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Cache compartilhado entre os processos (ex.: redis://localhost:6379/0).
+# Sem ele cada processo tem o seu LocMemCache, e o que depende de versões
+# no cache (ex.: o cache de respostas) só vale dentro do processo
+REDIS_URL = config("REDIS_URL", default="")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "feira-system",
+        }
+    }
+
+# Tempo (segundos) que os agregados do dashboard ficam em cache
+DASHBOARD_CACHE_TIMEOUT = config("DASHBOARD_CACHE_TIMEOUT", default=30, cast=int)
+
+# Cache das leituras públicas (ver core/respostas.py). Desligado sem o cache
+# compartilhado: uma escrita em um processo não invalidaria os demais
+RESPOSTAS_CACHE_ATIVO = config(
+    "RESPOSTAS_CACHE_ATIVO", default=bool(REDIS_URL), cast=bool
+)
+RESPOSTAS_CACHE_BACKEND = config(
+    "RESPOSTAS_CACHE_BACKEND", default="core.respostas.MemoriaLocal"
+)
+RESPOSTAS_CACHE_MAX_ITENS = config("RESPOSTAS_CACHE_MAX_ITENS", default=2000, cast=int)
+# Usados pelo backend core.respostas.CacheCompartilhado
+RESPOSTAS_CACHE_ALIAS = config("RESPOSTAS_CACHE_ALIAS", default="default")
+RESPOSTAS_CACHE_TIMEOUT = config("RESPOSTAS_CACHE_TIMEOUT", default=3600, cast=int)
+
+# Tamanho mínimo (bytes) das respostas comprimidas (ver core/compressao.py)
+COMPRESSAO_MINIMO = config("COMPRESSAO_MINIMO", default=1024, cast=int)
+
+# Dias que os registros de exclusão ficam disponíveis para ?updated_since=
+# (ver core/sincronizacao.py e manage.py limpar_exclusoes)
+EXCLUSOES_RETENCAO_DIAS = config("EXCLUSOES_RETENCAO_DIAS", default=90, cast=int)
+
+# Máximo de registros por modelo no índice de autocomplete em memória
+AUTOCOMPLETE_MAX_REGISTROS = config(
+    "AUTOCOMPLETE_MAX_REGISTROS", default=100_000, cast=int
+)
+
+# Feiras com o índice de check-in em memória por processo (ver core/checkin.py)
+CHECKIN_MAX_FEIRAS = config("CHECKIN_MAX_FEIRAS", default=100, cast=int)
+
+# Alocação de números de ingresso (ver core/numeracao.py)
+INGRESSO_NUMERO_ALLOCATOR = config(
+    "INGRESSO_NUMERO_ALLOCATOR", default="core.numeracao.SequencialEmBlocos"
+)
+# Tamanho da faixa de números reservada por processo a cada ida ao banco
+INGRESSO_NUMERO_BLOCO = config("INGRESSO_NUMERO_BLOCO", default=1000, cast=int)
+
+# Situações de usuários (ativo/inativo) guardadas por processo na
+# autenticação JWT (ver core/autenticacao.py)
+AUTENTICACAO_CACHE_MAX_USUARIOS = config(
+    "AUTENTICACAO_CACHE_MAX_USUARIOS", default=10_000, cast=int
+)
+# Validade (segundos) de cada situação guardada: atraso máximo para um
+# usuário desativado ser recusado nos processos sem o cache compartilhado
+AUTENTICACAO_CACHE_TIMEOUT = config("AUTENTICACAO_CACHE_TIMEOUT", default=10, cast=int)
+
+# Listagens serializadas a partir de values() (ver core/serializacao.py)
+SERIALIZACAO_COMPILADA = config("SERIALIZACAO_COMPILADA", default=True, cast=bool)
+
+# Linhas validadas e gravadas por vez na importação de CSV (ver core/importacao.py)
+IMPORTACAO_LOTE = config("IMPORTACAO_LOTE", default=1000, cast=int)
+
 # Django REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.autenticacao.JWTUsuarioTokenAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        # Accept: application/msgpack
+        "core.renderers.MessagePackRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+        # Content-Type: application/msgpack
+        "core.parsers.MessagePackParser",
+    ],
 }
 
 # JWT Settings
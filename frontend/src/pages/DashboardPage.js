@@ -14,12 +14,7 @@ import {
   FireIcon
 } from '@heroicons/react/24/outline'
 import Avatar from '../components/Avatar'
-import {
-  produtoService,
-  feiraService,
-  expositorService,
-  ingressoService
-} from '../services/api'
+import { dashboardService } from '../services/api'
 
 function DashboardPage() {
   const { user } = useAuth()
@@ -46,81 +41,20 @@ function DashboardPage() {
           return
         }
 
-        // Usar os services específicos
-        console.log('Buscando produtos...')
-        const produtos = await produtoService.getAll()
-        console.log('Produtos recebidos:', produtos)
-
-        console.log('Buscando feiras...')
-        const feiras = await feiraService.getAll()
-        console.log('Feiras recebidas:', feiras)
-
-        console.log('Buscando expositores...')
-        const expositores = await expositorService.getAll()
-        console.log('Expositores recebidos:', expositores)
-
-        console.log('Buscando ingressos...')
-        const ingressos = await ingressoService.getAll()
-        console.log('Ingressos recebidos:', ingressos)
-
-        // Processar dados - garantir que são arrays
-        const produtosArray = Array.isArray(produtos)
-          ? produtos
-          : produtos.results || []
-        const feirasArray = Array.isArray(feiras)
-          ? feiras
-          : feiras.results || []
-        const expositoresArray = Array.isArray(expositores)
-          ? expositores
-          : expositores.results || []
-        const ingressosArray = Array.isArray(ingressos)
-          ? ingressos
-          : ingressos.results || []
-
-        // Encontrar feira em destaque (com mais ingressos vendidos)
-        let feiraDestaque = null
-        if (feirasArray.length > 0) {
-          // Contar ingressos por feira
-          const ingressosPorFeira = {}
-          ingressosArray.forEach(ingresso => {
-            const feiraId = ingresso.feira
-            ingressosPorFeira[feiraId] = (ingressosPorFeira[feiraId] || 0) + 1
-          })
+        // Agregados calculados no servidor
+        const dados = await dashboardService.get()
 
-          // Encontrar a feira com mais ingressos
-          let maxIngressos = 0
-          let feiraComMaisIngressos = null
-
-          for (const [feiraId, quantidade] of Object.entries(
-            ingressosPorFeira
-          )) {
-            if (quantidade > maxIngressos) {
-              maxIngressos = quantidade
-              feiraComMaisIngressos = feiraId
-            }
-          }
-
-          // Se encontrou uma feira com ingressos, buscar os dados dela
-          if (feiraComMaisIngressos) {
-            feiraDestaque = feirasArray.find(
-              feira => feira.id === feiraComMaisIngressos
-            )
-            if (feiraDestaque) {
-              feiraDestaque.totalIngressos = maxIngressos
+        const feiraDestaque = dados.feira_destaque
+          ? {
+              ...dados.feira_destaque,
+              totalIngressos: dados.feira_destaque.total_ingressos
             }
-          }
-
-          // Se não há ingressos vendidos, pegar a primeira feira
-          if (!feiraDestaque && feirasArray.length > 0) {
-            feiraDestaque = feirasArray[0]
-            feiraDestaque.totalIngressos = 0
-          }
-        }
+          : null
 
         const dashboardInfo = {
-          totalProdutos: produtosArray.length,
+          totalProdutos: dados.totais.produtos,
           feiraDestaque,
-          totalExpositores: expositoresArray.length,
+          totalExpositores: dados.totais.expositores,
           loading: false
         }
 
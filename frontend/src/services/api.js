@@ -136,8 +136,8 @@ export const feiraService = {
     await api.delete(`/api/feiras/${id}/`)
   },
 
-  getExpositores: async id => {
-    const response = await api.get(`/api/feiras/${id}/expositores/`)
+  getExpositores: async (id, params = {}) => {
+    const response = await api.get(`/api/feiras/${id}/expositores/`, { params })
     return response.data
   }
 }
@@ -168,8 +168,8 @@ export const expositorService = {
     await api.delete(`/api/expositores/${id}/`)
   },
 
-  getProdutos: async id => {
-    const response = await api.get(`/api/expositores/${id}/produtos/`)
+  getProdutos: async (id, params = {}) => {
+    const response = await api.get(`/api/expositores/${id}/produtos/`, { params })
     return response.data
   }
 }
@@ -223,6 +223,14 @@ export const ingressoService = {
   }
 }
 
+// Dashboard Services
+export const dashboardService = {
+  get: async () => {
+    const response = await api.get('/api/dashboard/')
+    return response.data
+  }
+}
+
 // Exportar a instância api tanto como default quanto nomeada
 export { api }
 export default api